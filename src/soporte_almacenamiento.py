@@ -0,0 +1,294 @@
+#######################################################################################
+##            Manejo de datos tabulares                                           ##
+#######################################################################################
+# Para manipulación y análisis de datos tabulares (DataFrames)
+import pandas as pd
+# Para interactuar con el sistema operativo (rutas, extensiones, etc.)
+import os
+# Para leer los archivos antiguos (CSV con diccionarios y listas en texto)
+import json
+import ast
+
+#######################################################################################
+##            Almacenamiento columnar (Parquet)                                    ##
+#######################################################################################
+# Apache Arrow / Parquet: columnas tipadas con listas y mapas anidados, sin `eval` al leer
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+#######################################################################################
+##            Fin de los Imports                                                     ##
+#######################################################################################
+
+# Columnas anidadas del pipeline y su tipo en Parquet
+# - Mapas `{clave: valor}` (nombre de playlist → id, id de artista → nombre)
+COLUMNAS_MAPA = ["playlists", "reduced_playlists", "artistas", "unique_artists"]
+# - Listas de IDs o nombres
+COLUMNAS_LISTA = ["playlist_ids", "playlist_ids_limited", "genres"]
+# - Rankings: listas de pares (nombre, apariciones)
+COLUMNAS_RANKING = ["artist_ranking", "genres_ranking"]
+
+
+def a_estructura(valor, vacio=None):
+    """
+    Convierte un valor de una columna anidada a su estructura de Python (diccionario o lista).
+
+    Parámetros:
+    ----------
+    valor : str, dict, list o None
+        Valor leído de un CSV (texto con un diccionario/lista de Python o JSON) o ya convertido (desde Parquet o memoria).
+
+    vacio : opcional
+        Valor que se devuelve si `valor` es nulo (`None` o `NaN`).
+
+    Retorna:
+    -------
+    dict, list o el valor `vacio`
+
+    Notas:
+    ------
+    - Si el valor ya es una estructura, se devuelve tal cual (no se vuelve a analizar).
+    - El texto se intenta leer primero como JSON (rápido, y así `null` se lee como `None` sin reemplazos de texto)
+      y, si no es JSON válido, con `ast.literal_eval` (formato `repr` de Python de los CSV antiguos).
+    """
+    if isinstance(valor, (dict, list, tuple)):
+        return valor
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return vacio
+    if isinstance(valor, str):
+        try:
+            return json.loads(valor)
+        except ValueError:
+            return ast.literal_eval(valor)
+    return valor
+
+def _es_parquet(ruta):
+    return str(ruta).lower().endswith((".parquet", ".pq"))
+
+def _columna_arrow(nombre, valores):
+    # Convierte una columna anidada a un array de Arrow con su tipo explícito
+    valores = [a_estructura(valor) for valor in valores]
+    if nombre in COLUMNAS_MAPA:
+        tipo = pa.map_(pa.string(), pa.string())
+        datos = [None if valor is None else [(str(clave), None if dato is None else str(dato)) for clave, dato in dict(valor).items()]
+                 for valor in valores]
+    elif nombre in COLUMNAS_LISTA:
+        tipo = pa.list_(pa.string())
+        datos = [None if valor is None else [None if dato is None else str(dato) for dato in valor] for valor in valores]
+    else:
+        tipo = pa.list_(pa.struct([("nombre", pa.string()), ("apariciones", pa.int64())]))
+        datos = [None if valor is None else [{"nombre": None if par[0] is None else str(par[0]), "apariciones": int(par[1])} for par in valor]
+                 for valor in valores]
+    return pa.array(datos, type=tipo)
+
+def guardar_datos(df, ruta, **kwargs):
+    """
+    Guarda un DataFrame del pipeline en CSV o Parquet según la extensión de `ruta`.
+
+    Parámetros:
+    ----------
+    df : pandas.DataFrame
+        DataFrame a guardar. Las columnas anidadas (`COLUMNAS_MAPA`, `COLUMNAS_LISTA`, `COLUMNAS_RANKING`)
+        pueden contener estructuras o texto.
+
+    ruta : str
+        Archivo de destino. Con extensión `.parquet` se guarda en Parquet; con cualquier otra, en CSV (sin índice, como hasta ahora).
+
+    **kwargs :
+        Argumentos adicionales para `DataFrame.to_csv` (solo CSV).
+
+    Notas:
+    ------
+    - En Parquet, los mapas se guardan como `map<string, string>`, las listas como `list<string>` y los rankings
+      como `list<struct<nombre, apariciones>>`: al leerlos no hace falta ningún `eval`.
+    - El resto de columnas se guardan con su tipo de pandas.
+    """
+    if not _es_parquet(ruta):
+        kwargs.setdefault("index", False)
+        df.to_csv(ruta, **kwargs)
+        return
+    if pa is None:
+        raise ImportError("Para guardar en Parquet es necesario instalar pyarrow (pip install pyarrow)")
+
+    pq.write_table(_tabla_arrow(df), ruta)
+
+def _tabla_arrow(df):
+    # Convierte un DataFrame del pipeline a una tabla de Arrow con las columnas anidadas tipadas
+    anidadas = [columna for columna in df.columns if columna in COLUMNAS_MAPA + COLUMNAS_LISTA + COLUMNAS_RANKING]
+    tabla = pa.Table.from_pandas(df.drop(columns=anidadas), preserve_index=False)
+    for columna in anidadas:
+        tabla = tabla.append_column(columna, _columna_arrow(columna, df[columna]))
+    return tabla.select([str(columna) for columna in df.columns])
+
+def cargar_datos(ruta, columnas=None, **kwargs):
+    """
+    Carga un DataFrame del pipeline desde CSV o Parquet según la extensión de `ruta`.
+
+    Parámetros:
+    ----------
+    ruta : str
+        Archivo a leer (`.parquet` o CSV).
+
+    columnas : list[str], opcional
+        Columnas a leer (en Parquet solo se leen del disco esas columnas).
+
+    **kwargs :
+        Argumentos adicionales para `pandas.read_csv` (solo CSV, por ejemplo `index_col=0`).
+
+    Retorna:
+    -------
+    pandas.DataFrame
+        En Parquet, las columnas anidadas se devuelven ya como diccionarios, listas y listas de tuplas `(nombre, apariciones)`.
+        En CSV se devuelven como texto, igual que `pd.read_csv` (se convierten con `a_estructura` al usarlas).
+    """
+    if not _es_parquet(ruta):
+        if columnas is not None:
+            kwargs["usecols"] = columnas
+        return pd.read_csv(ruta, **kwargs)
+    if pq is None:
+        raise ImportError("Para leer Parquet es necesario instalar pyarrow (pip install pyarrow)")
+
+    return _df_desde_arrow(pq.read_table(ruta, columns=columnas))
+
+def _df_desde_arrow(tabla):
+    # Convierte una tabla (o lote) de Arrow a DataFrame, con las columnas anidadas como estructuras de Python
+    if isinstance(tabla, pa.RecordBatch):
+        tabla = pa.Table.from_batches([tabla])
+    anidadas = [columna for columna in tabla.column_names if columna in COLUMNAS_MAPA + COLUMNAS_LISTA + COLUMNAS_RANKING]
+    df = tabla.drop(anidadas).to_pandas()
+    for columna in anidadas:
+        valores = tabla.column(columna).to_pylist()
+        if columna in COLUMNAS_MAPA:
+            valores = [None if valor is None else dict(valor) for valor in valores]
+        elif columna in COLUMNAS_RANKING:
+            valores = [None if valor is None else [(par["nombre"], par["apariciones"]) for par in valor] for valor in valores]
+        df[columna] = pd.Series(valores, index=df.index, dtype=object)
+    return df[tabla.column_names]
+
+def cargar_por_bloques(ruta, tamano_bloque=10000, columnas=None, **kwargs):
+    """
+    Lee un archivo del pipeline (CSV o Parquet) en bloques de `tamano_bloque` filas.
+
+    Parámetros:
+    ----------
+    ruta : str
+        Archivo a leer (`.parquet` o CSV).
+
+    tamano_bloque : int, opcional (por defecto 10000)
+        Número de filas de cada bloque.
+
+    columnas : list[str], opcional
+        Columnas a leer.
+
+    **kwargs :
+        Argumentos adicionales para `pandas.read_csv` (solo CSV).
+
+    Retorna:
+    -------
+    generador de pandas.DataFrame
+        Cada bloque con el mismo formato que `cargar_datos` (en Parquet, las columnas anidadas ya como estructuras).
+
+    Notas:
+    ------
+    - Solo hay un bloque en memoria a la vez: la memoria no depende del tamaño del archivo.
+    - En CSV se usa `read_csv(chunksize=...)`; en Parquet, `ParquetFile.iter_batches`.
+    """
+    if not _es_parquet(ruta):
+        if columnas is not None:
+            kwargs["usecols"] = columnas
+        yield from pd.read_csv(ruta, chunksize=tamano_bloque, **kwargs)
+        return
+    if pq is None:
+        raise ImportError("Para leer Parquet es necesario instalar pyarrow (pip install pyarrow)")
+    for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tamano_bloque, columns=columnas):
+        yield _df_desde_arrow(lote)
+
+class EscritorBloques:
+    """
+    Escribe un archivo del pipeline (CSV o Parquet) bloque a bloque, sin tener todas las filas en memoria.
+
+    Parámetros:
+    -----------
+    ruta : str
+        Archivo de destino (`.parquet` o CSV). Se escribe primero en un temporal que sustituye al destino al cerrar,
+        de modo que el destino puede ser el mismo archivo que se está leyendo por bloques.
+
+    Notas:
+    ------
+    - En CSV, el primer bloque escribe la cabecera y los siguientes se añaden al final.
+    - En Parquet, cada bloque es un grupo de filas de un `ParquetWriter` (el esquema lo fija el primer bloque).
+    - Si se sale del bloque `with` con una excepción, el temporal se borra y el destino queda como estaba.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    with EscritorBloques("../datos/01 Spotify/02_followers_zara.parquet") as escritor:
+        for bloque in cargar_por_bloques("../datos/01 Spotify/00 TempSaves/00_tempsave_zara.csv"):
+            escritor.escribir(bloque)
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._temporal = ruta + ".tmp"
+        self._escritor = None
+        self._filas = 0
+
+    def escribir(self, df):
+        if _es_parquet(self.ruta):
+            if pq is None:
+                raise ImportError("Para guardar en Parquet es necesario instalar pyarrow (pip install pyarrow)")
+            tabla = _tabla_arrow(df)
+            if self._escritor is None:
+                self._escritor = pq.ParquetWriter(self._temporal, tabla.schema)
+            self._escritor.write_table(tabla.cast(self._escritor.schema))
+        else:
+            df.to_csv(self._temporal, index=False, mode="w" if self._filas == 0 else "a", header=self._filas == 0)
+        self._filas += len(df)
+
+    def cerrar(self, confirmar=True):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+        if confirmar and os.path.exists(self._temporal):
+            os.replace(self._temporal, self.ruta)
+        elif os.path.exists(self._temporal):
+            os.remove(self._temporal)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *args):
+        self.cerrar(confirmar=tipo is None)
+
+def convertir_a_parquet(ruta_csv, ruta_parquet=None, **kwargs):
+    """
+    Convierte un CSV del pipeline (con diccionarios y listas en texto) a Parquet con columnas tipadas.
+
+    Parámetros:
+    ----------
+    ruta_csv : str
+        CSV de origen.
+
+    ruta_parquet : str, opcional
+        Destino. Por defecto, la misma ruta con extensión `.parquet`.
+
+    **kwargs :
+        Argumentos adicionales para `pandas.read_csv` (por ejemplo `index_col=0` en los CSV de seguidores).
+
+    Retorna:
+    -------
+    str
+        Ruta del archivo Parquet generado.
+
+    Ejemplo de uso:
+    --------------
+    ```python
+    convertir_a_parquet("../datos/01 Spotify/01_followers_zara.csv", index_col=0)
+    """
+    ruta_parquet = ruta_parquet or os.path.splitext(ruta_csv)[0] + ".parquet"
+    guardar_datos(pd.read_csv(ruta_csv, **kwargs), ruta_parquet)
+    return ruta_parquet
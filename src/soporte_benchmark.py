@@ -0,0 +1,211 @@
+"""
+Benchmark de las funciones de rastreo contra el servidor local de `soporte_mock_spotify`.
+
+Uso (desde la raíz del repositorio):
+
+    python -m src.soporte_benchmark
+    python -m src.soporte_benchmark --escenarios artistas_concurrente generos --playlists 200 --latencia 0.05 --prob-429 0.01
+    python -m src.soporte_benchmark --fixtures "datos/01 Spotify/00 TempSaves/cache_spotify.sqlite"
+
+Para cada función muestra el tiempo total, las peticiones por segundo y las latencias p50/p99 vistas por el cliente.
+"""
+#######################################################################################
+##            Línea de comandos y utilidades                                       ##
+#######################################################################################
+# Para leer los argumentos de la línea de comandos.
+import argparse
+# Para configurar las URLs del servidor local antes de importar `soporte_spotify`.
+import os
+# Para crear almacenes y cachés temporales que no mezclen datos reales con sintéticos.
+import tempfile
+# Para medir tiempos.
+from time import perf_counter
+# Para evitar las trazas de las funciones medidas.
+from contextlib import redirect_stdout
+import io
+
+#######################################################################################
+##            Servidor local de la API                                             ##
+#######################################################################################
+# Servidor que imita la Web API de Spotify.
+from src.soporte_mock_spotify import ServidorSpotifyFalso
+
+#######################################################################################
+##            Fin de los Imports                                                     ##
+#######################################################################################
+
+ESCENARIOS = ["artistas", "artistas_concurrente", "artistas_incremental", "generos",
+              "playlists", "saved_tracks", "top_tracks"]
+
+
+def percentil(valores, p):
+    """
+    Percentil `p` (0-100) de una lista de valores, por el método del rango más cercano.
+    """
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+class _Latencias:
+    # Guarda la duración de cada petición de principio a fin (envío, espera, cabeceras y cuerpo).
+    # `response.elapsed` solo mide hasta las cabeceras, así que se envuelve `Session.request`, que vuelve con el cuerpo leído.
+    def __init__(self):
+        self.valores = []
+
+    def envolver(self, sesion):
+        original = sesion.request
+
+        def request(*args, **kwargs):
+            inicio = perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.valores.append(perf_counter() - inicio)
+
+        sesion.request = request
+
+def medir(nombre, funcion, servidor, latencias):
+    """
+    Ejecuta `funcion()` y devuelve un diccionario con su tiempo total, peticiones/s y latencias p50/p99.
+    """
+    servidor.reiniciar_estadisticas()
+    latencias.valores.clear()
+    inicio = perf_counter()
+    with redirect_stdout(io.StringIO()):
+        funcion()
+    duracion = perf_counter() - inicio
+    estadisticas = servidor.estadisticas()
+    return {
+        "funcion": nombre,
+        "tiempo_s": round(duracion, 3),
+        "peticiones": estadisticas["peticiones"],
+        "peticiones_s": round(estadisticas["peticiones"] / duracion, 1) if duracion else 0.0,
+        "p50_ms": round(percentil(latencias.valores, 50) * 1000, 1),
+        "p99_ms": round(percentil(latencias.valores, 99) * 1000, 1),
+        "429": estadisticas["429"],
+        "401": estadisticas["401"]
+    }
+
+def ejecutar_benchmark(escenarios=None, playlists=100, artistas=2000, usuarios=20, concurrencia=10,
+                       latencia=0.02, prob_429=0.0, retry_after=1, duracion_token=3600, fixtures=None, tasa=50):
+    """
+    Arranca el servidor local, dirige `soporte_spotify` hacia él y mide cada escenario.
+
+    Parámetros:
+    -----------
+    escenarios : list[str], opcional
+        Funciones a medir (por defecto todas las de `ESCENARIOS`).
+
+    playlists, artistas, usuarios : int
+        Número de playlists, artistas y usuarios sintéticos de cada escenario.
+
+    concurrencia : int
+        Peticiones simultáneas de las versiones concurrentes.
+
+    latencia, prob_429, retry_after, duracion_token, fixtures :
+        Parámetros del servidor (ver `ServidorSpotifyFalso`).
+
+    tasa : float
+        Tasa inicial y máxima (peticiones/s) del `limitador` de `soporte_spotify` durante el benchmark.
+
+    Retorna:
+    --------
+    pandas.DataFrame
+        Una fila por escenario con `tiempo_s`, `peticiones`, `peticiones_s`, `p50_ms`, `p99_ms`, `429` y `401`.
+
+    Notas:
+    ------
+    - La caché de respuestas se desactiva y el almacén de metadatos se sustituye por uno temporal,
+      para que todas las peticiones lleguen al servidor y no se mezclen datos sintéticos con los reales.
+    - En `saved_tracks` y `top_tracks` se mide la descarga de `generate_all_*`; la escritura en la base de datos se omite.
+    """
+    escenarios = escenarios or ESCENARIOS
+    servidor = ServidorSpotifyFalso(latencia=latencia, prob_429=prob_429, retry_after=retry_after,
+                                    duracion_token=duracion_token, fixtures=fixtures).iniciar()
+    try:
+        os.environ["SPOTIFY_API_URL"] = servidor.url_api
+        os.environ["SPOTIFY_AUTH_URL"] = servidor.url_auth
+        os.environ.setdefault("client_ID", "benchmark")
+        os.environ.setdefault("client_Secret", "benchmark")
+
+        # Importar después de configurar las URLs
+        import pandas as pd
+        import spotipy
+        import src.soporte_spotify as api
+
+        carpeta = tempfile.mkdtemp(prefix="brandvibes_benchmark_")
+        api.API_URL = servidor.url_api
+        api.AUTH_URL = servidor.url_auth
+        api.configurar_cache(activa=False)
+        api.almacen_metadatos = api.AlmacenMetadatos(ruta=os.path.join(carpeta, "metadatos.sqlite"))
+        api.configurar_limitador(tasa_inicial=tasa, tasa_maxima=tasa, capacidad=max(10, concurrencia))
+        api.configurar_sesion(pool_size=max(20, concurrencia))
+
+        latencias = _Latencias()
+        latencias.envolver(api.obtener_sesion())
+        token = api.obtener_token()
+        sp = spotipy.Spotify(auth=token, requests_timeout=30)
+        sp.prefix = f"{servidor.url_api}/"
+        latencias.envolver(sp._session)
+
+        ids_playlists = [f"pl{indice:05d}" for indice in range(playlists)]
+        ids_artistas = {f"art{indice:06d}": f"Artista {indice}" for indice in range(artistas)}
+        ids_usuarios = [f"usuario{indice:04d}" for indice in range(usuarios)]
+
+        funciones = {
+            "artistas": lambda: api.obtener_artistas(None, ids_playlists),
+            "artistas_concurrente": lambda: api.obtener_artistas_concurrente(None, ids_playlists, concurrencia),
+            "artistas_incremental": lambda: api.obtener_artistas_incremental(None, ids_playlists, concurrencia),
+            "generos": lambda: api.obtener_generos(None, ids_artistas),
+            "playlists": lambda: [api.obtener_playlists(sp, user_id) for user_id in ids_usuarios],
+            "saved_tracks": lambda: _generar_sin_bd("generate_all_saved_tracks", sp),
+            "top_tracks": lambda: _generar_sin_bd("generate_all_top_tracks", sp)
+        }
+
+        resultados = []
+        for escenario in escenarios:
+            resultados.append(medir(escenario, funciones[escenario], servidor, latencias))
+            print(resultados[-1])
+        return pd.DataFrame(resultados)
+    finally:
+        servidor.detener()
+
+def _generar_sin_bd(nombre, sp):
+    # Ejecuta una función `generate_all_*` del onboarding sin escribir en la base de datos
+    import src.soporte_streamlit_usuarios as spot
+    originales = spot.sql.conectar_bd, spot.sql.insertar_muchos_datos
+    spot.sql.conectar_bd = lambda: None
+    spot.sql.insertar_muchos_datos = lambda conexion, query, tupla: None
+    try:
+        getattr(spot, nombre)(sp)
+    finally:
+        spot.sql.conectar_bd, spot.sql.insertar_muchos_datos = originales
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los rastreos de Spotify contra un servidor local.")
+    parser.add_argument("--escenarios", nargs="+", choices=ESCENARIOS, default=ESCENARIOS)
+    parser.add_argument("--playlists", type=int, default=100)
+    parser.add_argument("--artistas", type=int, default=2000)
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--concurrencia", type=int, default=10)
+    parser.add_argument("--latencia", type=float, default=0.02, help="Latencia media por petición (s)")
+    parser.add_argument("--prob-429", type=float, default=0.0, help="Probabilidad de responder 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--duracion-token", type=int, default=3600, help="Validez de los tokens (s); después, 401")
+    parser.add_argument("--fixtures", default=None, help="JSON o cache_spotify.sqlite con respuestas grabadas")
+    parser.add_argument("--tasa", type=float, default=50, help="Peticiones/s permitidas por el limitador")
+    parser.add_argument("--salida", default=None, help="CSV donde guardar los resultados")
+    args = parser.parse_args()
+
+    resultados = ejecutar_benchmark(args.escenarios, args.playlists, args.artistas, args.usuarios, args.concurrencia,
+                                    args.latencia, args.prob_429, args.retry_after, args.duracion_token,
+                                    args.fixtures, args.tasa)
+    print()
+    print(resultados.to_string(index=False))
+    if args.salida:
+        resultados.to_csv(args.salida, index=False)
+
+if __name__ == "__main__":
+    main()
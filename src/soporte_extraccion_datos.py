@@ -9,12 +9,22 @@ from tqdm import tqdm
 #######################################################################################
 # Para manipulación y análisis de datos tabulares (DataFrames)
 import pandas as pd  
+# Para operaciones vectorizadas sobre los pares seguidor-artista
+import numpy as np  
+# Para aplanar los diccionarios de artistas de todos los seguidores en una sola pasada
+from itertools import chain  
 # Para interactuar con el sistema operativo (rutas, variables de entorno, etc.)
 import os  
-# Para convertir cadenas en estructuras de datos Python
-import ast  
 # Para trabajar con datos en formato JSON
 import json  
+# Para extraer el nombre de la marca de la ruta de su CSV de seguidores
+import re  
+# Para procesar varias marcas a la vez
+from concurrent.futures import ThreadPoolExecutor  
+import threading  
+# Para guardar el estado de los resúmenes incrementales (solo se escriben las filas que cambian)
+import sqlite3  
+from collections.abc import MutableMapping  
 
 #######################################################################################
 ##            Modificar el sistema de rutas                                          ##
@@ -28,6 +38,12 @@ sys.path.append("../")
 #######################################################################################
 # Funciones para interactuar con la API de Spotify
 import src.soporte_spotify as api  
+# Lectura y escritura de los archivos intermedios (CSV o Parquet)
+import src.soporte_almacenamiento as alm  
+# Rankings aproximados con memoria acotada (Space-Saving)
+import src.soporte_topk as topk  
+# Diccionario compartido de IDs de Spotify (códigos enteros comunes a todas las marcas)
+import src.soporte_ids as ids_spotify  
 
 #######################################################################################
 ##            Fin de los Imports                                                     ##
@@ -50,9 +66,13 @@ def str_a_diccionario(brand_df, columna):
     -------
     pandas.Series
         Serie con los valores de la columna convertidos en diccionarios.
+
+    Notas:
+    ------
+    - Los valores que ya son diccionarios (por ejemplo, leídos de Parquet con `alm.cargar_datos`) se dejan tal cual.
     """
 
-    return brand_df[str(columna)].apply(ast.literal_eval)
+    return brand_df[str(columna)].apply(alm.a_estructura)
 
 def str_a_lista(brand_df, columna):
     """
@@ -71,11 +91,102 @@ def str_a_lista(brand_df, columna):
     pandas.Series
         Serie con los valores de la columna convertidos en listas. 
         Si el valor es NaN, se devuelve una lista vacía.
+        Los valores que ya son listas (por ejemplo, leídos de Parquet con `alm.cargar_datos`) se dejan tal cual.
+    """
+
+    return brand_df[str(columna)].apply(lambda x: alm.a_estructura(x, []))
+
+class DiarioCheckpoint:
     """
+    Diario de progreso de solo escritura al final (JSON Lines): una línea por seguidor procesado.
+
+    Sustituye a reescribir el CSV completo después de cada seguidor: cada entrada se añade al final del archivo
+    y el coste total de guardar el progreso pasa a ser proporcional al número de seguidores, no a su cuadrado.
+
+    Parámetros:
+    -----------
+    ruta : str
+        Archivo `.jsonl` del diario.
+
+    lote_fsync : int, opcional (por defecto 50)
+        Número de entradas entre cada `fsync`. Si el proceso se interrumpe, como mucho se pierden las
+        últimas `lote_fsync` entradas (se volverán a pedir al reanudar).
 
-    return brand_df[str(columna)].apply(lambda x: ast.literal_eval(x) if pd.notna(x) else [])
+    Notas:
+    ------
+    - Una última línea incompleta (corte a mitad de escritura) se ignora al leer.
+    - Cada entrada guarda el `user_id` del seguidor, de modo que no se aplica a otra fila si cambia el archivo de entrada.
 
-def obtener_id_artistas(brand_df,output_file = "../datos/01 Spotify/00_GuardadoTemporal.csv"):
+    Ejemplo de uso:
+    ---------------
+    ```python
+    with DiarioCheckpoint("../datos/01 Spotify/00 TempSaves/00_tempsave_zara.jsonl") as diario:
+        hechos = diario.leer()
+        diario.registrar(0, "user_id_1", {"artist_id": "Artist"})
+    """
+
+    def __init__(self, ruta, lote_fsync=50):
+        self.ruta = ruta
+        self.lote_fsync = lote_fsync
+        self._archivo = None
+        self._pendientes = 0
+
+    def leer(self):
+        """
+        Devuelve un diccionario `{idx: (user_id, artistas)}` con las entradas ya guardadas.
+        """
+        entradas = {}
+        if not os.path.exists(self.ruta):
+            return entradas
+        with open(self.ruta, "r", encoding="utf-8") as archivo:
+            for linea in archivo:
+                try:
+                    entrada = json.loads(linea)
+                except ValueError:
+                    continue  # Línea cortada por una interrupción
+                entradas[entrada["idx"]] = (entrada.get("user_id"), entrada["artistas"])
+        return entradas
+
+    def registrar(self, idx, user_id, artistas):
+        """
+        Añade la entrada de un seguidor al final del diario.
+        """
+        if self._archivo is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+            self._archivo = open(self.ruta, "a", encoding="utf-8")
+            # Si la última línea quedó cortada, empezar en una línea nueva para no corromper la siguiente entrada
+            if self._archivo.tell() > 0:
+                with open(self.ruta, "rb") as lectura:
+                    lectura.seek(-1, os.SEEK_END)
+                    if lectura.read(1) != b"\n":
+                        self._archivo.write("\n")
+        self._archivo.write(json.dumps({"idx": idx, "user_id": user_id, "artistas": artistas}) + "\n")
+        self._pendientes += 1
+        if self._pendientes >= self.lote_fsync:
+            self.sincronizar()
+
+    def sincronizar(self):
+        """
+        Fuerza la escritura en disco de las entradas pendientes.
+        """
+        if self._archivo is not None and self._pendientes:
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            self._pendientes = 0
+
+    def cerrar(self):
+        self.sincronizar()
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+def obtener_id_artistas(brand_df,output_file = "../datos/01 Spotify/00_GuardadoTemporal.csv", lote_fsync=50, desc="Obteniendo artistas", posicion=None, bloque=200):
     """
     Extrae los identificadores de artistas desde las playlists de los usuarios en un DataFrame.
 
@@ -85,7 +196,20 @@ def obtener_id_artistas(brand_df,output_file = "../datos/01 Spotify/00_GuardadoT
         DataFrame que contiene la información de las playlists de los seguidores de una marca.
     
     output_file : str, opcional (por defecto "../datos/01 Spotify/00_GuardadoTemporal.csv")
-        Ruta donde se guarda temporalmente el progreso en un archivo CSV.
+        Ruta donde se guarda el resultado, en CSV o en Parquet si la extensión es `.parquet` (ver `alm.guardar_datos`).
+        El progreso se guarda mientras tanto en un diario junto a él (misma ruta con extensión `.jsonl`).
+
+    lote_fsync : int, opcional (por defecto 50)
+        Número de seguidores entre cada escritura forzada a disco del diario (ver `DiarioCheckpoint`).
+
+    desc : str, opcional (por defecto "Obteniendo artistas")
+        Texto de la barra de progreso.
+
+    posicion : int, opcional
+        Línea de la barra de progreso (para mostrar varias marcas a la vez, ver `procesar_marcas`).
+
+    bloque : int, opcional (por defecto 200)
+        Número de seguidores cuyas playlists se piden a la vez. Al final de cada bloque se guarda el progreso de sus seguidores.
 
     Retorna:
     -------
@@ -96,9 +220,20 @@ def obtener_id_artistas(brand_df,output_file = "../datos/01 Spotify/00_GuardadoT
     -----------
     - Convierte la columna 'playlists' de string a diccionario.
     - Extrae los identificadores de playlists y los limita a un máximo de 10 por usuario.
-    - Carga el progreso si existe un archivo previo, evitando procesar datos ya obtenidos.
-    - Obtiene los artistas de cada playlist usando la API de Spotify.
-    - Guarda el progreso en el archivo CSV después de cada iteración.
+    - Carga el progreso si existe un CSV previo y aplica encima las entradas del diario, evitando procesar datos ya obtenidos.
+    - Reúne las playlists distintas de cada bloque de seguidores y pide cada una una sola vez
+      (`api.obtener_artistas_por_playlist`), guardándolas en un memo para toda la ejecución: las playlists que comparten
+      muchos seguidores (por ejemplo, las editoriales) no se vuelven a paginar para cada uno.
+      Solo se descargan de nuevo las playlists cuyo `snapshot_id` ha cambiado desde el último rastreo.
+    - Construye el diccionario de artistas de cada seguidor a partir del memo (`api.combinar_artistas`).
+    - Añade una línea al diario por cada seguidor procesado (con `fsync` cada `lote_fsync` seguidores).
+    - Al terminar, escribe el CSV completo una sola vez y elimina el diario.
+
+    Notas:
+    ------
+    - Para refrescar una marca ya procesada basta con borrar (o cambiar) `output_file` y volver a ejecutar:
+      el coste es proporcional a las playlists que han cambiado, no al total.
+    - Si el proceso se interrumpe, al volver a ejecutar con el mismo `output_file` se reanuda desde el diario.
     """
 
     # Convertir a Diccionario
@@ -114,38 +249,142 @@ def obtener_id_artistas(brand_df,output_file = "../datos/01 Spotify/00_GuardadoT
     # Sacamos una lista de máximo 10 playlists por usuario
     brand_df["playlist_ids_limited"] = brand_df["playlist_ids"].apply(lambda x: x[:10] if isinstance(x,list) else x)
 
-    # Ahora obtenemos los artistas
-    lista_artistas = []
-    
     # Ruta donde guardamos de forma temporal el progreso outputfile
     # Cargar progreso si existe un archivo previo en la ruta proporcionada
     if os.path.exists(output_file):
-        brand_df = pd.read_csv(output_file)
+        brand_df = alm.cargar_datos(output_file)
         brand_df["playlist_ids_limited"] = str_a_lista(brand_df,"playlist_ids_limited")
-        lista_artistas = brand_df["artistas"].tolist()
     else:
         brand_df["artistas"] = None
 
-    # Procesar playlists limitadas
-    for idx, id_playlist in enumerate(tqdm(brand_df["playlist_ids_limited"], desc="Obteniendo artistas")):
-        # Primero realizamos la comprobación de si ya se obtuvieron, de ser así, saltamos al siguiente
-        if pd.notna(brand_df.loc[idx, "artistas"]):
-            continue
-        id_playlist = list(id_playlist)
-
-        # Solicitar token y obtener artistas
-        token = api.request_token(silent=True)
-        artistas = api.obtener_artistas(token, id_playlist)
-        lista_artistas.append(artistas)
-        
-        # Guardar los artistas como JSON
-        brand_df.loc[idx, "artistas"] = json.dumps(artistas)
-
-        # Guardar el progreso después de cada iteración
-        brand_df.to_csv(output_file, index=False)
+    # Aplicar las entradas del diario de una ejecución anterior interrumpida
+    ruta_diario = os.path.splitext(output_file)[0] + ".jsonl"
+    with DiarioCheckpoint(ruta_diario, lote_fsync) as diario:
+        for idx, (user_id, artistas) in diario.leer().items():
+            if idx < len(brand_df) and (user_id is None or str(brand_df.loc[idx, "user_id"]) == user_id):
+                brand_df.loc[idx, "artistas"] = json.dumps(artistas)
+
+        # Seguidores pendientes (los ya obtenidos se saltan)
+        pendientes = [idx for idx in range(len(brand_df)) if not pd.notna(brand_df.loc[idx, "artistas"])]
+        # Memo de la ejecución: cada playlist distinta se pide una sola vez aunque la tengan muchos seguidores
+        memo_playlists = {}
+
+        barra = tqdm(total=len(brand_df), initial=len(brand_df) - len(pendientes), desc=desc, position=posicion)
+        for inicio in range(0, len(pendientes), bloque):
+            bloque_idx = pendientes[inicio:inicio + bloque]
+
+            # Pedir las playlists del bloque que no estén ya en el memo;
+            # las playlists cuyo snapshot_id no ha cambiado se sirven desde el almacén de metadatos
+            nuevas = [playlist_id for idx in bloque_idx for playlist_id in brand_df.loc[idx, "playlist_ids_limited"]
+                      if playlist_id not in memo_playlists]
+            if nuevas:
+                token = api.obtener_token()
+                memo_playlists.update(api.obtener_artistas_por_playlist(token, nuevas))
+
+            for idx in bloque_idx:
+                # Artistas del seguidor a partir del memo, en el orden de sus playlists
+                artistas = api.combinar_artistas(memo_playlists, list(brand_df.loc[idx, "playlist_ids_limited"]))
+
+                # Guardar los artistas como JSON
+                brand_df.loc[idx, "artistas"] = json.dumps(artistas)
+
+                # Guardar el progreso: una línea por seguidor en el diario
+                diario.registrar(idx, str(brand_df.loc[idx, "user_id"]) if "user_id" in brand_df.columns else None, artistas)
+                barra.update(1)
+        barra.close()
+
+    # Guardar el resultado completo una sola vez y descartar el diario
+    alm.guardar_datos(brand_df, output_file)
+    if os.path.exists(ruta_diario):
+        os.remove(ruta_diario)
     
     return brand_df
 
+def explotar_artistas(brand_df, diccionario=None):
+    """
+    Convierte la columna 'artistas' (un diccionario por seguidor) en una tabla de pares seguidor-artista.
+
+    Parámetros:
+    ----------
+    brand_df : pandas.DataFrame
+        DataFrame con una columna 'artistas' (diccionarios `{artist_id: artist_name}` o su texto).
+
+    diccionario : soporte_ids.DiccionarioIds, opcional
+        Si se indica, se añade la columna 'artist_key' con el código entero de cada artista en ese diccionario
+        (el mismo en todas las marcas), para cruzar o agrupar por enteros fuera de esta tabla.
+
+    Retorna:
+    -------
+    pandas.DataFrame
+        Una fila por par con las columnas:
+        - 'follower': posición del seguidor en `brand_df` (entero).
+        - 'artist_id': ID del artista (categórica).
+        - 'artist_name': nombre del artista (categórica; nulo si no tiene nombre).
+
+    Notas:
+    ------
+    - Las columnas categóricas guardan cada ID y cada nombre una sola vez y trabajan con códigos enteros:
+      en marcas con millones de pares ocupan una fracción de la memoria de las cadenas repetidas.
+    - Las categorías están en orden de primera aparición, de modo que los empates y los artistas únicos
+      conservan el mismo orden que el recorrido fila a fila.
+    """
+    artistas = [alm.a_estructura(dictio, {}) for dictio in brand_df["artistas"]]
+    longitudes = np.fromiter((len(dictio) for dictio in artistas), dtype=np.int64, count=len(artistas))
+    ids = list(chain.from_iterable(dictio.keys() for dictio in artistas))
+    nombres = list(chain.from_iterable(dictio.values() for dictio in artistas))
+
+    codigos_id, categorias_id = pd.factorize(pd.Series(ids, dtype=object))
+    codigos_nombre, categorias_nombre = pd.factorize(pd.Series(nombres, dtype=object))
+    pares = pd.DataFrame({
+        "follower": np.repeat(np.arange(len(artistas)), longitudes),
+        "artist_id": pd.Categorical.from_codes(codigos_id, categorias_id),
+        "artist_name": pd.Categorical.from_codes(codigos_nombre, categorias_nombre)
+    })
+    if diccionario is not None:
+        # Solo se codifica cada artista distinto una vez y se reparte con los códigos categóricos
+        claves = diccionario.codificar(categorias_id.astype(str))
+        # (los IDs nulos tienen el código categórico -1 y se quedan con la clave -1)
+        if len(claves):
+            pares["artist_key"] = np.where(codigos_id >= 0, claves[np.maximum(codigos_id, 0)], -1).astype(claves.dtype)
+        else:
+            pares["artist_key"] = np.full(len(codigos_id), -1, dtype=claves.dtype)
+    return pares
+
+def agregar_artistas(pares, top_k=None):
+    """
+    Calcula los artistas únicos y el ranking de artistas a partir de la tabla de `explotar_artistas`.
+
+    Parámetros:
+    ----------
+    pares : pandas.DataFrame
+        Tabla de pares seguidor-artista (ver `explotar_artistas`).
+
+    top_k : int, opcional
+        Si se indica, el ranking se limita a los `top_k` artistas más repetidos.
+
+    Retorna:
+    -------
+    tuple[dict, list[tuple]]
+        - Artistas únicos `{artist_id: artist_name}` en orden de primera aparición, sin la clave 'None'.
+        - Ranking `[(artist_name, apariciones), ...]` de mayor a menor (los empates, en orden de primera aparición).
+
+    Descripción:
+    -----------
+    - Artistas únicos: `drop_duplicates` sobre la columna de IDs (se queda con la primera aparición).
+    - Ranking: `groupby` por nombre sobre los códigos categóricos, sin contar los nombres nulos,
+      y ordenación estable por número de apariciones.
+    """
+    unicos = pares.drop_duplicates("artist_id")
+    unicos = unicos.loc[unicos["artist_id"].notna() & ~unicos["artist_id"].isin(["None", "null"])]
+    artistas_unicos = dict(zip(unicos["artist_id"].astype(object), unicos["artist_name"].astype(object).where(unicos["artist_name"].notna(), None)))
+
+    conteo = pares.groupby("artist_name", observed=True, sort=False).size()
+    conteo = conteo.sort_values(ascending=False, kind="stable")
+    if top_k is not None:
+        conteo = conteo.head(top_k)
+    ranking = list(zip(conteo.index.astype(object), conteo.astype(int).tolist()))
+    return artistas_unicos, ranking
+
 def obtener_artistas_unicos(brand_df):
     """
     Obtiene un diccionario de artistas únicos a partir de la columna 'artistas' de un DataFrame.
@@ -162,18 +401,11 @@ def obtener_artistas_unicos(brand_df):
 
     Descripción:
     -----------
-    - Itera sobre la columna 'artistas' del DataFrame.
-    - Extrae los identificadores y nombres de los artistas, asegurando que no haya duplicados.
+    - Explota la columna 'artistas' en pares seguidor-artista (`explotar_artistas`).
+    - Se queda con la primera aparición de cada identificador (`agregar_artistas`).
     - Elimina la clave 'None' si está presente en el diccionario resultante.
     """
-    artistas_unicos = {}
-    for dictio in brand_df["artistas"]:
-        for id_artista, artista in dictio.items():
-            if id_artista not in artistas_unicos:
-                artistas_unicos[id_artista] = artista
-    # Eliminar la Key "None"
-    del artistas_unicos["None"]
-    
+    artistas_unicos, _ = agregar_artistas(explotar_artistas(brand_df))
     return artistas_unicos
 
 def obtener_ranking_artistas(brand_df):
@@ -192,20 +424,15 @@ def obtener_ranking_artistas(brand_df):
 
     Descripción:
     -----------
-    - Itera sobre la columna 'artistas' del DataFrame.
-    - Cuenta cuántas veces aparece cada artista en todas las playlists de los seguidores de la marca.
+    - Explota la columna 'artistas' en pares seguidor-artista (`explotar_artistas`).
+    - Cuenta cuántas veces aparece cada artista en todas las playlists de los seguidores de la marca con un `groupby` vectorizado.
     - Omite valores nulos (None) para evitar errores en el conteo.
     """
+    pares = explotar_artistas(brand_df)
+    conteo = pares.groupby("artist_name", observed=True, sort=False).size()
+    return dict(zip(conteo.index.astype(object), conteo.astype(int).tolist()))
 
-    conteo_artistas = {}
-    for dictio in brand_df["artistas"]:
-        for artista in dictio.values():
-            if artista != None:
-                conteo_artistas[artista] = conteo_artistas.get(artista,0) + 1
-    
-    return conteo_artistas
-
-def tabla_resumen(brand_df, followers_path, resumen_path):
+def tabla_resumen(brand_df, followers_path, resumen_path, top_k=None):
     """
     Genera un resumen de datos sobre los seguidores de una marca, incluyendo el número de seguidores,
     los artistas únicos y un ranking de los más escuchados.
@@ -221,6 +448,11 @@ def tabla_resumen(brand_df, followers_path, resumen_path):
     resumen_path : str
         Ruta donde se guardará el DataFrame resumen con los artistas únicos y el ranking de artistas.
 
+    top_k : int, opcional
+        Si se indica, el ranking solo incluye los `top_k` artistas más repetidos (por defecto, todos).
+        El ranking es siempre exacto: con la marca entera en memoria, contar todos los pares cuesta lo mismo que aproximarlo.
+        Para marcas que no caben en memoria, `tabla_resumen_por_bloques` admite un ranking aproximado (`capacidad_sketch`).
+
     Retorna:
     -------
     pandas.DataFrame
@@ -231,59 +463,158 @@ def tabla_resumen(brand_df, followers_path, resumen_path):
     - Filtra usuarios cuyas playlists no contienen artistas.
     - Convierte columnas de tipo string a listas o diccionarios según corresponda.
     - Guarda el DataFrame actualizado con los seguidores en un CSV.
-    - Obtiene los artistas únicos y el ranking de artistas más escuchados.
-    - Crea un DataFrame resumen con la información relevante.
-    - Convierte las columnas del resumen a listas/diccionarios nuevamente para su correcta interpretación.
+    - Explota los artistas en una tabla de pares seguidor-artista con columnas categóricas (`explotar_artistas`)
+      y obtiene los artistas únicos y el ranking de artistas más escuchados con agregaciones vectorizadas (`agregar_artistas`).
+    - Registra los IDs de los artistas en el diccionario compartido (`ids_spotify.diccionario_compartido()`) y lo guarda,
+      para que `subir_ids_spotify` suba los mismos códigos enteros.
+    - Crea un DataFrame resumen con la información relevante (diccionario y lista de tuplas, sin pasar por texto).
     - Guarda el DataFrame resumen en un archivo CSV.
     """
 
-    # Eliminar aquellos users cuyas playlists no tenían artistas (no había canciones)
-    brand_df = brand_df.loc[brand_df["artistas"] != "{}"]
-    # Reemplazar los null por None para poder convertirlo a diccionarios
-    brand_df.loc[:, "artistas"] = brand_df["artistas"].str.replace("null", "None")
-    
-    # Convertir:
+    # Convertir (solo los valores que sigan en texto; los leídos de Parquet ya son estructuras):
         # playlists: de STR a dict
         # playlist_ids: de STR a list
         # playlist_ids_limited: de STR a list
-        # artistas: de STR a dict
-    if type(brand_df["playlists"][0]) == str:
-        brand_df.loc[:,"playlists"] = str_a_diccionario(brand_df,"playlists")
-    if type(brand_df["playlist_ids"][0]) == str:
-        brand_df.loc[:,"playlist_ids"] = str_a_lista(brand_df,"playlist_ids")
-    if type(brand_df["playlist_ids_limited"][0]) == str:
-        brand_df.loc[:,"playlist_ids_limited"] = str_a_lista(brand_df,"playlist_ids_limited")
-    if type(brand_df["artistas"][0]) == str:
-        brand_df.loc[:, "artistas"] = str_a_diccionario(brand_df, "artistas")
-
-    # Actualizar el CSV
-    brand_df.to_csv(followers_path,index=False)
-    
-    # Obtener los artistas únicos
-    artistas_unicos = obtener_artistas_unicos(brand_df)
+        # artistas: de STR (JSON) a dict
+    brand_df = brand_df.copy()
+    brand_df["playlists"] = str_a_diccionario(brand_df,"playlists")
+    brand_df["playlist_ids"] = str_a_lista(brand_df,"playlist_ids")
+    brand_df["playlist_ids_limited"] = str_a_lista(brand_df,"playlist_ids_limited")
+    brand_df["artistas"] = str_a_diccionario(brand_df, "artistas")
+    # Eliminar aquellos users cuyas playlists no tenían artistas (no había canciones)
+    brand_df = brand_df.loc[brand_df["artistas"].apply(lambda x: bool(x))].reset_index(drop=True)
+
+    # Actualizar el archivo de seguidores (CSV o Parquet según la extensión)
+    alm.guardar_datos(brand_df, followers_path)
     
-    # Obtener el ranking de los artistas
-    conteo_artistas = obtener_ranking_artistas(brand_df)
-    # Ordenar los artistas de mayor a menor repetición
-    conteo_artistas = sorted(conteo_artistas.items(), key=lambda x: x[1], reverse=True)
+    # Obtener los artistas únicos y el ranking de los artistas (de mayor a menor repetición)
+    # con una única tabla de pares seguidor-artista y agregaciones vectorizadas
+    # Los IDs de los artistas se registran en el diccionario compartido (y se guarda con los nuevos)
+    diccionario = ids_spotify.diccionario_compartido()
+    pares = explotar_artistas(brand_df, diccionario=diccionario)
+    ids_spotify.guardar_diccionario_compartido()
+    artistas_unicos, conteo_artistas = agregar_artistas(pares, top_k=top_k)
 
-    # Generar df resumen
+    # Generar df resumen (las columnas anidadas se guardan directamente como objetos, sin pasar por texto)
     resumen_df = pd.DataFrame({
     "brand" : [brand_df["brand"].unique()[0]] ,
     "followers" : brand_df.shape[0],
-    "unique_artists": str(artistas_unicos), # Str para poder realizar el dataframe
-    "artist_ranking" : str(conteo_artistas) # Str para poder realizar el dataframe
+    "unique_artists": pd.Series([artistas_unicos], dtype=object),
+    "artist_ranking" : pd.Series([conteo_artistas], dtype=object)
     })
-    # Lo volvemos a convertir a diccionario
-    resumen_df.loc[:,"unique_artists"] = str_a_diccionario(resumen_df,"unique_artists")
-    # Lo volvemos a convertir en lista
-    resumen_df.loc[:,"artist_ranking"] = str_a_lista(resumen_df,"artist_ranking")
+    resumen_df.attrs["error_artist_ranking"] = 0
     # Guardar esta otra tabla
-    resumen_df.to_csv(resumen_path,index=False)
+    alm.guardar_datos(resumen_df, resumen_path)
+
+    return resumen_df
+
+def tabla_resumen_por_bloques(brand_path, followers_path, resumen_path, tamano_bloque=10000, top_k=None, capacidad_sketch=None, **kwargs):
+    """
+    Versión por bloques de `tabla_resumen` para marcas muy grandes: la memoria no depende del número de seguidores.
+
+    Parámetros:
+    ----------
+    brand_path : str
+        Archivo (CSV o Parquet) con los seguidores de la marca y su columna 'artistas' (por ejemplo, el guardado de `obtener_id_artistas`).
+
+    followers_path : str
+        Ruta donde se guardan los seguidores procesados (puede ser el mismo archivo que `brand_path`).
+
+    resumen_path : str
+        Ruta donde se guarda el DataFrame resumen.
+
+    tamano_bloque : int, opcional (por defecto 10000)
+        Número de seguidores que se leen, convierten y escriben a la vez.
+
+    top_k : int, opcional
+        Si se indica, el ranking solo incluye los `top_k` artistas más repetidos.
+
+    capacidad_sketch : int, opcional
+        Si se indica, las apariciones por nombre se acumulan en un `topk.EspacioAhorro` de esa capacidad en lugar de en un
+        contador exacto: la memoria del ranking tampoco depende del número de artistas distintos.
+        La cota del error queda en `resumen_df.attrs["error_artist_ranking"]`.
+
+    **kwargs :
+        Argumentos adicionales para `pandas.read_csv` (por ejemplo `index_col=0`).
+
+    Retorna:
+    -------
+    pandas.DataFrame
+        El mismo DataFrame resumen que `tabla_resumen`.
+
+    Descripción:
+    -----------
+    - Lee los seguidores por bloques (`alm.cargar_por_bloques`) y, en cada bloque, convierte las columnas, descarta los seguidores
+      sin artistas y escribe el bloque en el archivo de seguidores (`alm.EscritorBloques`).
+    - Con los pares seguidor-artista del bloque (`explotar_artistas`) actualiza los contadores acumulados: artistas únicos
+      y apariciones por nombre. Solo se guarda un bloque y los contadores (proporcionales al número de artistas distintos) en memoria.
+    - El resultado es igual al de `tabla_resumen`: los artistas únicos y los empates del ranking conservan el orden de primera aparición.
+
+    Ejemplo de uso:
+    --------------
+    ```python
+    resumen = tabla_resumen_por_bloques("../datos/01 Spotify/00 TempSaves/00_tempsave_zara.csv",
+                                        followers_path="../datos/01 Spotify/02_followers_zara.csv",
+                                        resumen_path="../datos/01 Spotify/01 Resumen Marcas/resumen_zara.csv")
+    """
+    marca = None
+    seguidores = 0
+    artistas_unicos = {}
+    conteo_artistas = {}
+    esquema = topk.EspacioAhorro(capacidad_sketch) if capacidad_sketch else None
+    diccionario = ids_spotify.diccionario_compartido()
+
+    with alm.EscritorBloques(followers_path) as escritor:
+        for bloque in alm.cargar_por_bloques(brand_path, tamano_bloque, **kwargs):
+            # Convertir las columnas del bloque y eliminar los seguidores sin artistas
+            for columna in ("playlists", "artistas"):
+                bloque[columna] = str_a_diccionario(bloque, columna)
+            for columna in ("playlist_ids", "playlist_ids_limited"):
+                bloque[columna] = str_a_lista(bloque, columna)
+            bloque = bloque.loc[bloque["artistas"].apply(bool)].reset_index(drop=True)
+            if bloque.empty:
+                continue
+            escritor.escribir(bloque)
+
+            if marca is None:
+                marca = bloque["brand"].iloc[0]
+            seguidores += len(bloque)
+
+            # Sumar los artistas del bloque a los contadores acumulados
+            # (el conteo del bloque se recorre en orden de primera aparición, no ordenado, para conservar el orden de los empates)
+            pares = explotar_artistas(bloque, diccionario=diccionario)
+            unicos_bloque, _ = agregar_artistas(pares.drop_duplicates("artist_id"))
+            for artist_id, nombre in unicos_bloque.items():
+                artistas_unicos.setdefault(artist_id, nombre)
+            conteo_bloque = pares.groupby("artist_name", observed=True, sort=False).size()
+            for nombre, apariciones in zip(conteo_bloque.index.astype(object), conteo_bloque.astype(int).tolist()):
+                if esquema is not None:
+                    esquema.añadir(nombre, apariciones)
+                else:
+                    conteo_artistas[nombre] = conteo_artistas.get(nombre, 0) + apariciones
+
+    # Guardar el diccionario compartido con los IDs de artistas nuevos de la marca
+    ids_spotify.guardar_diccionario_compartido()
+
+    if esquema is not None:
+        ranking, error = esquema.ranking(top_k), esquema.error_maximo
+    else:
+        ranking, error = sorted(conteo_artistas.items(), key=lambda x: x[1], reverse=True), 0
+        if top_k is not None:
+            ranking = ranking[:top_k]
+
+    resumen_df = pd.DataFrame({
+    "brand" : [marca],
+    "followers" : seguidores,
+    "unique_artists": pd.Series([artistas_unicos], dtype=object),
+    "artist_ranking" : pd.Series([ranking], dtype=object)
+    })
+    resumen_df.attrs["error_artist_ranking"] = error
+    alm.guardar_datos(resumen_df, resumen_path)
 
     return resumen_df
 
-def obtener_generos_artistas(brand_df, resumen_path):
+def obtener_generos_artistas(brand_df, resumen_path, top_k=None, capacidad_sketch=None):
     """
     Obtiene y almacena los géneros musicales de los artistas únicos asociados a una marca.
 
@@ -295,6 +626,14 @@ def obtener_generos_artistas(brand_df, resumen_path):
     resumen_path : str
         Ruta del archivo CSV donde se encuentra y se actualizará el resumen de la marca.
 
+    top_k : int, opcional
+        Si se indica, el ranking de géneros solo incluye los `top_k` géneros más repetidos.
+
+    capacidad_sketch : int, opcional
+        Si se indica, el ranking de géneros se calcula de forma aproximada con `topk.EspacioAhorro` de esa capacidad,
+        leyendo los géneros de los artistas por bloques (`api.iterar_generos_por_artista`). La columna `genres` sigue teniendo
+        todos los géneros distintos de la marca. La cota del error queda en `brand_df.attrs["error_genres_ranking"]`.
+
     Retorna:
     -------
     pandas.DataFrame
@@ -302,16 +641,19 @@ def obtener_generos_artistas(brand_df, resumen_path):
 
     Descripción:
     -----------
-    - Carga el DataFrame desde el archivo CSV de resumen.
+    - Usa el DataFrame resumen recibido; si es `None`, lo carga desde el archivo de resumen.
     - Convierte las columnas `unique_artists` y `artist_ranking` de string a diccionario y lista respectivamente.
-    - Solicita un token de autenticación para la API de Spotify.
+    - Obtiene el token compartido de la API de Spotify (`api.obtener_token()`).
     - Obtiene los géneros musicales de los artistas únicos.
     - Añade la lista de géneros y su ranking basado en frecuencia al DataFrame.
     - Guarda el DataFrame actualizado en el archivo CSV de resumen.
     """
 
-    # Cargar Dataframe
-    brand_df = pd.read_csv(resumen_path)
+    # Usar el resumen recibido (el que devuelve `tabla_resumen`); solo se lee del disco si no se pasa
+    if brand_df is None or "unique_artists" not in brand_df.columns:
+        brand_df = alm.cargar_datos(resumen_path)
+    else:
+        brand_df = brand_df.copy()
     # Convertir a diccionario
     if type(brand_df["unique_artists"][0]) == str:
         brand_df.loc[:,"unique_artists"] = str_a_diccionario(brand_df,"unique_artists")
@@ -319,13 +661,526 @@ def obtener_generos_artistas(brand_df, resumen_path):
     if type(brand_df["artist_ranking"][0]) == str:
         brand_df.loc[:,"artist_ranking"] = str_a_lista(brand_df,"artist_ranking")
 
-    # Solicitar token y obtener artistas
-    token = api.request_token(silent=True)
-    generos = api.obtener_generos(token,brand_df["unique_artists"])
-    # Añadir tabla genres al dataframe
+    # Obtener el token compartido y los géneros
+    token = api.obtener_token()
+    if capacidad_sketch:
+        # Ranking aproximado: solo se guardan `capacidad_sketch` contadores de géneros, y los géneros de los artistas
+        # se leen por bloques sin guardar el mapa de todos los artistas. `genres` sigue siendo la lista completa de géneros.
+        esquema = topk.EspacioAhorro(capacidad_sketch)
+        generos = {}
+        for lote in api.iterar_generos_por_artista(token, brand_df["unique_artists"]):
+            for generos_artista in lote.values():
+                esquema.añadir_muchos(generos_artista)
+                generos.update(dict.fromkeys(generos_artista))
+        ranking_generos, error = esquema.ranking(top_k), esquema.error_maximo
+    else:
+        generos = api.obtener_generos(token,brand_df["unique_artists"])
+        ranking_generos, error = sorted(generos.items(), key=lambda x: x[1], reverse=True), 0
+        if top_k is not None:
+            ranking_generos = ranking_generos[:top_k]
+    # Añadir tabla genres al dataframe (todos los géneros distintos de la marca)
     brand_df["genres"] = str(list(generos.keys()))
     # Añadir el ranking de géneros
-    brand_df["genres_ranking"] = str(sorted(generos.items(), key=lambda x: x[1], reverse=True))
-    brand_df.to_csv(resumen_path,index=False)
+    brand_df["genres_ranking"] = str(ranking_generos)
+    brand_df.attrs["error_genres_ranking"] = error
+    alm.guardar_datos(brand_df, resumen_path)
     
-    return brand_df
\ No newline at end of file
+    return brand_df
+
+class EstadoResumenMarca:
+    """
+    Estado acumulado del resumen de una marca, que se puede actualizar seguidor a seguidor sin recalcular toda la marca.
+
+    Guarda, además de lo que muestra el resumen, lo necesario para añadir y quitar seguidores:
+    - `seguidores`: `{user_id: [artist_id, ...]}` de cada seguidor incluido.
+    - `apariciones`: número de seguidores en los que aparece cada artista (`{artist_id: n}`, en orden de primera aparición).
+      Los artistas únicos son los que tienen al menos una aparición.
+    - `nombres`: nombre de cada artista (`{artist_id: artist_name}`).
+    - `conteo_artistas`: apariciones por nombre de artista (el `artist_ranking` de `tabla_resumen`).
+    - `generos_artista` y `conteo_generos`: géneros de cada artista único y número de artistas únicos de cada género
+      (el `genres_ranking` de `obtener_generos_artistas`).
+
+    Parámetros:
+    -----------
+    marca : str
+        Nombre de la marca (columna 'brand').
+
+    Notas:
+    ------
+    - Añadir 500 seguidores a una marca de 30.000 solo recorre esos 500: los contadores se actualizan con sus pares seguidor-artista
+      y solo se piden los géneros de los artistas que aparecen por primera vez (que además suelen estar ya en el almacén de metadatos).
+    - Dos estados de la misma marca con seguidores distintos se pueden fusionar con `fusionar()`
+      (por ejemplo, si se han procesado dos tandas de seguidores por separado).
+    - Se guarda en SQLite con `guardar()` y se recupera con `EstadoResumenMarca.cargar()`. Los seguidores se quedan en el archivo
+      (no se cargan en memoria: se consulta cada `user_id` que se añade o se quita) y, al volver a guardar, solo se escriben
+      los seguidores y las claves de los contadores que han cambiado. Así, el coste de añadir 500 seguidores no depende de los 30.000 anteriores.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    estado = EstadoResumenMarca.cargar("../datos/01 Spotify/01 Resumen Marcas/estado_zara.sqlite")
+    estado.agregar_seguidores(nuevos_df)
+    estado.actualizar_generos()
+    estado.guardar("../datos/01 Spotify/01 Resumen Marcas/estado_zara.sqlite")
+    resumen_df = estado.resumen()
+    """
+
+    CONTADORES = ("apariciones", "nombres", "conteo_artistas", "generos_artista", "conteo_generos")
+
+    def __init__(self, marca=None):
+        self.marca = marca
+        self.seguidores = _Contador()
+        self.apariciones = _Contador()
+        self.nombres = _Contador()
+        self.conteo_artistas = _Contador()
+        self.generos_artista = _Contador()
+        self.conteo_generos = _Contador()
+        # Archivo SQLite del que se ha cargado el estado (y conexión abierta con él)
+        self._ruta = None
+        self._conexion = None
+
+    def agregar_seguidores(self, brand_df):
+        """
+        Incorpora al estado los seguidores de `brand_df` (columnas 'user_id' y 'artistas') que no estén ya incluidos.
+
+        Los seguidores sin artistas se omiten, igual que en `tabla_resumen`. Devuelve el número de seguidores añadidos.
+        """
+        if self.marca is None and "brand" in brand_df.columns and len(brand_df):
+            self.marca = brand_df["brand"].iloc[0]
+        añadidos = 0
+        for user_id, artistas in zip(brand_df["user_id"].astype(str), brand_df["artistas"]):
+            artistas = alm.a_estructura(artistas, {})
+            if not artistas or user_id in self.seguidores:
+                continue
+            self.seguidores[user_id] = list(artistas.keys())
+            for artist_id, nombre in artistas.items():
+                if artist_id not in self.nombres:
+                    self.nombres[artist_id] = nombre
+                self.apariciones[artist_id] = self.apariciones.get(artist_id, 0) + 1
+                if self.apariciones[artist_id] == 1:
+                    self._sumar_generos(self.generos_artista.get(artist_id, []), 1)
+                nombre = self.nombres[artist_id]
+                if nombre is not None:
+                    self.conteo_artistas[nombre] = self.conteo_artistas.get(nombre, 0) + 1
+            añadidos += 1
+        return añadidos
+
+    def quitar_seguidores(self, user_ids):
+        """
+        Elimina del estado los seguidores indicados y descuenta sus artistas. Devuelve el número de seguidores quitados.
+        """
+        quitados = 0
+        for user_id in map(str, user_ids):
+            ids_artistas = self.seguidores.pop(user_id, None)
+            if ids_artistas is None:
+                continue
+            for artist_id in ids_artistas:
+                nombre = self.nombres.get(artist_id)
+                if nombre is not None:
+                    self._restar(self.conteo_artistas, nombre, 1)
+                self._restar(self.apariciones, artist_id, 1)
+                if artist_id not in self.apariciones:
+                    # El artista ya no está en ningún seguidor: deja de ser único y sus géneros dejan de contar
+                    self._sumar_generos(self.generos_artista.get(artist_id, []), -1)
+                    self.nombres.pop(artist_id, None)
+            quitados += 1
+        return quitados
+
+    def actualizar_generos(self, token=None):
+        """
+        Obtiene los géneros de los artistas únicos que todavía no los tienen en el estado
+        (`api.obtener_generos_por_artista`, que consulta primero el almacén de metadatos) y los suma al conteo de géneros.
+        """
+        pendientes = [artist_id for artist_id in self.apariciones
+                      if artist_id not in self.generos_artista and artist_id not in ("None", "null")]
+        if not pendientes:
+            return 0
+        generos = api.obtener_generos_por_artista(token, pendientes)
+        for artist_id in pendientes:
+            self.generos_artista[artist_id] = list(generos.get(artist_id, []))
+            self._sumar_generos(self.generos_artista[artist_id], 1)
+        return len(pendientes)
+
+    def fusionar(self, otro):
+        """
+        Añade al estado los seguidores de otro estado de la misma marca (los seguidores repetidos se cuentan una sola vez).
+        """
+        for artist_id, generos in otro.generos_artista.items():
+            if artist_id not in self.generos_artista and artist_id not in self.apariciones:
+                self.generos_artista[artist_id] = generos
+        filas = [(user_id, {artist_id: otro.nombres.get(artist_id) for artist_id in ids_artistas})
+                 for user_id, ids_artistas in otro.seguidores.items()]
+        return self.agregar_seguidores(pd.DataFrame(filas, columns=["user_id", "artistas"]))
+
+    def resumen(self, top_k=None):
+        """
+        Devuelve el DataFrame resumen de la marca, con las mismas columnas que `obtener_generos_artistas`
+        ('brand', 'followers', 'unique_artists', 'artist_ranking', 'genres' y 'genres_ranking').
+        """
+        unicos = {artist_id: self.nombres.get(artist_id) for artist_id in self.apariciones if artist_id not in ("None", "null")}
+        ranking = sorted(self.conteo_artistas.items(), key=lambda x: x[1], reverse=True)
+        if top_k is not None:
+            ranking = ranking[:top_k]
+        return pd.DataFrame({
+            "brand": [self.marca],
+            "followers": len(self.seguidores),
+            "unique_artists": pd.Series([unicos], dtype=object),
+            "artist_ranking": pd.Series([ranking], dtype=object),
+            "genres": pd.Series([list(self.conteo_generos.keys())], dtype=object),
+            "genres_ranking": pd.Series([sorted(self.conteo_generos.items(), key=lambda x: x[1], reverse=True)], dtype=object)
+        })
+
+    def guardar(self, ruta):
+        """
+        Guarda el estado en un archivo SQLite, en una sola transacción (si falla, el archivo queda como estaba).
+
+        Si el estado se cargó de ese mismo archivo, solo escribe lo que ha cambiado desde entonces: los seguidores añadidos
+        o quitados (que ya se han ido escribiendo en la transacción) y las claves modificadas de cada contador.
+        Si no, escribe el estado completo.
+        """
+        ruta = os.path.abspath(ruta)
+        if self._conexion is None or ruta != self._ruta:
+            conexion = _abrir_estado(ruta)
+            conexion.execute("DELETE FROM seguidores")
+            conexion.execute("DELETE FROM contadores")
+            conexion.executemany("INSERT INTO seguidores (user_id, artistas) VALUES (?, ?)",
+                                 ((user_id, json.dumps(artistas)) for user_id, artistas in self.seguidores.items()))
+            for nombre in self.CONTADORES:
+                conexion.executemany("INSERT INTO contadores (contador, clave, valor) VALUES (?, ?, ?)",
+                                     ((nombre, clave, json.dumps(valor)) for clave, valor in getattr(self, nombre).items()))
+            if self._conexion is not None:
+                self._conexion.rollback()
+                self._conexion.close()
+            self._ruta, self._conexion = ruta, conexion
+            self.seguidores = _SeguidoresSQLite(conexion)
+        else:
+            conexion = self._conexion
+            for nombre in self.CONTADORES:
+                contador = getattr(self, nombre)
+                conexion.executemany("DELETE FROM contadores WHERE contador = ? AND clave = ?",
+                                     ((nombre, clave) for clave in contador.borradas))
+                # En el orden del diccionario, para que las claves nuevas se carguen después en el mismo orden
+                conexion.executemany("""INSERT INTO contadores (contador, clave, valor) VALUES (?, ?, ?)
+                                        ON CONFLICT (contador, clave) DO UPDATE SET valor = excluded.valor""",
+                                     ((nombre, clave, json.dumps(valor)) for clave, valor in contador.items() if clave in contador.cambiadas))
+        conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('marca', ?)", (json.dumps(self.marca),))
+        conexion.commit()
+        for nombre in self.CONTADORES:
+            getattr(self, nombre).limpiar_cambios()
+
+    @classmethod
+    def cargar(cls, ruta, marca=None):
+        """
+        Carga un estado guardado con `guardar()`. Si el archivo no existe, devuelve un estado vacío.
+
+        Los contadores se cargan en memoria; los seguidores se consultan en el archivo según se necesitan.
+        """
+        estado = cls(marca)
+        if not os.path.exists(ruta):
+            return estado
+        conexion = _abrir_estado(os.path.abspath(ruta))
+        fila = conexion.execute("SELECT valor FROM meta WHERE clave = 'marca'").fetchone()
+        estado.marca = json.loads(fila[0]) if fila is not None else marca
+        for nombre in cls.CONTADORES:
+            filas = conexion.execute("SELECT clave, valor FROM contadores WHERE contador = ? ORDER BY rowid", (nombre,))
+            setattr(estado, nombre, _Contador((clave, json.loads(valor)) for clave, valor in filas))
+        estado.seguidores = _SeguidoresSQLite(conexion)
+        estado._ruta, estado._conexion = os.path.abspath(ruta), conexion
+        return estado
+
+    def cerrar(self):
+        """
+        Cierra el archivo del estado. Los cambios que no se hayan guardado con `guardar()` se descartan.
+        """
+        if self._conexion is not None:
+            self._conexion.rollback()
+            self._conexion.close()
+            self._conexion = None
+            self._ruta = None
+
+    def _sumar_generos(self, generos, signo):
+        for genero in generos:
+            if signo > 0:
+                self.conteo_generos[genero] = self.conteo_generos.get(genero, 0) + 1
+            else:
+                self._restar(self.conteo_generos, genero, 1)
+
+    @staticmethod
+    def _restar(conteo, clave, cantidad):
+        # Resta del contador y elimina la clave al llegar a cero (así deja de aparecer en los únicos y en los rankings)
+        restante = conteo.get(clave, 0) - cantidad
+        if restante > 0:
+            conteo[clave] = restante
+        else:
+            conteo.pop(clave, None)
+
+class _Contador(dict):
+    # Diccionario que anota las claves modificadas y borradas desde el último guardado (para escribir solo esas)
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.cambiadas = set()
+        self.borradas = set()
+
+    def __setitem__(self, clave, valor):
+        super().__setitem__(clave, valor)
+        self.cambiadas.add(clave)
+
+    def __delitem__(self, clave):
+        super().__delitem__(clave)
+        self.borradas.add(clave)
+        self.cambiadas.discard(clave)
+
+    def pop(self, clave, *defecto):
+        if clave in self:
+            self.borradas.add(clave)
+            self.cambiadas.discard(clave)
+        return super().pop(clave, *defecto)
+
+    def limpiar_cambios(self):
+        self.cambiadas.clear()
+        self.borradas.clear()
+
+class _SeguidoresSQLite(MutableMapping):
+    # `{user_id: [artist_id, ...]}` guardado en la tabla `seguidores` del estado: cada acceso es una consulta por clave primaria.
+    # Las escrituras quedan en la transacción abierta hasta `EstadoResumenMarca.guardar()`.
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def __contains__(self, user_id):
+        return self._conexion.execute("SELECT 1 FROM seguidores WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def __getitem__(self, user_id):
+        fila = self._conexion.execute("SELECT artistas FROM seguidores WHERE user_id = ?", (user_id,)).fetchone()
+        if fila is None:
+            raise KeyError(user_id)
+        return json.loads(fila[0])
+
+    def __setitem__(self, user_id, artistas):
+        self._conexion.execute("INSERT OR REPLACE INTO seguidores (user_id, artistas) VALUES (?, ?)", (user_id, json.dumps(artistas)))
+
+    def __delitem__(self, user_id):
+        if self._conexion.execute("DELETE FROM seguidores WHERE user_id = ?", (user_id,)).rowcount == 0:
+            raise KeyError(user_id)
+
+    def __len__(self):
+        return self._conexion.execute("SELECT COUNT(*) FROM seguidores").fetchone()[0]
+
+    def __iter__(self):
+        return iter([user_id for (user_id,) in self._conexion.execute("SELECT user_id FROM seguidores ORDER BY rowid")])
+
+    def items(self):
+        return [(user_id, json.loads(artistas)) for user_id, artistas in
+                self._conexion.execute("SELECT user_id, artistas FROM seguidores ORDER BY rowid")]
+
+def _abrir_estado(ruta):
+    # Abre (o crea) el archivo SQLite de un `EstadoResumenMarca`
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    conexion = sqlite3.connect(ruta, timeout=30)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+    conexion.execute("CREATE TABLE IF NOT EXISTS seguidores (user_id TEXT PRIMARY KEY, artistas TEXT NOT NULL)")
+    conexion.execute("""CREATE TABLE IF NOT EXISTS contadores (
+        contador TEXT NOT NULL,
+        clave TEXT NOT NULL,
+        valor TEXT,
+        PRIMARY KEY (contador, clave))""")
+    conexion.commit()
+    return conexion
+
+def actualizar_resumen(nuevos_df, resumen_path, estado_path, followers_path=None, quitar=None, token=None, top_k=None):
+    """
+    Actualiza el resumen de una marca con nuevos seguidores (y, opcionalmente, quitando otros) sin recalcular toda la marca.
+
+    Parámetros:
+    ----------
+    nuevos_df : pandas.DataFrame o None
+        Seguidores nuevos con su columna 'artistas' (la salida de `obtener_id_artistas` para esos seguidores).
+
+    resumen_path : str
+        Ruta donde se guarda el resumen actualizado (CSV o Parquet).
+
+    estado_path : str
+        Archivo SQLite del estado de la marca (`EstadoResumenMarca`). Si no existe y se indica `followers_path`,
+        se construye una única vez a partir de los seguidores ya procesados.
+
+    followers_path : str, opcional
+        Archivo de seguidores de la marca (el que escribe `tabla_resumen`). Si se indica, los nuevos seguidores se añaden a él
+        y los quitados se eliminan.
+
+    quitar : list[str], opcional
+        `user_id` de los seguidores que se quieren quitar de la marca.
+
+    token : str, opcional
+        Token de la API de Spotify para los géneros de los artistas nuevos (por defecto, el token compartido).
+
+    top_k : int, opcional
+        Si se indica, el ranking de artistas solo incluye los `top_k` más repetidos.
+
+    Retorna:
+    -------
+    pandas.DataFrame
+        DataFrame resumen de la marca, con las columnas de `obtener_generos_artistas`.
+
+    Descripción:
+    -----------
+    - Carga el estado de la marca y le añade los seguidores nuevos (solo se recorren sus pares seguidor-artista).
+    - Pide los géneros solo de los artistas que aparecen por primera vez.
+    - Guarda el estado (solo los seguidores y contadores que han cambiado) y el resumen; el resumen no se vuelve a leer del disco.
+    - En CSV, los seguidores nuevos se añaden al final del archivo de seguidores sin reescribirlo
+      (en Parquet, o si se quitan seguidores, el archivo se reescribe).
+
+    Ejemplo de uso:
+    --------------
+    ```python
+    nuevos = obtener_id_artistas(nuevos_df, output_file="../datos/01 Spotify/00 TempSaves/00_tempsave_zara_nuevos.csv")
+    resumen = actualizar_resumen(nuevos, "../datos/01 Spotify/01 Resumen Marcas/resumen_zara.csv",
+                                 "../datos/01 Spotify/01 Resumen Marcas/estado_zara.sqlite",
+                                 followers_path="../datos/01 Spotify/02_followers_zara.csv")
+    """
+    nuevo = not os.path.exists(estado_path)
+    estado = EstadoResumenMarca.cargar(estado_path)
+    if nuevo and followers_path is not None and os.path.exists(followers_path):
+        estado.agregar_seguidores(alm.cargar_datos(followers_path))
+
+    if nuevos_df is not None and len(nuevos_df):
+        nuevos_df = nuevos_df.copy()
+        nuevos_df["artistas"] = str_a_diccionario(nuevos_df, "artistas")
+        # Se consulta cada seguidor nuevo en el estado (sin cargar la lista completa de seguidores)
+        nuevos_df = nuevos_df.loc[nuevos_df["artistas"].apply(bool) & nuevos_df["user_id"].astype(str).map(lambda user_id: user_id not in estado.seguidores)]
+        estado.agregar_seguidores(nuevos_df)
+        if followers_path is not None and len(nuevos_df):
+            if os.path.exists(followers_path) and not alm._es_parquet(followers_path):
+                # Mismo orden de columnas que el archivo existente
+                columnas = pd.read_csv(followers_path, nrows=0).columns
+                alm.guardar_datos(nuevos_df.reindex(columns=columnas), followers_path, mode="a", header=False)
+            else:
+                previos = alm.cargar_datos(followers_path) if os.path.exists(followers_path) else None
+                alm.guardar_datos(pd.concat([previos, nuevos_df], ignore_index=True), followers_path)
+
+    if quitar:
+        estado.quitar_seguidores(quitar)
+        if followers_path is not None and os.path.exists(followers_path):
+            seguidores_df = alm.cargar_datos(followers_path)
+            seguidores_df = seguidores_df.loc[~seguidores_df["user_id"].astype(str).isin(set(map(str, quitar)))]
+            alm.guardar_datos(seguidores_df, followers_path)
+
+    estado.actualizar_generos(token)
+    estado.guardar(estado_path)
+    resumen_df = estado.resumen(top_k=top_k)
+    estado.cerrar()
+    alm.guardar_datos(resumen_df, resumen_path)
+    return resumen_df
+
+def _rutas_marca(followers_path):
+    # Deriva el nombre de la marca y sus rutas de trabajo a partir de "../datos/01 Spotify/0N_followers_<marca>.csv"
+    carpeta = os.path.dirname(followers_path)
+    nombre = os.path.splitext(os.path.basename(followers_path))[0]
+    coincidencia = re.match(r"\d+_followers_(.+)$", nombre)
+    marca = coincidencia.group(1) if coincidencia else nombre
+    return {
+        "marca": marca,
+        "followers_path": followers_path,
+        "output_file": os.path.join(carpeta, "00 TempSaves", f"00_tempsave_{marca}.csv"),
+        "resumen_path": os.path.join(carpeta, "01 Resumen Marcas", f"resumen_{marca}.csv")
+    }
+
+def procesar_marca(followers_path, output_file=None, resumen_path=None, posicion=None, estado=None):
+    """
+    Ejecuta el pipeline completo de una marca: `obtener_id_artistas` → `tabla_resumen` → `obtener_generos_artistas`.
+
+    Parámetros:
+    ----------
+    followers_path : str
+        CSV de seguidores de la marca con sus playlists (por ejemplo "../datos/01 Spotify/02_followers_primark.csv").
+
+    output_file : str, opcional
+        Guardado temporal de la marca. Por defecto "00 TempSaves/00_tempsave_<marca>.csv" junto a `followers_path`.
+
+    resumen_path : str, opcional
+        CSV resumen de la marca. Por defecto "01 Resumen Marcas/resumen_<marca>.csv" junto a `followers_path`.
+
+    posicion : int, opcional
+        Línea de la barra de progreso de la marca.
+
+    estado : dict, opcional
+        Diccionario compartido donde se anota la etapa en curso de la marca (ver `procesar_marcas`).
+
+    Retorna:
+    -------
+    pandas.DataFrame
+        DataFrame resumen de la marca con sus géneros, igual que `obtener_generos_artistas`.
+    """
+    rutas = _rutas_marca(followers_path)
+    output_file = output_file or rutas["output_file"]
+    resumen_path = resumen_path or rutas["resumen_path"]
+    marca = rutas["marca"]
+    estado = estado if estado is not None else {}
+    for ruta in (output_file, resumen_path):
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+
+    estado[marca] = "obteniendo artistas"
+    brand_df = alm.cargar_datos(followers_path, index_col=0)
+    brand_artists = obtener_id_artistas(brand_df, output_file=output_file, desc=marca, posicion=posicion)
+
+    estado[marca] = "tabla resumen"
+    resumen = tabla_resumen(brand_artists, followers_path=followers_path, resumen_path=resumen_path)
+
+    estado[marca] = "obteniendo géneros"
+    resumen = obtener_generos_artistas(resumen, resumen_path=resumen_path)
+
+    estado[marca] = "terminada"
+    return resumen
+
+def procesar_marcas(followers_paths, hilos=None):
+    """
+    Procesa varias marcas a la vez con el pipeline de `procesar_marca`, compartiendo el presupuesto de la API.
+
+    Parámetros:
+    ----------
+    followers_paths : list[str]
+        CSV de seguidores de cada marca (por ejemplo `["../datos/01 Spotify/02_followers_primark.csv", ...]`).
+
+    hilos : int, opcional
+        Número de marcas que se procesan a la vez. Por defecto, todas.
+
+    Retorna:
+    -------
+    dict
+        Diccionario `{marca: resumen_df}`. Si una marca falla, su valor es la excepción y el resto continúa.
+
+    Descripción:
+    -----------
+    - Lanza cada marca en un hilo con `ThreadPoolExecutor`, cada una con su propia barra de progreso y su propio guardado temporal
+      (se puede reanudar cada marca por separado).
+    - Todas las marcas comparten, por estar en el mismo proceso, el `limitador` de la API (el ritmo total lo marca la cuota de Spotify,
+      no el número de marcas), el token, la caché de respuestas y el almacén de artistas/playlists de `soporte_spotify`:
+      un artista o una playlist que ya ha resuelto una marca no se vuelve a pedir para otra.
+    - Al terminar muestra la etapa final de cada marca.
+
+    Ejemplo de uso:
+    --------------
+    ```python
+    rutas = [f"../datos/01 Spotify/{n:02d}_followers_{marca}.csv" for n, marca in [(2, "primark"), (3, "nike"), (4, "adidas")]]
+    resumenes = procesar_marcas(rutas)
+    """
+    followers_paths = list(followers_paths)
+    estado = {_rutas_marca(ruta)["marca"]: "pendiente" for ruta in followers_paths}
+    lock = threading.Lock()
+    resultados = {}
+
+    def procesar(posicion, ruta):
+        marca = _rutas_marca(ruta)["marca"]
+        try:
+            resumen = procesar_marca(ruta, posicion=posicion, estado=estado)
+        except Exception as e:
+            estado[marca] = f"error: {e}"
+            resumen = e
+        with lock:
+            resultados[marca] = resumen
+
+    with ThreadPoolExecutor(max_workers=hilos or len(followers_paths) or 1) as pool:
+        list(pool.map(procesar, range(len(followers_paths)), followers_paths))
+
+    for marca, etapa in estado.items():
+        print(f"{marca}: {etapa}")
+    return resultados
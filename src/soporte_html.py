@@ -0,0 +1,152 @@
+#######################################################################################
+##            Análisis de HTML                                                    ##
+#######################################################################################
+# Para analizar el HTML de las páginas de seguidores.
+from bs4 import BeautifulSoup, SoupStrainer
+# Expresiones regulares para extraer los IDs de usuario de los atributos.
+import re
+
+# Parser rápido (lxml) si está instalado; si no, el parser estándar de Python.
+try:
+    import lxml
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+#######################################################################################
+##            Procesamiento en paralelo y archivos                                ##
+#######################################################################################
+# Para procesar muchos snapshots a la vez en varios procesos.
+from concurrent.futures import ProcessPoolExecutor
+# Para buscar snapshots con patrones (`*.html`).
+import glob
+# Para interactuar con el sistema operativo (rutas, carpetas, etc.).
+import os
+
+#######################################################################################
+##            Fin de los Imports                                                     ##
+#######################################################################################
+
+# Cada tarjeta de seguidor tiene `aria-labelledby="card-title-spotify:user:<user_id>-<posición>"`, a veces seguido de
+# otro ID separado por un espacio (`card-subtitle-spotify:user:<user_id>-<posición>`), así que el ID acaba en el primer espacio.
+# El atributo es estable, a diferencia de las clases CSS con hash que cambian con cada despliegue de Spotify.
+PATRON_TARJETA = re.compile(r"card-title-spotify:user:(\S+)-\d+(?:\s|$)")
+# Alternativa si cambia el atributo: los enlaces de las tarjetas apuntan a `/user/<user_id>`.
+PATRON_ENLACE = re.compile(r"^(?:https://open\.spotify\.com)?/user/([^/?#]+)$")
+
+
+def extraer_ids_followers(html):
+    """
+    Extrae los IDs de usuario de los seguidores a partir del HTML de una página de seguidores de Spotify.
+
+    Parámetros:
+    -----------
+    html : str, bytes o BeautifulSoup
+        HTML de la página `https://open.spotify.com/user/<marca>/followers` (por ejemplo, `driver.page_source`
+        o un snapshot guardado con `guardar_snapshot`), o el objeto BeautifulSoup ya analizado.
+
+    Retorna:
+    --------
+    ids_followers : list[str]
+        IDs de usuario en el orden en que aparecen en la página, sin duplicados.
+
+    Proceso:
+    --------
+    1. **Selección por atributos:** Busca los elementos con atributo `aria-labelledby` y extrae el ID con `PATRON_TARJETA`.
+    Si el HTML llega como texto, solo se construyen en el árbol esos elementos (`SoupStrainer`) usando el parser `lxml`.
+    2. **Alternativa:** Si no se encuentra ninguna tarjeta, usa los enlaces `href="/user/<user_id>"`.
+
+    Notas:
+    ------
+    - No depende de las clases CSS con hash (`Box__BoxComponent-sc-...`), que cambian sin previo aviso.
+    - Admite IDs con guiones, que la separación manual por `-` cortaba.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    with open("../datos/01 Spotify/00 Snapshots/zara.html", encoding="utf-8") as f:
+        ids = extraer_ids_followers(f.read())
+    print(len(ids))
+    """
+    if isinstance(html, BeautifulSoup):
+        tarjetas = html.find_all(attrs={"aria-labelledby": PATRON_TARJETA})
+        enlaces = None
+    else:
+        tarjetas = BeautifulSoup(html, PARSER, parse_only=SoupStrainer(attrs={"aria-labelledby": PATRON_TARJETA}))
+        tarjetas = tarjetas.find_all(attrs={"aria-labelledby": True})
+        enlaces = html
+
+    ids_followers = {}
+    for tarjeta in tarjetas:
+        coincidencia = PATRON_TARJETA.search(tarjeta["aria-labelledby"])
+        if coincidencia:
+            ids_followers[coincidencia.group(1)] = None
+
+    if not ids_followers:
+        # Alternativa: enlaces a perfiles de usuario
+        if enlaces is None:
+            enlaces = html.find_all("a", href=PATRON_ENLACE)
+        else:
+            enlaces = BeautifulSoup(enlaces, PARSER, parse_only=SoupStrainer("a", href=PATRON_ENLACE)).find_all("a")
+        for enlace in enlaces:
+            coincidencia = PATRON_ENLACE.search(enlace["href"])
+            if coincidencia:
+                ids_followers[coincidencia.group(1)] = None
+
+    return list(ids_followers)
+
+def extraer_ids_archivo(ruta):
+    """
+    Lee un snapshot HTML guardado y devuelve los IDs de sus seguidores (ver `extraer_ids_followers`).
+    """
+    with open(ruta, "rb") as f:
+        return extraer_ids_followers(f.read())
+
+def extraer_ids_snapshots(rutas, procesos=None):
+    """
+    Extrae los IDs de seguidores de muchos snapshots HTML en paralelo, usando varios procesos.
+
+    Parámetros:
+    -----------
+    rutas : str o list[str]
+        Lista de archivos HTML o un patrón (`"../datos/01 Spotify/00 Snapshots/*.html"`).
+
+    procesos : int, opcional
+        Número de procesos. Por defecto, uno por núcleo. Con `procesos=1` se procesan en el proceso actual.
+
+    Retorna:
+    --------
+    ids_por_snapshot : dict
+        Diccionario `{ruta: [ids_followers]}` en el mismo orden que `rutas`.
+
+    Notas:
+    ------
+    - El análisis del HTML es CPU puro: con varios procesos se aprovechan todos los núcleos (los hilos no, por el GIL).
+    - En Windows y macOS, el código que llame a esta función desde un script debe estar bajo `if __name__ == "__main__":`.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    ids = extraer_ids_snapshots("../datos/01 Spotify/00 Snapshots/*.html")
+    for ruta, ids_followers in ids.items():
+        print(ruta, len(ids_followers))
+    """
+    if isinstance(rutas, str):
+        rutas = sorted(glob.glob(rutas))
+    rutas = list(rutas)
+
+    if procesos == 1 or len(rutas) <= 1:
+        resultados = [extraer_ids_archivo(ruta) for ruta in rutas]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(extraer_ids_archivo, rutas, chunksize=max(1, len(rutas) // 32)))
+
+    return dict(zip(rutas, resultados))
+
+def guardar_snapshot(html, ruta):
+    """
+    Guarda el HTML de una página (por ejemplo `driver.page_source`) para poder volver a extraer los seguidores sin navegador.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(str(html))
@@ -0,0 +1,227 @@
+#######################################################################################
+##            Manejo de datos y procesamiento                                        ##
+#######################################################################################
+# Para los arrays de códigos enteros y el archivo mapeado en memoria
+import numpy as np
+# Para las rutas del diccionario persistido
+import os
+# Para compartir los diccionarios entre los hilos que procesan varias marcas a la vez
+import threading
+
+#######################################################################################
+##            Fin de los Imports                                                     ##
+#######################################################################################
+
+# Tabla SQL del diccionario de IDs (un código entero por ID de Spotify)
+QUERY_TABLA_IDS = '''CREATE TABLE IF NOT EXISTS spotify_ids (
+            id INTEGER PRIMARY KEY,
+            spotify_id VARCHAR UNIQUE NOT NULL
+            );'''
+
+# Carpeta de los diccionarios compartidos (junto al resto de guardados temporales de Spotify)
+RUTA_DICCIONARIOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "datos", "01 Spotify", "00 TempSaves")
+# Diccionarios compartidos cargados en este proceso: nombre → DiccionarioIds
+_compartidos = {}
+_lock_compartidos = threading.Lock()
+
+
+class DiccionarioIds:
+    """
+    Diccionario de IDs: asigna a cada ID de Spotify (artista, playlist, usuario) o a cada nombre un código entero compacto.
+
+    Los códigos son consecutivos desde 0 en orden de primera aparición y no cambian al añadir IDs nuevos, de modo que
+    un mismo ID tiene el mismo código en todas las marcas, archivos y tablas que usen el mismo diccionario.
+
+    Parámetros:
+    -----------
+    ids : iterable[str], opcional
+        IDs iniciales.
+
+    Notas:
+    ------
+    - Un ID de Spotify son 22 caracteres (unos 70 bytes como `str` de Python); su código ocupa 4 bytes en un array `int32`.
+      Comparar, agrupar y cruzar arrays de enteros es mucho más rápido que hacerlo con cadenas.
+    - `guardar()` escribe el diccionario como arrays de NumPy; `cargar(..., mmap=True)` los abre mapeados en memoria,
+      sin leer el archivo entero, y busca los IDs por búsqueda binaria.
+    - `filas()` devuelve las filas de la tabla `spotify_ids` (`QUERY_TABLA_IDS`) para guardarlo también en la base de datos.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    diccionario = DiccionarioIds()
+    codigos = diccionario.codificar(["0TnOYISbd1XYRBk9myaseg", "6eUKZXaKkcviH0Ku9w2n3V"])
+    diccionario.decodificar(codigos)
+    diccionario.guardar("../datos/02 Base de Datos/ids_spotify")
+    """
+
+    def __init__(self, ids=()):
+        self._codigos = {}
+        self._ids = []
+        # Parte mapeada en memoria (si se ha cargado con `mmap=True`)
+        self._claves_ordenadas = None
+        self._codigos_ordenados = None
+        self._ids_mapeados = None
+        self._base = 0
+        self._lock = threading.RLock()
+        if ids:
+            self.codificar(ids)
+
+    def __len__(self):
+        return self._base + len(self._ids)
+
+    @property
+    def dtype(self):
+        """
+        Tipo entero de los códigos: `int32` mientras quepan, `int64` si no.
+        """
+        return np.int32 if len(self) < np.iinfo(np.int32).max else np.int64
+
+    def codificar(self, ids):
+        """
+        Devuelve el array de códigos de `ids`, asignando códigos nuevos a los IDs que no estén en el diccionario.
+        """
+        ids = list(ids)
+        with self._lock:
+            codigos = self.buscar(ids)
+            for posicion in np.flatnonzero(codigos < 0):
+                spotify_id = ids[posicion]
+                codigo = self._codigos.get(spotify_id)
+                if codigo is None:
+                    codigo = self._base + len(self._ids)
+                    self._codigos[spotify_id] = codigo
+                    self._ids.append(spotify_id)
+                codigos[posicion] = codigo
+            return codigos.astype(self.dtype)
+
+    def buscar(self, ids):
+        """
+        Devuelve el array de códigos de `ids` sin añadir nada (`-1` para los IDs que no están en el diccionario).
+        """
+        ids = list(ids)
+        codigos = np.fromiter((self._codigos.get(spotify_id, -1) for spotify_id in ids), dtype=np.int64, count=len(ids))
+        if self._claves_ordenadas is not None and len(self._claves_ordenadas) and len(ids):
+            pendientes = np.flatnonzero(codigos < 0)
+            if len(pendientes):
+                claves = [str(ids[posicion]).encode("utf-8") for posicion in pendientes]
+                # Las claves más largas que las guardadas no pueden estar (y al convertirlas se truncarían)
+                caben = np.fromiter((len(clave) <= self._claves_ordenadas.dtype.itemsize for clave in claves), dtype=bool, count=len(claves))
+                claves = np.array(claves, dtype=self._claves_ordenadas.dtype)
+                posiciones = np.searchsorted(self._claves_ordenadas, claves)
+                posiciones = np.minimum(posiciones, len(self._claves_ordenadas) - 1)
+                encontrados = (self._claves_ordenadas[posiciones] == claves) & caben
+                codigos[pendientes[encontrados]] = self._codigos_ordenados[posiciones[encontrados]]
+        return codigos
+
+    def decodificar(self, codigos):
+        """
+        Devuelve la lista de IDs de un array de códigos. Lanza `IndexError` si algún código no está en el diccionario
+        (por ejemplo, el `-1` que devuelve `buscar()` para los IDs que faltan).
+        """
+        resultado = []
+        total = len(self)
+        for codigo in np.asarray(codigos).tolist():
+            if codigo < 0 or codigo >= total:
+                raise IndexError(f"El código {codigo} no está en el diccionario ({total} IDs)")
+            if codigo < self._base:
+                resultado.append(self._ids_mapeados[codigo].decode("utf-8"))
+            else:
+                resultado.append(self._ids[codigo - self._base])
+        return resultado
+
+    def filas(self):
+        """
+        Genera las filas `(id, spotify_id)` de la tabla `spotify_ids`.
+        """
+        for codigo in range(self._base):
+            yield codigo, self._ids_mapeados[codigo].decode("utf-8")
+        for posicion, spotify_id in enumerate(self._ids):
+            yield self._base + posicion, spotify_id
+
+    def guardar(self, ruta):
+        """
+        Guarda el diccionario en tres arrays de NumPy junto a `ruta`:
+        - `<ruta>.ids.npy`: IDs por código (para decodificar).
+        - `<ruta>.claves.npy` y `<ruta>.codigos.npy`: IDs ordenados y su código (para buscar por búsqueda binaria).
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with self._lock:
+            ids = np.array([spotify_id.encode("utf-8") for _, spotify_id in self.filas()], dtype=bytes)
+            # Los arrays mapeados se pasan a memoria antes de sustituir los archivos (en Windows no se puede reemplazar
+            # un archivo mapeado)
+            if isinstance(self._ids_mapeados, np.memmap):
+                self._ids_mapeados = np.array(self._ids_mapeados)
+                self._claves_ordenadas = np.array(self._claves_ordenadas)
+                self._codigos_ordenados = np.array(self._codigos_ordenados)
+            orden = np.argsort(ids, kind="stable")
+            for sufijo, array in (("ids", ids), ("claves", ids[orden]), ("codigos", orden.astype(self.dtype))):
+                temporal = f"{ruta}.{sufijo}.tmp.npy"
+                np.save(temporal, array)
+                os.replace(temporal, f"{ruta}.{sufijo}.npy")
+
+    @classmethod
+    def cargar(cls, ruta, mmap=True):
+        """
+        Carga un diccionario guardado con `guardar()`. Si no existe, devuelve uno vacío.
+
+        Con `mmap=True`, los arrays se abren mapeados en memoria: el sistema operativo solo lee las páginas que se consultan,
+        y varios procesos que usen el mismo diccionario comparten esas páginas. Los IDs nuevos se añaden en memoria
+        (hasta el siguiente `guardar()`).
+        """
+        diccionario = cls()
+        if not os.path.exists(f"{ruta}.ids.npy"):
+            return diccionario
+        modo = "r" if mmap else None
+        diccionario._ids_mapeados = np.load(f"{ruta}.ids.npy", mmap_mode=modo)
+        diccionario._claves_ordenadas = np.load(f"{ruta}.claves.npy", mmap_mode=modo)
+        diccionario._codigos_ordenados = np.load(f"{ruta}.codigos.npy", mmap_mode=modo)
+        diccionario._base = len(diccionario._ids_mapeados)
+        return diccionario
+
+def diccionario_compartido(nombre="ids_spotify"):
+    """
+    Devuelve el diccionario compartido `nombre`, cargado una sola vez por proceso desde `RUTA_DICCIONARIOS`
+    (con `DiccionarioIds.cargar(..., mmap=True)`; vacío si todavía no se ha guardado nunca).
+
+    Parámetros:
+    -----------
+    nombre : str, opcional (por defecto "ids_spotify")
+        - "ids_spotify": IDs de Spotify de los artistas (el que usa `explotar_artistas` y sube `subir_ids_spotify`).
+        - "nombres": nombres de artistas, géneros y subgéneros (el que usa el motor de afinidad).
+
+    Notas:
+    ------
+    - Todas las marcas y llamadas del proceso comparten el mismo objeto, así que un ID tiene siempre el mismo código.
+    - Los IDs nuevos se añaden en memoria hasta `guardar_diccionario_compartido()`.
+    """
+    with _lock_compartidos:
+        if nombre not in _compartidos:
+            _compartidos[nombre] = DiccionarioIds.cargar(os.path.join(RUTA_DICCIONARIOS, nombre))
+        return _compartidos[nombre]
+
+def guardar_diccionario_compartido(nombre="ids_spotify"):
+    """
+    Guarda en `RUTA_DICCIONARIOS` el diccionario compartido `nombre` con los IDs añadidos en este proceso.
+    """
+    diccionario = diccionario_compartido(nombre)
+    diccionario.guardar(os.path.join(RUTA_DICCIONARIOS, nombre))
+    return diccionario
+
+def codificar_rankings(*rankings, diccionario=None):
+    """
+    Codifica varias listas de nombres o IDs con un mismo diccionario, para compararlas como arrays de enteros.
+
+    Parámetros:
+    -----------
+    *rankings : iterable[str]
+        Listas a codificar.
+
+    diccionario : DiccionarioIds, opcional
+        Diccionario con el que se codifican (por defecto, uno temporal solo para estas listas).
+
+    Retorna:
+    --------
+    list[numpy.ndarray]
+        Un array de códigos por lista, en el mismo orden.
+    """
+    diccionario = diccionario if diccionario is not None else DiccionarioIds()
+    return [diccionario.codificar(ranking) for ranking in rankings]
@@ -0,0 +1,365 @@
+#######################################################################################
+##            Servidor HTTP local                                                  ##
+#######################################################################################
+# Servidor HTTP de la librería estándar, con un hilo por petición.
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+# Para analizar la ruta y los parámetros de cada petición.
+from urllib.parse import urlparse, parse_qs, urlencode
+# Para ejecutar el servidor en segundo plano y proteger sus contadores.
+import threading
+
+#######################################################################################
+##            Datos sintéticos y utilidades                                        ##
+#######################################################################################
+# Para generar datos deterministas a partir de los IDs.
+import hashlib
+import random
+# Para serializar las respuestas y leer fixtures grabados.
+import json
+# Para leer fixtures desde la caché de respuestas (SQLite).
+import sqlite3
+# Para simular latencia y caducidad de tokens.
+from time import sleep, time
+
+#######################################################################################
+##            Fin de los Imports                                                     ##
+#######################################################################################
+
+# Géneros de ejemplo para los artistas sintéticos
+GENEROS_SINTETICOS = ["pop", "dance pop", "reggaeton", "latin pop", "trap latino", "rock", "indie", "edm",
+                      "hip hop", "r&b", "house", "techno", "flamenco", "urbano latino", "k-pop", "afrobeats"]
+
+
+class ServidorSpotifyFalso:
+    """
+    Servidor local que imita la Web API de Spotify para medir el rendimiento de los rastreos sin gastar cuota.
+
+    Sirve datos sintéticos (deterministas: el mismo ID devuelve siempre lo mismo) para:
+    - `POST /api/token` (Client Credentials).
+    - `GET /v1/playlists/{id}` (`snapshot_id`) y `GET /v1/playlists/{id}/tracks` (paginado por `offset`/`limit` y con `next`).
+    - `GET /v1/artists?ids=...` (lotes de hasta 50 artistas con géneros).
+    - `GET /v1/users/{id}` y `GET /v1/users/{id}/playlists`.
+    - `GET /v1/me`, `GET /v1/me/tracks` (canciones guardadas) y `GET /v1/me/top/tracks`.
+
+    Parámetros:
+    -----------
+    puerto : int, opcional (por defecto 0)
+        Puerto en el que escuchar. Con `0` se elige uno libre (ver `url_api` / `url_auth`).
+
+    latencia : float, opcional (por defecto 0.02)
+        Latencia media (segundos) que se añade a cada respuesta.
+
+    variacion : float, opcional (por defecto 0.5)
+        Variación relativa de la latencia (0.5 = ±50%).
+
+    prob_429 : float, opcional (por defecto 0)
+        Probabilidad de responder `429 Too Many Requests` a una petición de la API.
+
+    retry_after : int, opcional (por defecto 1)
+        Valor de la cabecera `Retry-After` (segundos) de los `429`.
+
+    duracion_token : int, opcional (por defecto 3600)
+        Segundos de validez de los tokens emitidos; después, las peticiones con ese token reciben `401`.
+
+    pistas_por_playlist : tuple[int, int], opcional (por defecto (20, 400))
+        Rango del número de pistas de cada playlist sintética.
+
+    artistas_distintos : int, opcional (por defecto 5000)
+        Tamaño del catálogo de artistas sintéticos (cuanto menor, más artistas repetidos entre playlists).
+
+    fixtures : dict o str, opcional
+        Respuestas grabadas que se sirven en lugar de los datos sintéticos. Diccionario `{"/v1/ruta?query": cuerpo}`,
+        la ruta de un JSON con ese formato o la de la caché de respuestas (`cache_spotify.sqlite`).
+
+    semilla : int, opcional (por defecto 0)
+        Semilla de los datos sintéticos y de los fallos inyectados.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    import src.soporte_spotify as api
+
+    with ServidorSpotifyFalso(latencia=0.05, prob_429=0.01) as servidor:
+        # `soporte_spotify` lee SPOTIFY_API_URL al importarse: con el módulo ya importado se cambian sus constantes
+        api.API_URL = servidor.url_api
+        api.AUTH_URL = servidor.url_auth
+        ...
+        print(servidor.estadisticas())
+    """
+
+    def __init__(self, puerto=0, latencia=0.02, variacion=0.5, prob_429=0.0, retry_after=1, duracion_token=3600,
+                 pistas_por_playlist=(20, 400), artistas_distintos=5000, fixtures=None, semilla=0):
+        self.latencia = latencia
+        self.variacion = variacion
+        self.prob_429 = prob_429
+        self.retry_after = retry_after
+        self.duracion_token = duracion_token
+        self.pistas_por_playlist = pistas_por_playlist
+        self.artistas_distintos = artistas_distintos
+        self.semilla = semilla
+        self.fixtures = cargar_fixtures(fixtures) if fixtures else {}
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._contadores = {"peticiones": 0, "429": 0, "401": 0, "fixtures": 0}
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", puerto), self._crear_manejador())
+        self._servidor.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def url_base(self):
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    @property
+    def url_api(self):
+        return f"{self.url_base}/v1"
+
+    @property
+    def url_auth(self):
+        return f"{self.url_base}/api/token"
+
+    def iniciar(self):
+        """
+        Arranca el servidor en un hilo en segundo plano.
+        """
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        """
+        Detiene el servidor y libera el puerto.
+        """
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.detener()
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores del servidor: peticiones recibidas, `429` y `401` inyectados y respuestas servidas desde fixtures.
+        """
+        with self._lock:
+            return dict(self._contadores)
+
+    def reiniciar_estadisticas(self):
+        with self._lock:
+            for clave in self._contadores:
+                self._contadores[clave] = 0
+
+    # ------------------------------------------------------------------ datos sintéticos
+    def _rng(self, *claves):
+        # Generador determinista para un recurso concreto
+        semilla = hashlib.sha1("|".join(map(str, (self.semilla, *claves))).encode()).hexdigest()
+        return random.Random(int(semilla[:16], 16))
+
+    def _artista(self, indice):
+        rng = self._rng("artista", indice)
+        artist_id = f"art{indice:06d}"
+        return {
+            "id": artist_id,
+            "name": f"Artista {indice}",
+            "genres": rng.sample(GENEROS_SINTETICOS, rng.randint(0, 4)),
+            "popularity": rng.randint(0, 100),
+            "external_urls": {"spotify": f"https://open.spotify.com/artist/{artist_id}"},
+            "type": "artist"
+        }
+
+    def _cancion(self, rng, prefijo, posicion):
+        indice = min(int(rng.paretovariate(1.2)) - 1, self.artistas_distintos - 1)  # Pocos artistas muy repetidos
+        indice = (indice * 7919 + rng.randint(0, 3)) % self.artistas_distintos
+        artista = self._artista(indice)
+        track_id = f"{prefijo}trk{posicion:05d}"
+        return {
+            "id": track_id,
+            "name": f"Canción {posicion}",
+            "popularity": rng.randint(0, 100),
+            "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+            "artists": [{"id": artista["id"], "name": artista["name"],
+                         "external_urls": artista["external_urls"]}]
+        }
+
+    def _total_pistas(self, playlist_id):
+        return self._rng("total", playlist_id).randint(*self.pistas_por_playlist)
+
+    def _pagina(self, ruta, items, total, offset, limite, query):
+        # Envoltorio de paginación con el mismo formato que la API (`next` absoluto o `None`)
+        siguiente = None
+        if offset + limite < total:
+            parametros = {clave: valores[0] for clave, valores in query.items()}
+            parametros.update({"offset": offset + limite, "limit": limite})
+            siguiente = f"{self.url_base}{ruta}?{urlencode(parametros)}"
+        return {"href": f"{self.url_base}{ruta}", "items": items, "limit": limite, "offset": offset,
+                "total": total, "next": siguiente, "previous": None}
+
+    def _responder_api(self, ruta, query):
+        # Devuelve (código, cuerpo) para una ruta de la Web API
+        partes = ruta.strip("/").split("/")[1:]  # Sin el prefijo "v1"
+        offset = int(query.get("offset", ["0"])[0])
+        limite = int(query.get("limit", ["20"])[0])
+
+        if partes[:1] == ["playlists"] and len(partes) == 2:
+            return 200, {"id": partes[1], "snapshot_id": f"snap-{partes[1]}-{self.semilla}"}
+
+        if partes[:1] == ["playlists"] and len(partes) == 3 and partes[2] == "tracks":
+            total = self._total_pistas(partes[1])
+            rng = self._rng("pistas", partes[1], offset)
+            items = [{"track": self._cancion(rng, partes[1], posicion)} for posicion in range(offset, min(offset + limite, total))]
+            return 200, self._pagina(ruta, items, total, offset, limite, query)
+
+        if partes == ["artists"]:
+            ids = [artist_id for artist_id in query.get("ids", [""])[0].split(",") if artist_id]
+            if len(ids) > 50:
+                return 400, {"error": {"status": 400, "message": "Too many ids requested"}}
+            artistas = [self._artista(int(artist_id[3:])) if artist_id.startswith("art") and artist_id[3:].isdigit() else None
+                        for artist_id in ids]
+            return 200, {"artists": artistas}
+
+        if partes[:1] == ["users"] and len(partes) == 2:
+            if partes[1].startswith("inexistente"):
+                return 404, {"error": {"status": 404, "message": "No such user"}}
+            return 200, {"id": partes[1], "display_name": f"Usuario {partes[1]}", "type": "user"}
+
+        if partes[:1] == ["users"] and len(partes) == 3 and partes[2] == "playlists":
+            total = self._rng("playlists", partes[1]).randint(0, 60)
+            items = [{"id": f"{partes[1]}pl{posicion:03d}", "name": f"Playlist {posicion} de {partes[1]}"}
+                     for posicion in range(offset, min(offset + limite, total))]
+            return 200, self._pagina(ruta, items, total, offset, limite, query)
+
+        if partes == ["me"]:
+            return 200, {"id": "usuario_mock", "display_name": "Usuario Mock", "email": "mock@example.com",
+                         "product": "premium", "external_urls": {"spotify": "https://open.spotify.com/user/usuario_mock"}}
+
+        if partes == ["me", "tracks"]:
+            total = 1500
+            rng = self._rng("guardadas", offset)
+            items = [{"added_at": "2024-01-01T00:00:00Z", "track": self._cancion(rng, "me", posicion)}
+                     for posicion in range(offset, min(offset + limite, total))]
+            return 200, self._pagina(ruta, items, total, offset, limite, query)
+
+        if partes == ["me", "top", "tracks"]:
+            total = 100
+            rng = self._rng("top", offset)
+            items = [self._cancion(rng, "top", posicion) for posicion in range(offset, min(offset + limite, total))]
+            return 200, self._pagina(ruta, items, total, offset, limite, query)
+
+        return 404, {"error": {"status": 404, "message": "Service not found"}}
+
+    # ------------------------------------------------------------------ HTTP
+    def _crear_manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Conexiones keep-alive, como la API real
+            # Cabeceras y cuerpo van en escrituras separadas: con Nagle activo, cada respuesta esperaría al ACK
+            # retrasado del cliente (~40 ms) y la espera se sumaría a todas las peticiones medidas
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass  # Sin trazas por petición
+
+            def _enviar(self, codigo, cuerpo, cabeceras=None):
+                datos = cuerpo if isinstance(cuerpo, bytes) else json.dumps(cuerpo).encode()
+                self.send_response(codigo)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(datos)))
+                for nombre, valor in (cabeceras or {}).items():
+                    self.send_header(nombre, str(valor))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def _esperar(self):
+                if servidor.latencia:
+                    with servidor._lock:
+                        factor = 1 + servidor._azar.uniform(-servidor.variacion, servidor.variacion)
+                    sleep(max(0.0, servidor.latencia * factor))
+
+            def do_POST(self):
+                longitud = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(longitud)
+                with servidor._lock:
+                    servidor._contadores["peticiones"] += 1
+                if urlparse(self.path).path != "/api/token":
+                    return self._enviar(404, {"error": "not_found"})
+                self._esperar()
+                token = f"mock-{hashlib.sha1(str(time()).encode()).hexdigest()[:16]}"
+                with servidor._lock:
+                    servidor._tokens[token] = time() + servidor.duracion_token
+                self._enviar(200, {"access_token": token, "token_type": "Bearer", "expires_in": servidor.duracion_token})
+
+            def do_GET(self):
+                partes = urlparse(self.path)
+                query = parse_qs(partes.query)
+                with servidor._lock:
+                    servidor._contadores["peticiones"] += 1
+                    fallar_429 = servidor.prob_429 and servidor._azar.random() < servidor.prob_429
+                self._esperar()
+
+                # Autenticación: solo se aceptan tokens emitidos por este servidor y no caducados
+                autorizacion = self.headers.get("Authorization", "")
+                token = autorizacion[7:] if autorizacion.startswith("Bearer ") else None
+                with servidor._lock:
+                    expira = servidor._tokens.get(token)
+                if expira is None or expira < time():
+                    with servidor._lock:
+                        servidor._contadores["401"] += 1
+                    return self._enviar(401, {"error": {"status": 401, "message": "The access token expired"}})
+
+                if fallar_429:
+                    with servidor._lock:
+                        servidor._contadores["429"] += 1
+                    return self._enviar(429, {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                                        {"Retry-After": servidor.retry_after})
+
+                # Respuestas grabadas
+                clave = _clave_fixture(self.path)
+                if clave in servidor.fixtures:
+                    with servidor._lock:
+                        servidor._contadores["fixtures"] += 1
+                    return self._enviar(200, servidor.fixtures[clave])
+
+                codigo, cuerpo = servidor._responder_api(partes.path, query)
+                self._enviar(codigo, cuerpo)
+
+        return Manejador
+
+
+def _clave_fixture(url):
+    # Clave de un fixture: ruta desde `/v1` y parámetros ordenados, sin host
+    partes = urlparse(url)
+    query = sorted((clave, valor) for clave, valores in parse_qs(partes.query, keep_blank_values=True).items() for valor in valores)
+    ruta = partes.path
+    return f"{ruta}?{urlencode(query)}" if query else ruta
+
+def cargar_fixtures(origen):
+    """
+    Carga respuestas grabadas para `ServidorSpotifyFalso`.
+
+    Parámetros:
+    -----------
+    origen : dict o str
+        - Diccionario `{"/v1/ruta?query": cuerpo}`.
+        - Ruta de un archivo `.json` con ese mismo formato.
+        - Ruta de la caché de respuestas de `soporte_spotify` (`cache_spotify.sqlite`): todas las respuestas
+          reales guardadas por los notebooks se pueden reproducir sin conexión.
+
+    Retorna:
+    --------
+    fixtures : dict
+        Diccionario `{clave: cuerpo}` con las claves normalizadas (parámetros ordenados).
+    """
+    if isinstance(origen, dict):
+        return {_clave_fixture(clave): cuerpo for clave, cuerpo in origen.items()}
+    if str(origen).endswith((".sqlite", ".db")):
+        conexion = sqlite3.connect(origen)
+        try:
+            filas = conexion.execute("SELECT clave, cuerpo FROM respuestas").fetchall()
+        finally:
+            conexion.close()
+        return {_clave_fixture(clave): bytes(cuerpo) for clave, cuerpo in filas}
+    with open(origen, "r", encoding="utf-8") as archivo:
+        return {_clave_fixture(clave): cuerpo for clave, cuerpo in json.load(archivo).items()}
@@ -0,0 +1,434 @@
+"""
+Ejecución declarativa del pipeline de marcas (lo que hacían a mano los notebooks 01–10).
+
+Cada marca pasa por las etapas de `ETAPAS`:
+
+    seguidores → playlists → artistas → resumen → generos
+
+La salida de cada etapa se guarda en "datos/01 Spotify/03 Pipeline/<marca>/" junto a un manifiesto con la huella
+(hash) de sus entradas: el contenido de los archivos de las etapas anteriores, sus parámetros y el código de las funciones
+que usa. Al volver a ejecutar, una etapa solo se repite si su huella ha cambiado; por ejemplo, cambiar el cálculo de géneros
+solo vuelve a ejecutar `generos`, sin tocar los rastreos.
+
+Uso (desde la raíz del repositorio):
+
+    python -m src.soporte_pipeline                              # todas las marcas, todas las etapas
+    python -m src.soporte_pipeline --marcas zara nike --hasta resumen
+    python -m src.soporte_pipeline --forzar generos --hilos 4
+    python -m src.soporte_pipeline --estado                     # qué etapas están al día y cuáles se ejecutarían
+"""
+#######################################################################################
+##            Línea de comandos y utilidades                                       ##
+#######################################################################################
+# Para leer los argumentos de la línea de comandos.
+import argparse
+# Para las huellas de las etapas (contenido de archivos, parámetros y código).
+import hashlib
+import inspect
+import json
+# Para las rutas de las salidas y los manifiestos.
+import os
+# Para procesar varias marcas a la vez.
+from concurrent.futures import ThreadPoolExecutor
+import threading
+# Para medir la duración de cada etapa.
+from time import perf_counter
+# Barra de progreso de la etapa de playlists.
+from tqdm import tqdm
+
+#######################################################################################
+##            Funciones personalizadas                                               ##
+#######################################################################################
+# Funciones para interactuar con la API de Spotify
+import src.soporte_spotify as api
+# Funciones del pipeline de marcas
+import src.soporte_extraccion_datos as ex
+# Lectura y escritura de los archivos intermedios (CSV o Parquet)
+import src.soporte_almacenamiento as alm
+
+#######################################################################################
+##            Fin de los Imports                                                     ##
+#######################################################################################
+
+# Carpeta raíz de las salidas del pipeline
+RUTA_PIPELINE = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "datos", "01 Spotify", "03 Pipeline"))
+
+# Marcas analizadas: nombre corto (carpetas), nombre de la marca (columna 'brand') y usuario de Spotify (notebook 01)
+MARCAS = {
+    "zara": {"nombre": "Zara", "usuario": "r6ivwuv0ebk346hhxo446pbfv"},
+    "primark": {"nombre": "Primark", "usuario": "1u0ewgq4b77l1ttu6j4oyaylw"},
+    "nike": {"nombre": "Nike", "usuario": "nikerunclub"},
+    "adidas": {"nombre": "Adidas", "usuario": "430wexvtgeypb6zdn45ge9c76"},
+    "hm": {"nombre": "H&M", "usuario": "hm"},
+    "pull_and_bear": {"nombre": "Pull & Bear", "usuario": "pull_and_bear"},
+    "bershka": {"nombre": "bershka", "usuario": "bershka"},
+    "stradivarius": {"nombre": "Stradivarius", "usuario": "stradivas"},
+    "mango": {"nombre": "Mango", "usuario": "mango_official"},
+    "desigual": {"nombre": "Desigual", "usuario": "1119086036"}
+}
+
+
+class Etapa:
+    """
+    Una etapa del pipeline.
+
+    Parámetros:
+    -----------
+    nombre : str
+        Nombre de la etapa (y de su archivo de salida).
+
+    funcion : callable
+        `funcion(marca, config, entradas, salida, contexto)`: lee los archivos de `entradas` (`{etapa: ruta}`) y escribe `salida`.
+
+    dependencias : list[str]
+        Etapas cuyas salidas necesita.
+
+    codigo : list[callable]
+        Funciones de los módulos `soporte_*` que usa la etapa. Su código, y el de todas las funciones y clases de
+        `soporte_*` a las que llaman (directa o indirectamente), forma parte de la huella: si cambia alguna, la etapa
+        (y las siguientes, porque cambia su salida) se vuelve a ejecutar.
+
+    parametros : list[str]
+        Claves de la configuración de la marca que forman parte de la huella.
+    """
+
+    def __init__(self, nombre, funcion, dependencias=(), codigo=(), parametros=()):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.dependencias = list(dependencias)
+        self.codigo = list(codigo)
+        self.parametros = list(parametros)
+
+    def huella(self, config, entradas, formato):
+        """
+        Hash de todo lo que determina la salida de la etapa: su código, sus parámetros y el contenido de sus entradas.
+        """
+        sha = hashlib.sha256()
+        sha.update(self.nombre.encode())
+        sha.update(formato.encode())
+        for funcion in codigo_relacionado([self.funcion] + self.codigo):
+            sha.update(inspect.getsource(funcion).encode())
+        sha.update(json.dumps({clave: config.get(clave) for clave in self.parametros}, sort_keys=True, default=str).encode())
+        for etapa in self.dependencias:
+            sha.update(huella_archivo(entradas[etapa]).encode())
+        return sha.hexdigest()
+
+def _propio(objeto):
+    # Solo se sigue el código del proyecto (funciones y clases de los módulos `soporte_*`)
+    return (inspect.isfunction(objeto) or inspect.isclass(objeto)) and getattr(objeto, "__module__", "").startswith("src.soporte_")
+
+def _referencias(objeto):
+    # Funciones y clases de `soporte_*` que nombra `objeto`, ya sea directamente (`funcion(...)`) o a través de su módulo (`alm.guardar_datos(...)`)
+    if inspect.isclass(objeto):
+        for base in objeto.__bases__:
+            if _propio(base):
+                yield base
+        for atributo in vars(objeto).values():
+            atributo = getattr(atributo, "__func__", getattr(atributo, "fget", atributo))
+            if inspect.isfunction(atributo):
+                yield from _referencias(atributo)
+        return
+    funcion = inspect.unwrap(objeto)
+    nombres, codigos = set(), [funcion.__code__]
+    while codigos:
+        codigo = codigos.pop()
+        nombres.update(codigo.co_names)
+        codigos.extend(constante for constante in codigo.co_consts if inspect.iscode(constante))
+    for nombre in nombres:
+        valor = funcion.__globals__.get(nombre)
+        if _propio(valor):
+            yield valor
+        elif inspect.ismodule(valor) and valor.__name__.startswith("src.soporte_"):
+            # `co_names` no dice qué atributo se pide a qué módulo: se prueban todos los nombres del código
+            for atributo in nombres:
+                if _propio(getattr(valor, atributo, None)):
+                    yield getattr(valor, atributo)
+
+def codigo_relacionado(funciones):
+    """
+    Cierre de las funciones y clases de los módulos `soporte_*` de las que dependen `funciones`.
+
+    Parámetros:
+    -----------
+    funciones : list[callable]
+        Funciones de partida.
+
+    Retorna:
+    --------
+    list[callable]
+        Las funciones de partida y todas las funciones y clases de `soporte_*` a las que llaman, directa o indirectamente,
+        sin repetidos y en un orden estable (por módulo y nombre), de forma que la huella no depende del orden de búsqueda.
+
+    Notas:
+    ------
+    - Un cambio en un helper compartido (por ejemplo `alm.guardar_datos` o `ex.str_a_diccionario`) invalida todas las
+      etapas que lo usan, y solo esas: la etapa de géneros no depende del código que recorre las playlists.
+    - La búsqueda es por nombres, así que puede incluir alguna función de más (nunca de menos salvo llamadas dinámicas
+      con `getattr`); lo peor que puede pasar es una re-ejecución innecesaria.
+    """
+    vistos = {}
+    pendientes = list(funciones)
+    while pendientes:
+        objeto = pendientes.pop()
+        clave = (objeto.__module__, objeto.__qualname__)
+        if clave in vistos:
+            continue
+        vistos[clave] = objeto
+        pendientes.extend(_referencias(objeto))
+    return [vistos[clave] for clave in sorted(vistos)]
+
+def huella_archivo(ruta, tamano_bloque=1 << 20):
+    """
+    Hash SHA-256 del contenido de un archivo (leído por bloques).
+    """
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+#######################################################################################
+##            Etapas                                                                 ##
+#######################################################################################
+
+def _etapa_seguidores(marca, config, entradas, salida, contexto):
+    # Notebook 01: HTML de los seguidores → IDs y nombres de usuario
+    html = api.obtener_html_followers(config["usuario"])
+    followers = api.extraer_ids_usuario(contexto.sp(), config["nombre"], html)
+    alm.guardar_datos(followers.reset_index(drop=True), salida)
+
+def _etapa_playlists(marca, config, entradas, salida, contexto):
+    # Notebook 02: playlists públicas de cada seguidor, descartando los que no tienen
+    followers = alm.cargar_datos(entradas["seguidores"])
+    sp = contexto.sp()
+    followers["playlists"] = [api.obtener_playlists(sp, user_id) for user_id in tqdm(followers["user_id"], desc=f"{marca}: playlists")]
+    followers = followers.loc[followers["playlists"] != "No playlists"].reset_index(drop=True)
+    alm.guardar_datos(followers, salida)
+
+def _etapa_artistas(marca, config, entradas, salida, contexto):
+    # Notebooks 03 y 09: artistas de las playlists de cada seguidor (se reanuda con el guardado temporal de esta huella)
+    followers = alm.cargar_datos(entradas["playlists"])
+    temporal = os.path.join(os.path.dirname(salida), f"temporal_artistas_{contexto.huella_actual[:12]}.csv")
+    artistas = ex.obtener_id_artistas(followers, output_file=temporal, desc=marca)
+    alm.guardar_datos(artistas, salida)
+    os.remove(temporal)
+
+def _etapa_resumen(marca, config, entradas, salida, contexto):
+    # Notebook 04: seguidores con artistas, artistas únicos y ranking
+    artistas = alm.cargar_datos(entradas["artistas"])
+    seguidores = os.path.join(os.path.dirname(salida), "seguidores_con_artistas" + os.path.splitext(salida)[1])
+    ex.tabla_resumen(artistas, followers_path=seguidores, resumen_path=salida, top_k=config.get("top_k"))
+
+def _etapa_generos(marca, config, entradas, salida, contexto):
+    # Notebook 05: géneros de los artistas únicos y su ranking
+    resumen = alm.cargar_datos(entradas["resumen"])
+    ex.obtener_generos_artistas(resumen, resumen_path=salida)
+
+ETAPAS = [
+    Etapa("seguidores", _etapa_seguidores, codigo=[api.obtener_html_followers, api.extraer_ids_usuario], parametros=["nombre", "usuario"]),
+    Etapa("playlists", _etapa_playlists, ["seguidores"], codigo=[api.obtener_playlists]),
+    Etapa("artistas", _etapa_artistas, ["playlists"], codigo=[ex.obtener_id_artistas]),
+    Etapa("resumen", _etapa_resumen, ["artistas"], codigo=[ex.tabla_resumen, ex.explotar_artistas, ex.agregar_artistas], parametros=["top_k"]),
+    Etapa("generos", _etapa_generos, ["resumen"], codigo=[ex.obtener_generos_artistas, api.obtener_generos, api.obtener_generos_por_artista])
+]
+NOMBRES_ETAPAS = [etapa.nombre for etapa in ETAPAS]
+
+#######################################################################################
+##            Ejecución                                                              ##
+#######################################################################################
+
+class _Contexto:
+    # Recursos compartidos por las etapas de todas las marcas (el cliente de spotipy se crea una sola vez y solo si hace falta)
+    def __init__(self):
+        self._sp = None
+        self._lock = threading.Lock()
+        self.huella_actual = None
+
+    def sp(self):
+        with self._lock:
+            if self._sp is None:
+                self._sp = api.load_credentials()
+            return self._sp
+
+def _rutas(marca, etapa, formato, raiz):
+    carpeta = os.path.join(raiz, marca)
+    return os.path.join(carpeta, f"{etapa}.{formato}"), os.path.join(carpeta, f"{etapa}.manifiesto.json")
+
+def _leer_manifiesto(ruta):
+    try:
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+
+def planificar(marca, config=None, hasta=None, forzar=(), formato="csv", raiz=RUTA_PIPELINE):
+    """
+    Calcula qué etapas de una marca están al día y cuáles hay que ejecutar, sin ejecutar nada.
+
+    Retorna:
+    --------
+    list[tuple[str, str]]
+        `[(etapa, "al día" | "pendiente" | "bloqueada"), ...]`. Una etapa está bloqueada si depende de una pendiente
+        (su huella no se conoce hasta que se ejecuta la anterior).
+    """
+    config = config or MARCAS[marca]
+    forzar = set(forzar)
+    entradas, plan, pendiente = {}, [], False
+    for etapa in ETAPAS[:NOMBRES_ETAPAS.index(hasta) + 1 if hasta else None]:
+        salida, manifiesto = _rutas(marca, etapa.nombre, formato, raiz)
+        if pendiente:
+            plan.append((etapa.nombre, "bloqueada"))
+        elif (etapa.nombre in forzar or not os.path.exists(salida)
+              or _leer_manifiesto(manifiesto).get("huella") != etapa.huella(config, entradas, formato)):
+            plan.append((etapa.nombre, "pendiente"))
+            pendiente = True
+        else:
+            plan.append((etapa.nombre, "al día"))
+        entradas[etapa.nombre] = salida
+    return plan
+
+def ejecutar_marca(marca, config=None, hasta=None, forzar=(), formato="csv", raiz=RUTA_PIPELINE, contexto=None, estado=None):
+    """
+    Ejecuta las etapas de una marca, saltando las que están al día.
+
+    Parámetros:
+    -----------
+    marca : str
+        Nombre corto de la marca (clave de `MARCAS`).
+
+    config : dict, opcional
+        Configuración de la marca (`nombre`, `usuario` y, opcionalmente, `top_k`). Por defecto, la de `MARCAS`.
+
+    hasta : str, opcional
+        Última etapa que se ejecuta (por defecto, todas).
+
+    forzar : iterable[str], opcional
+        Etapas que se ejecutan aunque estén al día.
+
+    formato : str, opcional (por defecto "csv")
+        Formato de las salidas ("csv" o "parquet").
+
+    raiz : str, opcional
+        Carpeta de las salidas (por defecto `RUTA_PIPELINE`).
+
+    Retorna:
+    --------
+    dict
+        `{etapa: "al día" | "ejecutada (N s)"}`.
+
+    Notas:
+    ------
+    - La huella de cada etapa incluye el hash del contenido de las salidas anteriores: si una etapa se repite
+      pero su salida no cambia, las siguientes siguen al día.
+    - La salida y el manifiesto se escriben al terminar la etapa; si se interrumpe, la etapa se repite en la siguiente ejecución
+      (`artistas` se reanuda desde su guardado temporal).
+    """
+    config = config or MARCAS[marca]
+    contexto = contexto or _Contexto()
+    estado = estado if estado is not None else {}
+    forzar = set(forzar)
+    entradas, resultado = {}, {}
+    for etapa in ETAPAS[:NOMBRES_ETAPAS.index(hasta) + 1 if hasta else None]:
+        salida, manifiesto = _rutas(marca, etapa.nombre, formato, raiz)
+        huella = etapa.huella(config, entradas, formato)
+        if etapa.nombre not in forzar and os.path.exists(salida) and _leer_manifiesto(manifiesto).get("huella") == huella:
+            resultado[etapa.nombre] = "al día"
+        else:
+            estado[marca] = etapa.nombre
+            os.makedirs(os.path.dirname(salida), exist_ok=True)
+            contexto.huella_actual = huella
+            inicio = perf_counter()
+            etapa.funcion(marca, config, entradas, salida, contexto)
+            with open(manifiesto, "w", encoding="utf-8") as archivo:
+                json.dump({"etapa": etapa.nombre, "huella": huella, "salida": os.path.basename(salida),
+                           "entradas": {nombre: os.path.basename(ruta) for nombre, ruta in entradas.items()}}, archivo, indent=2)
+            resultado[etapa.nombre] = f"ejecutada ({perf_counter() - inicio:.1f} s)"
+        entradas[etapa.nombre] = salida
+    estado[marca] = "terminada"
+    return resultado
+
+def ejecutar_pipeline(marcas=None, hasta=None, forzar=(), formato="csv", hilos=None, raiz=RUTA_PIPELINE, configuracion=None):
+    """
+    Ejecuta el pipeline de varias marcas en paralelo (cada marca es independiente de las demás).
+
+    Parámetros:
+    -----------
+    marcas : list[str], opcional
+        Marcas a procesar (por defecto, todas las de la configuración).
+
+    hasta, forzar, formato, raiz :
+        Ver `ejecutar_marca`.
+
+    hilos : int, opcional
+        Marcas que se procesan a la vez (por defecto, todas). Todas comparten el `limitador`, el token,
+        la caché y el almacén de metadatos de `soporte_spotify`.
+
+    configuracion : dict, opcional
+        Configuración de las marcas con el formato de `MARCAS` (por defecto, `MARCAS`).
+
+    Retorna:
+    --------
+    dict
+        `{marca: {etapa: resultado}}`; si una marca falla, su valor es la excepción y el resto continúa.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    resultados = ejecutar_pipeline(["zara", "nike"], hasta="resumen")
+    """
+    configuracion = configuracion or MARCAS
+    marcas = list(marcas or configuracion)
+    contexto = _Contexto()
+    estado = {marca: "pendiente" for marca in marcas}
+    resultados = {}
+    lock = threading.Lock()
+
+    def procesar(marca):
+        # Cada hilo usa su propio contexto para la huella en curso, pero comparte el cliente de spotipy
+        contexto_marca = _Contexto()
+        contexto_marca.sp = contexto.sp
+        try:
+            resultado = ejecutar_marca(marca, configuracion[marca], hasta, forzar, formato, raiz, contexto_marca, estado)
+        except Exception as e:
+            estado[marca] = f"error en {estado[marca]}: {e}"
+            resultado = e
+        with lock:
+            resultados[marca] = resultado
+
+    with ThreadPoolExecutor(max_workers=hilos or len(marcas) or 1) as pool:
+        list(pool.map(procesar, marcas))
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline de marcas con caché por etapas.")
+    parser.add_argument("--marcas", nargs="+", default=None, help="Marcas a procesar (por defecto, todas)")
+    parser.add_argument("--config", default=None, help="JSON con la configuración de las marcas (formato de MARCAS)")
+    parser.add_argument("--hasta", choices=NOMBRES_ETAPAS, default=None, help="Última etapa que se ejecuta")
+    parser.add_argument("--forzar", nargs="+", choices=NOMBRES_ETAPAS, default=[], help="Etapas que se repiten aunque estén al día")
+    parser.add_argument("--formato", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--hilos", type=int, default=None, help="Marcas que se procesan a la vez")
+    parser.add_argument("--raiz", default=RUTA_PIPELINE, help="Carpeta de las salidas")
+    parser.add_argument("--estado", action="store_true", help="Mostrar qué etapas se ejecutarían, sin ejecutar nada")
+    args = parser.parse_args()
+
+    configuracion = MARCAS
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as archivo:
+            configuracion = json.load(archivo)
+    marcas = args.marcas or list(configuracion)
+
+    if args.estado:
+        for marca in marcas:
+            plan = planificar(marca, configuracion[marca], args.hasta, args.forzar, args.formato, args.raiz)
+            print(f"{marca}: " + " → ".join(f"{etapa} ({situacion})" for etapa, situacion in plan))
+        return
+
+    resultados = ejecutar_pipeline(marcas, args.hasta, args.forzar, args.formato, args.hilos, args.raiz, configuracion)
+    for marca, resultado in resultados.items():
+        if isinstance(resultado, Exception):
+            print(f"{marca}: error ({resultado})")
+        else:
+            print(f"{marca}: " + ", ".join(f"{etapa} {situacion}" for etapa, situacion in resultado.items()))
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,15 @@
 from bs4 import BeautifulSoup  
 # Para realizar solicitudes HTTP a páginas web.
 import requests  
+# Para lanzar muchas peticiones concurrentes con concurrencia acotada.
+import asyncio  
+# Pool de conexiones y reintentos de bajo nivel para la sesión compartida de `requests`.
+from requests.adapters import HTTPAdapter  
+from urllib3.util.retry import Retry  
+# Para extraer el host de una URL (estadísticas por host) y normalizar URLs (caché).
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode  
+# Para construir respuestas de `requests` a partir de la caché.
+from requests.structures import CaseInsensitiveDict  
 # Barra de progreso para seguir el avance de iteraciones o procesos largos.
 from tqdm import tqdm  
 
@@ -23,12 +32,42 @@ import numpy as np
 import base64  
 # `sleep` para pausar la ejecución y `time` para medir tiempos.
 from time import sleep, time  
+# Para generar identificadores cortos a partir de las credenciales.
+import hashlib  
+# Para guardar y leer el token cacheado en disco.
+import json  
+# Base de datos local para la caché de respuestas de Spotify.
+import sqlite3  
+# Expresiones regulares para clasificar endpoints.
+import re  
+
+#######################################################################################
+##            Concurrencia y estado compartido entre procesos                      ##
+#######################################################################################
+# Para proteger el estado compartido (token, sesión, ...) entre hilos.
+import threading  
+# Pool de hilos para resolver perfiles de usuario en paralelo.
+from concurrent.futures import ThreadPoolExecutor, as_completed  
+# Para ubicar los archivos compartidos entre procesos en la carpeta temporal del sistema.
+import tempfile  
+# Para definir bloqueos como gestores de contexto (`with`).
+from contextlib import contextmanager  
+# Bloqueo de archivos entre procesos. Solo existe en sistemas POSIX; en Windows el bloqueo es solo entre hilos.
+try:
+    import fcntl  
+except ImportError:
+    fcntl = None
 
 #######################################################################################
 ##            Automatización de navegadores web con Selenium                      ##
 #######################################################################################
 # Para controlar navegadores web de forma automatizada.
 from selenium import webdriver  
+# Esperas explícitas: esperar a que un elemento aparezca en lugar de dormir un tiempo fijo.
+from selenium.webdriver.common.by import By  
+from selenium.webdriver.support.ui import WebDriverWait  
+from selenium.webdriver.support import expected_conditions as EC  
+from selenium.common.exceptions import TimeoutException  
 
 #######################################################################################
 ##            Integración con Spotify                                            ##
@@ -49,12 +88,26 @@ import sys
 # Agrega el directorio padre ("../") al sistema de rutas de búsqueda de módulos, permitiendo importar módulos desde ahí.
 sys.path.append("../")  
 
+# Extractor de IDs de seguidores (funciona también sobre snapshots HTML guardados).
+import src.soporte_html as soporte_html  
+# Ranking aproximado con memoria acotada (Space-Saving) para los géneros.
+import src.soporte_topk as topk  
+
 # Carga las variables de entorno definidas en un archivo `.env` para configuraciones sensibles como credenciales.
 from dotenv import load_dotenv  
 
 # Especifica la ubicación del archivo `.env` que contiene las variables de entorno.
 load_dotenv(dotenv_path="../")  
 
+# Ruta absoluta de la carpeta de datos de Spotify, independiente del directorio desde el que se ejecute
+base_path = os.path.dirname(os.path.abspath(__file__))
+RUTA_DATOS_SPOTIFY = os.path.join(base_path, "..", "datos", "01 Spotify", "00 TempSaves")
+
+# URLs de la Web API y del endpoint de tokens. Se pueden sustituir por las de un servidor local
+# (`soporte_mock_spotify`) con las variables de entorno `SPOTIFY_API_URL` y `SPOTIFY_AUTH_URL`.
+API_URL = os.getenv("SPOTIFY_API_URL", "https://api.spotify.com/v1").rstrip("/")
+AUTH_URL = os.getenv("SPOTIFY_AUTH_URL", "https://accounts.spotify.com/api/token")
+
 #######################################################################################
 ##            Fin de los Imports                                                   ##
 #######################################################################################
@@ -172,6 +225,20 @@ def request_token(silent=False):
     token = request_token()
     print(f"Token de acceso: {token}")
     """
+    access_token, _ = _solicitar_token()
+    if not silent:
+        print("Token obtenido con éxito")
+    return access_token
+
+def _solicitar_token():
+    """
+    Realiza la petición Client Credentials a Spotify y devuelve el token junto a su duración.
+
+    Retorna:
+    --------
+    tuple[str, int]
+        Token de acceso y segundos de validez (`expires_in`, normalmente 3600).
+    """
     # 1. Credenciales de la aplicación
     CLIENT_ID = os.getenv("client_ID")
     CLIENT_SECRET = os.getenv("client_Secret")
@@ -179,10 +246,7 @@ def request_token(silent=False):
     if not CLIENT_ID or not CLIENT_SECRET:
         raise Exception("CLIENT_ID o CLIENT_SECRET no configurados. Asegúrate de configurar las variables de entorno correctamente.")
 
-    # 2. URL para obtener el token
-    AUTH_URL = "https://accounts.spotify.com/api/token"
-
-    # 3. Solicitar el token de acceso
+    # 2. Solicitar el token de acceso
     auth_data = {
         "grant_type": "client_credentials"
     }
@@ -190,18 +254,959 @@ def request_token(silent=False):
         "Authorization": f"Basic {base64.b64encode(f'{CLIENT_ID}:{CLIENT_SECRET}'.encode()).decode()}"
     }
 
-    response = requests.post(AUTH_URL, data=auth_data, headers=auth_headers)
+    response = peticion_spotify("POST", AUTH_URL, data=auth_data, headers=auth_headers)
 
     if response.status_code == 200:
-        access_token = response.json()["access_token"]
-        if not silent:
-            print("Token obtenido con éxito")
-        return access_token
+        datos = response.json()
+        return datos["access_token"], int(datos.get("expires_in", 3600))
     else:
         error_message = response.json().get("error_description", "Error desconocido")
         raise Exception(f"Error al obtener el token: {response.status_code} - {error_message}")
 
-def obtener_html_followers(user):
+@contextmanager
+def _bloqueo_archivo(ruta):
+    """
+    Bloqueo exclusivo entre procesos basado en un archivo (`fcntl.flock`).
+
+    En sistemas sin `fcntl` (Windows) no bloquea nada: el estado sigue protegido entre hilos
+    por los `threading.Lock` de cada objeto, pero no entre procesos.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(ruta, "a") as archivo:
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+
+class GestorToken:
+    """
+    Gestiona un único token Client Credentials compartido por todo el proceso (y entre procesos).
+
+    El token se reutiliza mientras sea válido, se renueva en segundo plano antes de que caduque
+    y se guarda en un archivo de la carpeta temporal para que otros procesos (otros notebooks,
+    workers en paralelo) lo aprovechen en lugar de pedir uno propio.
+
+    Parámetros:
+    -----------
+    margen : int, opcional (por defecto 60)
+        Segundos antes de la caducidad a partir de los cuales el token deja de considerarse válido.
+
+    antelacion : int, opcional (por defecto 300)
+        Segundos antes de la caducidad en los que se lanza la renovación en segundo plano.
+
+    refresco_automatico : bool, opcional (por defecto True)
+        Si es `True`, programa un hilo (daemon) que renueva el token antes de que caduque.
+
+    Notas:
+    ------
+    - El archivo compartido se nombra con un hash del `client_ID`, de modo que credenciales
+      distintas no comparten token.
+    - Ante un `401`, usa `renovar(token_rechazado)`: si otro hilo ya lo renovó, devuelve el nuevo
+      sin volver a pedirlo.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    token = gestor_token.obtener()
+    ```
+    """
+
+    def __init__(self, margen=60, antelacion=300, refresco_automatico=True):
+        self.margen = margen
+        self.antelacion = antelacion
+        self.refresco_automatico = refresco_automatico
+        self._token = None
+        self._expira = 0
+        self._lock = threading.Lock()
+        self._temporizador = None
+
+    def _ruta_cache(self):
+        # El token depende de la aplicación y del servidor que lo emite (la API real o un servidor local)
+        huella = hashlib.sha1(f"{os.getenv('client_ID')}|{AUTH_URL}".encode()).hexdigest()[:10]
+        return os.path.join(tempfile.gettempdir(), f"brandvibes_spotify_token_{huella}.json")
+
+    def _vigente(self, margen=None):
+        margen = self.margen if margen is None else margen
+        return self._token is not None and time() < self._expira - margen
+
+    def _leer_cache(self):
+        # Adoptar el token de otro proceso si caduca más tarde que el nuestro
+        try:
+            with open(self._ruta_cache(), "r") as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError):
+            return
+        if datos.get("expires_at", 0) > self._expira:
+            self._token = datos["access_token"]
+            self._expira = datos["expires_at"]
+
+    def _escribir_cache(self):
+        ruta = self._ruta_cache()
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        # El token es una credencial: solo legible por el usuario actual
+        descriptor = os.open(temporal, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as archivo:
+            json.dump({"access_token": self._token, "expires_at": self._expira}, archivo)
+        os.replace(temporal, ruta)
+
+    def _pedir_token(self):
+        token, expires_in = _solicitar_token()
+        self._token = token
+        self._expira = time() + expires_in
+        self._escribir_cache()
+
+    def _renovar(self, margen):
+        # Debe llamarse con `self._lock` adquirido
+        with _bloqueo_archivo(self._ruta_cache() + ".lock"):
+            self._leer_cache()
+            if not self._vigente(margen):
+                self._pedir_token()
+        self._programar_refresco()
+
+    def _programar_refresco(self):
+        if not self.refresco_automatico:
+            return
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+        espera = max(1, self._expira - self.antelacion - time())
+        self._temporizador = threading.Timer(espera, self._refrescar_en_segundo_plano)
+        self._temporizador.daemon = True
+        self._temporizador.start()
+
+    def _refrescar_en_segundo_plano(self):
+        try:
+            with self._lock:
+                self._renovar(self.antelacion)
+        except Exception as e:
+            # Si falla, el siguiente `obtener()` lo volverá a intentar
+            print(f"No se ha podido renovar el token en segundo plano: {e}")
+
+    def obtener(self):
+        """
+        Devuelve un token válido, pidiéndolo a Spotify solo si no hay ninguno vigente.
+        """
+        with self._lock:
+            if not self._vigente():
+                self._renovar(self.margen)
+            return self._token
+
+    def renovar(self, token_rechazado=None):
+        """
+        Fuerza la renovación tras un `401`. Si el token vigente ya es distinto de `token_rechazado`
+        (otro hilo lo renovó), lo devuelve sin hacer otra petición.
+        """
+        with self._lock:
+            if token_rechazado is None or self._token == token_rechazado:
+                with _bloqueo_archivo(self._ruta_cache() + ".lock"):
+                    # Otro proceso puede haberlo renovado ya: se comprueba el archivo compartido
+                    self._token = None
+                    self._expira = 0
+                    self._leer_cache()
+                    if self._token == token_rechazado or not self._vigente():
+                        self._pedir_token()
+                self._programar_refresco()
+            return self._token
+
+# Gestor compartido por todas las funciones del módulo
+gestor_token = GestorToken()
+
+def obtener_token():
+    """
+    Devuelve el token Client Credentials compartido, reutilizándolo mientras sea válido.
+
+    A diferencia de `request_token()`, no hace una petición a Spotify en cada llamada:
+    el token se cachea (en memoria y en disco) y se renueva automáticamente antes de caducar,
+    por lo que puede llamarse libremente dentro de bucles.
+
+    Retorna:
+    --------
+    str
+        Token de acceso válido.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    token = obtener_token()
+    artistas = obtener_artistas(token, ["playlist_id_1"])
+    """
+    return gestor_token.obtener()
+
+#######################################################################################
+##            Limitador de tasa compartido (token bucket adaptativo)              ##
+#######################################################################################
+class LimitadorTasa:
+    """
+    Limitador de peticiones tipo *token bucket* compartido por todos los hilos y procesos
+    que usan las mismas credenciales de Spotify.
+
+    Cada petición consume un permiso del cubo, que se rellena a `tasa` permisos por segundo
+    hasta `capacidad`. La tasa se adapta al estilo AIMD:
+    - Cada respuesta correcta la sube de forma aditiva (unos `incremento` permisos/s por cada segundo a plena tasa).
+    - Cada `429` la reduce de forma multiplicativa (`factor`) y pausa a todos los clientes durante el `Retry-After`.
+
+    Parámetros:
+    -----------
+    tasa_inicial : float, opcional (por defecto 3)
+        Peticiones por segundo con las que se empieza (unas 100 cada 30 segundos).
+
+    tasa_minima : float, opcional (por defecto 0.5)
+        Tasa por debajo de la cual nunca se baja tras un `429`.
+
+    tasa_maxima : float, opcional (por defecto 20)
+        Tasa máxima a la que se puede llegar sondeando.
+
+    capacidad : float, opcional (por defecto 10)
+        Tamaño del cubo: número de peticiones que se pueden hacer de golpe tras un periodo inactivo.
+
+    incremento : float, opcional (por defecto 0.1)
+        Subida aditiva de la tasa (peticiones/s) por cada segundo de peticiones correctas.
+
+    factor : float, opcional (por defecto 0.5)
+        Factor multiplicativo aplicado a la tasa ante un `429`.
+
+    Notas:
+    ------
+    - El estado (permisos, tasa y pausa) vive en un archivo de la carpeta temporal protegido con
+      `fcntl.flock`, de modo que dos notebooks o workers procesando marcas a la vez comparten el mismo presupuesto.
+    - Varios `429` seguidos (de peticiones que ya estaban en vuelo) solo reducen la tasa una vez.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    limitador.adquirir()
+    response = ...
+    limitador.registrar_respuesta(response.status_code, response.headers.get("Retry-After"))
+    """
+
+    def __init__(self, tasa_inicial=3, tasa_minima=0.5, tasa_maxima=20, capacidad=10, incremento=0.1, factor=0.5):
+        self.tasa_inicial = tasa_inicial
+        self.tasa_minima = tasa_minima
+        self.tasa_maxima = tasa_maxima
+        self.capacidad = capacidad
+        self.incremento = incremento
+        self.factor = factor
+        self._lock = threading.Lock()
+
+    def _ruta_estado(self):
+        huella = hashlib.sha1(f"{os.getenv('client_ID')}|{API_URL}".encode()).hexdigest()[:10]
+        return os.path.join(tempfile.gettempdir(), f"brandvibes_spotify_limitador_{huella}.json")
+
+    def _leer_estado(self, ahora):
+        try:
+            with open(self._ruta_estado(), "r") as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return {"permisos": self.capacidad, "ultimo": ahora, "tasa": self.tasa_inicial, "pausa_hasta": 0, "ultimo_recorte": 0}
+
+    def _escribir_estado(self, estado):
+        ruta = self._ruta_estado()
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "w") as archivo:
+            json.dump(estado, archivo)
+        os.replace(temporal, ruta)
+
+    def _modificar(self, funcion):
+        # Lee, modifica y guarda el estado de forma atómica entre hilos y procesos
+        with self._lock:
+            with _bloqueo_archivo(self._ruta_estado() + ".lock"):
+                ahora = time()
+                estado = self._leer_estado(ahora)
+                # Rellenar el cubo con los permisos generados desde la última vez
+                transcurrido = max(0, ahora - estado["ultimo"])
+                estado["permisos"] = min(self.capacidad, estado["permisos"] + transcurrido * estado["tasa"])
+                estado["ultimo"] = ahora
+                resultado = funcion(estado, ahora)
+                self._escribir_estado(estado)
+                return resultado
+
+    def adquirir(self):
+        """
+        Bloquea hasta que haya un permiso disponible (y no haya una pausa por `Retry-After` activa) y lo consume.
+
+        Retorna:
+        --------
+        float
+            Segundos que se ha esperado en total.
+        """
+        def intentar(estado, ahora):
+            if estado["pausa_hasta"] > ahora:
+                return estado["pausa_hasta"] - ahora
+            if estado["permisos"] >= 1:
+                estado["permisos"] -= 1
+                return 0
+            return (1 - estado["permisos"]) / estado["tasa"]
+
+        esperado = 0
+        while True:
+            espera = self._modificar(intentar)
+            if espera <= 0:
+                return esperado
+            sleep(espera)
+            esperado += espera
+
+    def registrar_respuesta(self, status_code, retry_after=None):
+        """
+        Adapta la tasa según el resultado de una petición: sube tras un éxito y baja (con pausa) tras un `429`.
+
+        Parámetros:
+        -----------
+        status_code : int
+            Código HTTP de la respuesta.
+
+        retry_after : str o int, opcional
+            Valor de la cabecera `Retry-After` de un `429` (segundos).
+        """
+        if status_code == 429:
+            segundos = int(retry_after) if retry_after is not None else 1
+            def recortar(estado, ahora):
+                estado["pausa_hasta"] = max(estado["pausa_hasta"], ahora + segundos)
+                estado["permisos"] = 0
+                # Solo un recorte por episodio: los 429 de peticiones que ya estaban en vuelo no vuelven a recortar
+                if ahora - estado["ultimo_recorte"] > segundos:
+                    estado["tasa"] = max(self.tasa_minima, estado["tasa"] * self.factor)
+                    estado["ultimo_recorte"] = ahora
+                    print(f"Rate limit alcanzado. Esperando {segundos} segundos y reduciendo la tasa a {estado['tasa']:.2f} peticiones/s...")
+            self._modificar(recortar)
+        elif status_code < 400:
+            def sondear(estado, ahora):
+                estado["tasa"] = min(self.tasa_maxima, estado["tasa"] + self.incremento / estado["tasa"])
+            self._modificar(sondear)
+
+    def estado(self):
+        """
+        Devuelve una copia del estado compartido actual (`permisos`, `tasa`, `pausa_hasta`, ...).
+        """
+        return self._modificar(lambda estado, ahora: dict(estado))
+
+    def reiniciar(self):
+        """
+        Borra el estado compartido: la siguiente petición empieza de nuevo con `tasa_inicial`.
+        """
+        with self._lock:
+            with _bloqueo_archivo(self._ruta_estado() + ".lock"):
+                try:
+                    os.remove(self._ruta_estado())
+                except OSError:
+                    pass
+
+# Limitador compartido por todas las peticiones a la API de Spotify
+limitador = LimitadorTasa()
+
+def configurar_limitador(**kwargs):
+    """
+    Sustituye el limitador compartido por uno nuevo con los parámetros indicados (ver `LimitadorTasa`).
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    configurar_limitador(tasa_inicial=5, tasa_maxima=30)
+    """
+    global limitador
+    limitador = LimitadorTasa(**kwargs)
+    limitador.reiniciar()
+    return limitador
+
+def llamada_spotipy(funcion, *args, **kwargs):
+    """
+    Ejecuta una llamada de Spotipy (`sp.user`, `sp.user_playlists`, `sp.next`, ...) bajo el limitador compartido.
+
+    Si Spotipy lanza un `429` (tras sus propios reintentos), se registra en el limitador
+    (que pausa a todos los clientes durante el `Retry-After`) y se reintenta la llamada.
+    El resto de excepciones se propagan.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    playlists = llamada_spotipy(sp.user_playlists, "usuario123")
+    """
+    while True:
+        limitador.adquirir()
+        try:
+            resultado = funcion(*args, **kwargs)
+        except spotipy.SpotifyException as e:
+            if e.http_status == 429:
+                limitador.registrar_respuesta(429, (e.headers or {}).get("Retry-After"))
+                continue
+            raise
+        limitador.registrar_respuesta(200)
+        return resultado
+
+#######################################################################################
+##            Caché persistente de respuestas (SQLite)                            ##
+#######################################################################################
+# Tiempo de vida (segundos) por endpoint. La primera expresión que encaje decide; 0 = no se cachea.
+TTL_ENDPOINTS = [
+    (r"/v1/me(/|$)", 0),                          # Datos privados del usuario: nunca
+    (r"/v1/playlists/[^/]+/tracks", 7 * 86400),   # Pistas de playlist (se validan además con snapshot_id)
+    (r"/v1/playlists/[^/]+$", 0),                 # Metadatos de playlist (se usan para comprobar snapshot_id)
+    (r"/v1/artists", 30 * 86400),                 # Artistas y sus géneros
+    (r"/v1/users/[^/]+/playlists", 86400),        # Playlists públicas de un usuario
+    (r"/v1/users/[^/]+$", 30 * 86400),            # Perfil público de un usuario
+    (r".*", 3600)                                 # Resto
+]
+# Las pistas de playlist solo se reutilizan durante su TTL si la petición indica el `snapshot_id` actual.
+# Sin él (por ejemplo, desde `obtener_artistas`) no hay forma de saber si la playlist ha cambiado: la entrada
+# se trata como caducada en cuanto pasa este TTL y se revalida con su `ETag` (si Spotify responde `304`, se reutiliza).
+PATRON_PISTAS_PLAYLIST = r"/v1/playlists/[^/]+/tracks"
+TTL_PISTAS_SIN_SNAPSHOT = 0
+
+class CacheRespuestas:
+    """
+    Caché en disco (SQLite) de las respuestas GET de la Web API de Spotify.
+
+    Permite relanzar los notebooks de extracción sin volver a descargar playlists y lotes de artistas
+    que no han cambiado: las respuestas se sirven desde disco en lugar de consumir cuota de la API.
+
+    Parámetros:
+    -----------
+    ruta : str, opcional
+        Archivo SQLite de la caché (por defecto `datos/01 Spotify/00 TempSaves/cache_spotify.sqlite`).
+
+    tamano_maximo : int, opcional (por defecto 500 MB)
+        Presupuesto de disco en bytes. Al superarlo se eliminan las entradas usadas hace más tiempo (LRU).
+
+    activa : bool, opcional (por defecto True)
+        Si es `False`, la caché no se consulta ni se escribe. También se desactiva con la variable de entorno `SPOTIFY_CACHE=0`.
+
+    Notas:
+    ------
+    - **Clave:** URL normalizada (host en minúsculas y parámetros ordenados).
+    - **Caducidad:** Cada endpoint tiene su TTL (`TTL_ENDPOINTS`). Una entrada caducada con `ETag` se revalida
+      con `If-None-Match`: si Spotify responde `304`, se reutiliza el cuerpo guardado.
+    - **snapshot_id:** Si la petición indica el `snapshot_id` actual de la playlist, la entrada es válida mientras
+      coincida (aunque haya pasado el TTL) y se descarta en cuanto cambie. Las pistas de playlist pedidas sin `snapshot_id`
+      se revalidan siempre con su `ETag` (`TTL_PISTAS_SIN_SNAPSHOT`).
+    - La base de datos usa modo WAL, por lo que varios procesos pueden leer y escribir a la vez.
+    """
+
+    def __init__(self, ruta=None, tamano_maximo=500 * 1024 * 1024, activa=True):
+        self.ruta = ruta or os.path.join(RUTA_DATOS_SPOTIFY, "cache_spotify.sqlite")
+        self.tamano_maximo = tamano_maximo
+        self.activa = activa and os.getenv("SPOTIFY_CACHE", "1") != "0"
+        self.aciertos = 0
+        self.fallos = 0
+        self.revalidaciones = 0
+        self._escrituras = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _conexion(self):
+        # Una conexión por hilo (sqlite3 no permite compartirlas entre hilos)
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            conexion = sqlite3.connect(self.ruta, timeout=30)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute("""CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                cuerpo BLOB NOT NULL,
+                etag TEXT,
+                snapshot_id TEXT,
+                creado REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL,
+                tamano INTEGER NOT NULL)""")
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_acceso ON respuestas(ultimo_acceso)")
+            conexion.commit()
+            self._local.conexion = conexion
+        return conexion
+
+    @staticmethod
+    def normalizar_url(url, params=None):
+        """
+        Devuelve la URL en forma canónica: esquema y host en minúsculas y parámetros de la query ordenados.
+        """
+        partes = urlparse(url)
+        query = parse_qsl(partes.query, keep_blank_values=True)
+        if params:
+            query += list(params.items()) if isinstance(params, dict) else list(params)
+        return urlunparse((partes.scheme.lower(), partes.netloc.lower(), partes.path, "", urlencode(sorted(query)), ""))
+
+    @staticmethod
+    def ttl(url):
+        """
+        Devuelve el tiempo de vida (segundos) que corresponde a la URL según `TTL_ENDPOINTS`.
+        """
+        ruta = urlparse(url).path
+        for patron, segundos in TTL_ENDPOINTS:
+            if re.search(patron, ruta):
+                return segundos
+        return 0
+
+    def obtener(self, clave, snapshot_id=None):
+        """
+        Busca una entrada. Devuelve `None` si no existe o un diccionario con `cuerpo`, `etag` y
+        `vigente` (`False` si ha caducado y solo sirve para revalidar con su `ETag`).
+        """
+        if not self.activa:
+            return None
+        fila = self._conexion().execute(
+            "SELECT cuerpo, etag, snapshot_id, creado FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+        if fila is None:
+            self.fallos += 1
+            return None
+        cuerpo, etag, snapshot_guardado, creado = fila
+        if snapshot_id is not None and snapshot_guardado is not None:
+            vigente = snapshot_id == snapshot_guardado
+            if not vigente:
+                # La playlist ha cambiado: el ETag de la versión anterior tampoco sirve
+                etag = None
+        elif snapshot_id is None and re.search(PATRON_PISTAS_PLAYLIST, urlparse(clave).path):
+            vigente = time() - creado < TTL_PISTAS_SIN_SNAPSHOT
+        else:
+            vigente = time() - creado < self.ttl(clave)
+        if vigente:
+            self.aciertos += 1
+            self.tocar(clave)
+        return {"cuerpo": cuerpo, "etag": etag, "vigente": vigente}
+
+    def tocar(self, clave, renovar=False):
+        """
+        Marca la entrada como usada ahora (para la política LRU). Con `renovar=True` reinicia también su TTL
+        (tras una revalidación `304`).
+        """
+        ahora = time()
+        conexion = self._conexion()
+        if renovar:
+            self.revalidaciones += 1
+            conexion.execute("UPDATE respuestas SET ultimo_acceso = ?, creado = ? WHERE clave = ?", (ahora, ahora, clave))
+        else:
+            conexion.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave))
+        conexion.commit()
+
+    def guardar(self, clave, cuerpo, etag=None, snapshot_id=None):
+        """
+        Guarda (o reemplaza) el cuerpo de una respuesta y, cada cierto número de escrituras, aplica el presupuesto de disco.
+        """
+        if not self.activa:
+            return
+        ahora = time()
+        conexion = self._conexion()
+        conexion.execute(
+            "INSERT OR REPLACE INTO respuestas (clave, cuerpo, etag, snapshot_id, creado, ultimo_acceso, tamano) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (clave, cuerpo, etag, snapshot_id, ahora, ahora, len(cuerpo) + len(clave)))
+        conexion.commit()
+        with self._lock:
+            self._escrituras += 1
+            comprobar = self._escrituras % 100 == 1
+        if comprobar:
+            self.expulsar()
+
+    def expulsar(self):
+        """
+        Elimina las entradas menos usadas recientemente hasta dejar la caché por debajo del 90% de `tamano_maximo`.
+        """
+        conexion = self._conexion()
+        total = conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+        if total <= self.tamano_maximo:
+            return
+        objetivo = total - int(self.tamano_maximo * 0.9)
+        liberado = 0
+        claves = []
+        for clave, tamano in conexion.execute("SELECT clave, tamano FROM respuestas ORDER BY ultimo_acceso"):
+            claves.append((clave,))
+            liberado += tamano
+            if liberado >= objetivo:
+                break
+        conexion.executemany("DELETE FROM respuestas WHERE clave = ?", claves)
+        conexion.commit()
+
+    def vaciar(self):
+        """
+        Borra todas las entradas de la caché.
+        """
+        conexion = self._conexion()
+        conexion.execute("DELETE FROM respuestas")
+        conexion.commit()
+
+    def estadisticas(self):
+        """
+        Devuelve un diccionario con el número de entradas, los bytes ocupados y los aciertos/fallos/revalidaciones de este proceso.
+        """
+        entradas, total = self._conexion().execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()
+        return {"entradas": entradas, "bytes": total, "aciertos": self.aciertos,
+                "fallos": self.fallos, "revalidaciones": self.revalidaciones}
+
+# Caché compartida por todas las peticiones GET del módulo
+cache_respuestas = CacheRespuestas()
+
+def configurar_cache(ruta=None, tamano_maximo=500 * 1024 * 1024, activa=True):
+    """
+    Sustituye la caché de respuestas compartida (ver `CacheRespuestas`). Con `activa=False` se desactiva por completo.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    configurar_cache(tamano_maximo=2 * 1024**3)   # 2 GB
+    configurar_cache(activa=False)                # Descargar todo de nuevo
+    """
+    global cache_respuestas
+    cache_respuestas = CacheRespuestas(ruta=ruta, tamano_maximo=tamano_maximo, activa=activa)
+    return cache_respuestas
+
+def _respuesta_desde_cache(url, cuerpo):
+    # Construye un `requests.Response` equivalente a un 200 a partir del cuerpo guardado
+    response = requests.Response()
+    response.status_code = 200
+    response._content = cuerpo
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers = CaseInsensitiveDict({"Content-Type": "application/json; charset=utf-8", "X-Cache": "HIT"})
+    return response
+
+#######################################################################################
+##            Almacén persistente de metadatos (artistas, playlists...)           ##
+#######################################################################################
+class AlmacenMetadatos:
+    """
+    Almacén en disco (SQLite) de metadatos de Spotify ya resueltos, compartido por el pipeline de marcas
+    y por el flujo de usuarios de la app.
+
+    A diferencia de `CacheRespuestas`, que guarda respuestas HTTP completas, aquí se guarda el dato ya procesado
+    y por identificador, de modo que un artista resuelto para una marca no vuelve a pedirse para ninguna otra
+    marca ni para ningún usuario, aunque aparezca en un lote de 50 IDs distinto.
+
+    Parámetros:
+    -----------
+    ruta : str, opcional
+        Archivo SQLite del almacén (por defecto `datos/01 Spotify/00 TempSaves/metadatos_spotify.sqlite`).
+
+    Tablas:
+    -------
+    - `artistas_generos(artist_id, generos, actualizado)`: géneros (lista JSON) de cada artista.
+    - `playlists(playlist_id, snapshot_id, artistas, actualizado)`: último `snapshot_id` visto de cada playlist
+      y los artistas (diccionario JSON `{artist_id: artist_name}`) extraídos de esa versión.
+    - `usuarios(user_id, display_name, encontrado, actualizado)`: nombre público de cada usuario resuelto
+      (`encontrado = 0` si Spotify respondió que no existe).
+    """
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or os.path.join(RUTA_DATOS_SPOTIFY, "metadatos_spotify.sqlite")
+        self._local = threading.local()
+
+    def _conexion(self):
+        # Una conexión por hilo (sqlite3 no permite compartirlas entre hilos)
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            conexion = sqlite3.connect(self.ruta, timeout=30)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute("""CREATE TABLE IF NOT EXISTS artistas_generos (
+                artist_id TEXT PRIMARY KEY,
+                generos TEXT NOT NULL,
+                actualizado REAL NOT NULL)""")
+            conexion.execute("""CREATE TABLE IF NOT EXISTS playlists (
+                playlist_id TEXT PRIMARY KEY,
+                snapshot_id TEXT NOT NULL,
+                artistas TEXT NOT NULL,
+                actualizado REAL NOT NULL)""")
+            conexion.execute("""CREATE TABLE IF NOT EXISTS usuarios (
+                user_id TEXT PRIMARY KEY,
+                display_name TEXT,
+                encontrado INTEGER NOT NULL,
+                actualizado REAL NOT NULL)""")
+            conexion.commit()
+            self._local.conexion = conexion
+        return conexion
+
+    def generos_artistas(self, ids_artistas):
+        """
+        Devuelve un diccionario `{artist_id: [géneros]}` con los artistas de `ids_artistas` que ya están en el almacén.
+        Los que no aparecen en el diccionario no se han resuelto nunca.
+        """
+        ids_artistas = list(ids_artistas)
+        conexion = self._conexion()
+        resultado = {}
+        # SQLite limita el número de parámetros por consulta: se consulta en bloques
+        for inicio in range(0, len(ids_artistas), 500):
+            bloque = ids_artistas[inicio:inicio + 500]
+            marcadores = ",".join("?" * len(bloque))
+            for artist_id, generos in conexion.execute(
+                    f"SELECT artist_id, generos FROM artistas_generos WHERE artist_id IN ({marcadores})", bloque):
+                resultado[artist_id] = json.loads(generos)
+        return resultado
+
+    def guardar_generos_artistas(self, generos_por_artista):
+        """
+        Guarda (o actualiza) los géneros de varios artistas a partir de un diccionario `{artist_id: [géneros]}`.
+        """
+        ahora = time()
+        conexion = self._conexion()
+        conexion.executemany(
+            "INSERT OR REPLACE INTO artistas_generos (artist_id, generos, actualizado) VALUES (?, ?, ?)",
+            [(artist_id, json.dumps(generos), ahora) for artist_id, generos in generos_por_artista.items()])
+        conexion.commit()
+
+    def playlist(self, playlist_id):
+        """
+        Devuelve `(snapshot_id, {artist_id: artist_name})` de la última versión guardada de la playlist, o `None` si no se ha rastreado nunca.
+        """
+        fila = self._conexion().execute(
+            "SELECT snapshot_id, artistas FROM playlists WHERE playlist_id = ?", (playlist_id,)).fetchone()
+        if fila is None:
+            return None
+        return fila[0], json.loads(fila[1])
+
+    def guardar_playlist(self, playlist_id, snapshot_id, artistas):
+        """
+        Guarda (o actualiza) el `snapshot_id` de una playlist y los artistas extraídos de esa versión.
+        """
+        conexion = self._conexion()
+        conexion.execute(
+            "INSERT OR REPLACE INTO playlists (playlist_id, snapshot_id, artistas, actualizado) VALUES (?, ?, ?, ?)",
+            (playlist_id, snapshot_id, json.dumps(artistas), time()))
+        conexion.commit()
+
+    def usuarios(self, ids_usuarios):
+        """
+        Devuelve un diccionario `{user_id: (display_name, encontrado)}` con los usuarios de `ids_usuarios` ya resueltos.
+        """
+        ids_usuarios = list(ids_usuarios)
+        conexion = self._conexion()
+        resultado = {}
+        for inicio in range(0, len(ids_usuarios), 500):
+            bloque = ids_usuarios[inicio:inicio + 500]
+            marcadores = ",".join("?" * len(bloque))
+            for user_id, display_name, encontrado in conexion.execute(
+                    f"SELECT user_id, display_name, encontrado FROM usuarios WHERE user_id IN ({marcadores})", bloque):
+                resultado[user_id] = (display_name, bool(encontrado))
+        return resultado
+
+    def guardar_usuarios(self, usuarios):
+        """
+        Guarda (o actualiza) varios usuarios a partir de un diccionario `{user_id: (display_name, encontrado)}`.
+        """
+        ahora = time()
+        conexion = self._conexion()
+        conexion.executemany(
+            "INSERT OR REPLACE INTO usuarios (user_id, display_name, encontrado, actualizado) VALUES (?, ?, ?, ?)",
+            [(user_id, display_name, int(encontrado), ahora) for user_id, (display_name, encontrado) in usuarios.items()])
+        conexion.commit()
+
+# Almacén compartido por todas las funciones del módulo
+almacen_metadatos = AlmacenMetadatos()
+
+#######################################################################################
+##            Sesión HTTP compartida (pool de conexiones keep-alive)              ##
+#######################################################################################
+# Configuración de la sesión compartida. Se modifica con `configurar_sesion()`.
+_config_sesion = {
+    "pool_size": 20,      # Conexiones keep-alive máximas por host
+    "timeout": (5, 30),   # (conexión, lectura) en segundos
+    "reintentos": 3       # Reintentos ante errores de red y 5xx
+}
+_sesion = None
+_sesion_lock = threading.Lock()
+# Estadísticas por host: peticiones, errores y tiempo acumulado
+_estadisticas_hosts = {}
+_estadisticas_lock = threading.Lock()
+
+def configurar_sesion(pool_size=20, timeout=(5, 30), reintentos=3):
+    """
+    Configura la sesión HTTP compartida que usan todas las peticiones directas a Spotify.
+
+    Parámetros:
+    -----------
+    pool_size : int, opcional (por defecto 20)
+        Número máximo de conexiones keep-alive que se mantienen abiertas por host.
+        Debe ser al menos igual al número de peticiones concurrentes que se lancen.
+
+    timeout : float o tuple, opcional (por defecto (5, 30))
+        Timeout de `requests`: `(conexión, lectura)` en segundos.
+
+    reintentos : int, opcional (por defecto 3)
+        Reintentos automáticos ante errores de conexión y respuestas 500/502/503/504.
+        Los `429` no se reintentan aquí: los gestiona cada función según `Retry-After`.
+
+    Notas:
+    ------
+    - Cierra la sesión anterior (si existía) y reinicia las estadísticas por host.
+    """
+    global _sesion
+    with _sesion_lock:
+        _config_sesion.update({"pool_size": pool_size, "timeout": timeout, "reintentos": reintentos})
+        if _sesion is not None:
+            _sesion.close()
+            _sesion = None
+    with _estadisticas_lock:
+        _estadisticas_hosts.clear()
+
+def obtener_sesion():
+    """
+    Devuelve la sesión `requests.Session` compartida, creándola la primera vez.
+
+    La sesión reutiliza las conexiones TCP/TLS (keep-alive) entre peticiones, pide las
+    respuestas comprimidas con gzip y aplica reintentos ante errores transitorios.
+
+    Retorna:
+    --------
+    requests.Session
+        Sesión compartida y segura para usar desde varios hilos para peticiones GET/POST.
+    """
+    global _sesion
+    with _sesion_lock:
+        if _sesion is None:
+            reintentos = Retry(
+                total=_config_sesion["reintentos"],
+                backoff_factor=0.5,
+                status_forcelist=[500, 502, 503, 504],
+                allowed_methods=["GET", "POST"],
+                respect_retry_after_header=False,
+                raise_on_status=False
+            )
+            adaptador = HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=_config_sesion["pool_size"],
+                max_retries=reintentos
+            )
+            sesion = requests.Session()
+            sesion.mount("https://", adaptador)
+            sesion.mount("http://", adaptador)
+            sesion.headers.update({
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate"
+            })
+            _sesion = sesion
+        return _sesion
+
+def peticion_spotify(metodo, url, token=None, usar_cache=True, snapshot_id=None, **kwargs):
+    """
+    Realiza una petición HTTP a Spotify a través de la sesión compartida.
+
+    Parámetros:
+    -----------
+    metodo : str
+        Método HTTP (`"GET"`, `"POST"`, ...).
+
+    url : str
+        URL completa de la petición.
+
+    token : str, opcional
+        Token de acceso. Si se indica, se añade la cabecera `Authorization: Bearer <token>`.
+
+    usar_cache : bool, opcional (por defecto True)
+        Si es `False`, la petición no consulta ni actualiza la caché de respuestas (`cache_respuestas`).
+
+    snapshot_id : str, opcional
+        `snapshot_id` actual de la playlist cuyas pistas se piden: la respuesta cacheada se reutiliza
+        mientras coincida y se descarta si ha cambiado.
+
+    **kwargs :
+        Argumentos adicionales para `requests.Session.request` (`params`, `data`, `headers`, ...).
+        Si no se indica `timeout`, se usa el configurado en `configurar_sesion()`.
+
+    Retorna:
+    --------
+    requests.Response
+        Respuesta de Spotify. No lanza excepción por códigos de error HTTP.
+
+    Notas:
+    ------
+    - Las peticiones a la Web API pasan por el `limitador` compartido: esperan a tener permiso
+      antes de enviarse y le comunican el resultado (los `429` pausan a todos los clientes durante el `Retry-After`).
+    - Las peticiones GET a endpoints cacheables se sirven desde `cache_respuestas` si hay una entrada vigente
+      (sin consumir cuota ni permiso del limitador); las caducadas con `ETag` se revalidan con `If-None-Match`.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    response = peticion_spotify("GET", f"{API_URL}/artists?ids=...", token=obtener_token())
+    """
+    sesion = obtener_sesion()
+    headers = dict(kwargs.pop("headers", None) or {})
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    kwargs.setdefault("timeout", _config_sesion["timeout"])
+
+    # Consultar la caché de respuestas (solo GET a endpoints con TTL)
+    clave = None
+    entrada = None
+    if metodo.upper() == "GET" and usar_cache and cache_respuestas.activa and CacheRespuestas.ttl(url) > 0:
+        clave = CacheRespuestas.normalizar_url(url, kwargs.get("params"))
+        entrada = cache_respuestas.obtener(clave, snapshot_id)
+        if entrada is not None and entrada["vigente"]:
+            return _respuesta_desde_cache(url, entrada["cuerpo"])
+        if entrada is not None and entrada["etag"]:
+            headers["If-None-Match"] = entrada["etag"]
+
+    host = urlparse(url).netloc
+    # El endpoint de tokens tiene su propio límite: solo se limitan las peticiones a la Web API
+    limitar = "/api/token" not in url
+    if limitar:
+        limitador.adquirir()
+    inicio = time()
+    try:
+        response = sesion.request(metodo, url, headers=headers, **kwargs)
+    except requests.RequestException:
+        _registrar_peticion(host, time() - inicio, error=True)
+        raise
+    _registrar_peticion(host, time() - inicio, error=response.status_code >= 400)
+    if limitar:
+        limitador.registrar_respuesta(response.status_code, response.headers.get("Retry-After"))
+
+    # Actualizar la caché
+    if clave is not None:
+        if response.status_code == 304 and entrada is not None:
+            cache_respuestas.tocar(clave, renovar=True)
+            return _respuesta_desde_cache(url, entrada["cuerpo"])
+        if response.status_code == 200:
+            cache_respuestas.guardar(clave, response.content, response.headers.get("ETag"), snapshot_id)
+    return response
+
+def _registrar_peticion(host, duracion, error=False):
+    with _estadisticas_lock:
+        estadisticas = _estadisticas_hosts.setdefault(host, {"peticiones": 0, "errores": 0, "tiempo_total": 0.0})
+        estadisticas["peticiones"] += 1
+        estadisticas["errores"] += int(error)
+        estadisticas["tiempo_total"] += duracion
+
+def estadisticas_conexiones():
+    """
+    Devuelve las estadísticas de uso de la sesión compartida por host, para ajustar `pool_size`.
+
+    Retorna:
+    --------
+    pandas.DataFrame
+        Una fila por host con las columnas:
+        - 'host': Host de destino.
+        - 'peticiones': Peticiones realizadas.
+        - 'errores': Peticiones con excepción de red o código HTTP >= 400.
+        - 'tiempo_medio_ms': Latencia media por petición en milisegundos.
+        - 'conexiones_abiertas': Conexiones TCP/TLS creadas por el pool (handshakes).
+        - 'peticiones_por_conexion': Reutilización media de cada conexión (keep-alive).
+
+    Notas:
+    ------
+    - Si `conexiones_abiertas` se acerca a `peticiones`, el pool es demasiado pequeño para la
+      concurrencia usada y conviene aumentar `pool_size` en `configurar_sesion()`.
+    """
+    conexiones = {}
+    if _sesion is not None:
+        pools = _sesion.get_adapter("https://").poolmanager.pools
+        for clave in pools.keys():
+            pool = pools.get(clave)
+            if pool is not None:
+                conexiones[pool.host] = conexiones.get(pool.host, 0) + pool.num_connections
+
+    with _estadisticas_lock:
+        filas = []
+        for host, estadisticas in _estadisticas_hosts.items():
+            abiertas = conexiones.get(host.split(":")[0], 0)
+            filas.append({
+                "host": host,
+                "peticiones": estadisticas["peticiones"],
+                "errores": estadisticas["errores"],
+                "tiempo_medio_ms": round(1000 * estadisticas["tiempo_total"] / estadisticas["peticiones"], 2),
+                "conexiones_abiertas": abiertas,
+                "peticiones_por_conexion": round(estadisticas["peticiones"] / abiertas, 2) if abiertas else None
+            })
+    return pd.DataFrame(filas, columns=["host", "peticiones", "errores", "tiempo_medio_ms", "conexiones_abiertas", "peticiones_por_conexion"])
+
+def obtener_html_followers(user, ruta_snapshot=None, espera_maxima=20):
     """
     Obtiene el contenido HTML de la página de seguidores de un usuario de Spotify utilizando Selenium y BeautifulSoup.
 
@@ -210,6 +1215,13 @@ def obtener_html_followers(user):
     user : str
         Identificador del usuario de Spotify cuya página de seguidores se desea analizar.
 
+    ruta_snapshot : str, opcional
+        Si se indica, guarda el HTML de la página en esta ruta para poder volver a extraer los seguidores
+        sin navegador (ver `soporte_html.extraer_ids_snapshots`).
+
+    espera_maxima : int, opcional (por defecto 20)
+        Segundos máximos de espera a que aparezcan el botón de cookies y las tarjetas de seguidores.
+
     Retorna:
     --------
     soup : BeautifulSoup
@@ -223,51 +1235,63 @@ def obtener_html_followers(user):
 
     2. **Interacción con la página:**
     - Maximiza la ventana del navegador para asegurarse de que los elementos sean visibles.
-    - Acepta las cookies utilizando el selector CSS del botón de aceptación.
+    - Espera a que el botón de cookies se pueda pulsar (`WebDriverWait`) y las acepta.
 
     3. **Esperas:**
-    - Se utilizan `sleep()` para garantizar que los elementos de la página se carguen antes de interactuar con ellos.
+    - En lugar de `sleep()` fijos, espera a que aparezca la primera tarjeta de seguidor (atributo `aria-labelledby`).
+    Si no aparece en `espera_maxima` segundos (por ejemplo, una marca sin seguidores), continúa con lo que haya cargado.
 
     4. **Obtener el contenido HTML:**
     - Una vez que el JavaScript de la página ha terminado de cargar, se extrae el contenido con `driver.page_source`.
+    - Si se indica `ruta_snapshot`, se guarda en disco.
 
     5. **Analizar el contenido HTML con BeautifulSoup:**
-    - Convierte el contenido extraído en un objeto `BeautifulSoup` para facilitar su análisis.
+    - Convierte el contenido extraído en un objeto `BeautifulSoup` con el parser más rápido disponible (`lxml`).
 
     6. **Cerrar el navegador:**
-    - Finaliza la sesión de Selenium cerrando el navegador con `driver.quit()`.
+    - Finaliza la sesión de Selenium cerrando el navegador con `driver.quit()`, también si ocurre un error.
 
     Notas:
     ------
     - **Cookies:** La función incluye una interacción específica para aceptar las cookies en la página de Spotify.
-    - **Espera dinámica:** Sería mejor utilizar esperas explícitas con Selenium (`WebDriverWait`) en lugar de `sleep()` para mejorar la fiabilidad.
+    Si el banner no aparece (por ejemplo, ya aceptadas), se continúa sin error.
     - **Revisar el selector:** Asegúrate de que el selector CSS para aceptar cookies (`#onetrust-accept-btn-handler`) sigue siendo válido, ya que puede cambiar con el tiempo.
 
     Ejemplo de uso:
     ---------------
     ```python
-    html_soup = obtener_html_followers("usuario123")
+    html_soup = obtener_html_followers("usuario123", ruta_snapshot="../datos/01 Spotify/00 Snapshots/usuario123.html")
     print(html_soup.prettify())
     """
     # Iniciar el driver
     driver = webdriver.Chrome()
     url = f"https://open.spotify.com/user/{user}/followers"
-    # Navegar a la página
-    driver.get(url)
-    sleep(2)
-    #Maximizar ventana
-    driver.maximize_window() 
-    sleep(2)
-    # Aceptar cookies	
-    driver.find_element("css selector", "#onetrust-accept-btn-handler").click()
-    # Esperar a que la página cargue
-    sleep(2) 
-    # Obtener el contenido completo después de cargar el JavaScript
-    page_content = driver.page_source
-            
+    try:
+        # Navegar a la página
+        driver.get(url)
+        #Maximizar ventana
+        driver.maximize_window() 
+        espera = WebDriverWait(driver, espera_maxima)
+        # Aceptar cookies
+        try:
+            espera.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#onetrust-accept-btn-handler"))).click()
+        except TimeoutException:
+            print("No ha aparecido el banner de cookies")
+        # Esperar a que carguen las tarjetas de seguidores
+        try:
+            espera.until(EC.presence_of_element_located((By.CSS_SELECTOR, '[aria-labelledby^="card-title-spotify:user:"]')))
+        except TimeoutException:
+            print(f"No se han encontrado seguidores de {user} en {espera_maxima} segundos")
+        # Obtener el contenido completo después de cargar el JavaScript
+        page_content = driver.page_source
+    finally:
+        driver.quit()
+
+    if ruta_snapshot:
+        soporte_html.guardar_snapshot(page_content, ruta_snapshot)
+
     # Usar BeautifulSoup para analizar el HTML
-    soup = BeautifulSoup(page_content, "html.parser")
-    driver.quit()
+    soup = BeautifulSoup(page_content, soporte_html.PARSER)
     return soup
 
 def extraer_ids_usuario(sp,marca, html):
@@ -282,8 +1306,8 @@ def extraer_ids_usuario(sp,marca, html):
     marca : str
         Nombre de la marca asociada a los seguidores extraídos.
 
-    html : BeautifulSoup
-        Objeto BeautifulSoup que contiene el HTML de la página de seguidores de la marca.
+    html : BeautifulSoup o str
+        Objeto BeautifulSoup (o el HTML en texto, por ejemplo un snapshot guardado) de la página de seguidores de la marca.
 
     Retorna:
     --------
@@ -295,26 +1319,25 @@ def extraer_ids_usuario(sp,marca, html):
 
     Proceso:
     --------
-    1. **Extraer bloques de seguidores del HTML:**
-    - Encuentra todos los bloques de usuarios utilizando el selector CSS específico para seguidores.
-
-    2. **Procesar y obtener IDs de seguidores:**
-    - Itera sobre los bloques de seguidores.
-    - Extrae y procesa el identificador único (`user_id`) de cada seguidor a partir de la estructura HTML.
+    1. **Extraer los IDs de seguidores del HTML:**
+    - Usa `soporte_html.extraer_ids_followers()`, que localiza las tarjetas de seguidores por su atributo
+    `aria-labelledby` (`card-title-spotify:user:<user_id>-<n>`) y extrae el `user_id` con una expresión regular.
 
-    3. **Obtener nombres de usuario mediante la API de Spotify:**
-    - Para cada `user_id`, se utiliza el método `sp.user(user)["display_name"]` para obtener el nombre de usuario.
-    - Si ocurre un error (por ejemplo, un usuario no está disponible), se muestra un mensaje indicando que no se pudo obtener el usuario.
+    2. **Obtener nombres de usuario mediante la API de Spotify:**
+    - Los IDs se pasan a `resolver_perfiles()`, que elimina duplicados, reutiliza los nombres ya guardados en
+    `almacen_metadatos` y pide el resto con `sp.user(user)` desde varios hilos.
+    - Los usuarios que no existen (`404`) o que no se han podido obtener tras los reintentos no aparecen en el resultado.
 
-    4. **Construir el DataFrame:**
+    3. **Construir el DataFrame:**
     - Crea un DataFrame con las columnas 'brand', 'username', y 'user_id' a partir de los datos recopilados.
 
     Notas:
     ------
-    - **Selección del HTML:** Asegúrate de que la clase CSS utilizada para encontrar los bloques de seguidores 
-    (`Box__BoxComponent-sc-y4nds-0 ... Card`) sigue siendo válida, ya que puede cambiar con el tiempo.
+    - **Selección del HTML:** Ya no depende de las clases CSS con hash de Spotify; si cambia el atributo
+    `aria-labelledby`, el extractor recurre a los enlaces `/user/<user_id>` de las tarjetas.
     - **Llamadas a la API de Spotify:** La extracción de nombres de usuario depende del límite de llamadas de la API.
-    Asegúrate de respetar las restricciones de uso para evitar bloqueos.
+    Cada `sp.user` pasa por `llamada_spotipy()`, que respeta el `limitador` compartido.
+    - **Duplicados:** Cada seguidor aparece una sola vez en el DataFrame, en el orden en que aparece en el HTML.
 
     Ejemplo de uso:
     ---------------
@@ -324,24 +1347,19 @@ def extraer_ids_usuario(sp,marca, html):
     print(df_followers.head())
     """
     print("Iniciando Extracción de Ids Usuario")
-    followers = html.findAll("div",{"class":"Box__BoxComponent-sc-y4nds-0 kcRGDn Box-sc-1njtxi4-0 hscyXl aAYpzGljXQv1_zfopxaH Card"})
-    id_followers = []
-    for follower in followers:
-        quitar_html = str(follower).split(" ")[1]
-        quedarse_user = quitar_html.split("-")[-2]
-        solo_id_user = quedarse_user.split(":")[-1]
-        id_followers.append(solo_id_user)
+    id_followers = soporte_html.extraer_ids_followers(html)
+
+    # Resolver los nombres de usuario en paralelo (sin repetir IDs y reutilizando los ya resueltos)
+    perfiles = resolver_perfiles(sp, id_followers)
 
     brand = []
     usernames = []
     users_id = []
-    for user in tqdm(id_followers):
-        try:
-            usernames.append(sp.user(user)["display_name"])
+    for user in dict.fromkeys(id_followers):
+        if user in perfiles:
+            usernames.append(perfiles[user])
             users_id.append(user)
             brand.append(marca)
-        except:
-            print(f"No se ha podido obtener el usuario {user}")
 
     df = pd.DataFrame({
         'brand': brand,
@@ -350,6 +1368,90 @@ def extraer_ids_usuario(sp,marca, html):
     })
     return df
 
+def _resolver_perfil(sp, user_id, reintentos):
+    # Devuelve (display_name, encontrado) o None si no se ha podido obtener (error no definitivo)
+    for intento in range(reintentos + 1):
+        try:
+            return llamada_spotipy(sp.user, user_id)["display_name"], True
+        except spotipy.SpotifyException as e:
+            if e.http_status in (400, 404):  # El usuario no existe: definitivo, se guarda
+                return None, False
+            if e.http_status is None or e.http_status < 500:  # Otros errores del cliente: no se reintentan
+                print(f"No se ha podido obtener el usuario {user_id}: {e.http_status}")
+                return None
+        except requests.RequestException:
+            pass
+        # Error transitorio (5xx o de red): reintentar con espera exponencial (sin esperar tras el último intento)
+        if intento < reintentos:
+            sleep(2 ** intento)
+    print(f"No se ha podido obtener el usuario {user_id} tras {reintentos} reintentos")
+    return None
+
+def resolver_perfiles(sp, ids_usuarios, hilos=8, reintentos=3):
+    """
+    Obtiene el nombre público (`display_name`) de muchos usuarios de Spotify a la vez.
+
+    Parámetros:
+    -----------
+    sp : spotipy.Spotify
+        Objeto autenticado de la API de Spotify.
+
+    ids_usuarios : list[str]
+        IDs de usuario (pueden contener duplicados).
+
+    hilos : int, opcional (por defecto 8)
+        Número de peticiones `sp.user` simultáneas.
+
+    reintentos : int, opcional (por defecto 3)
+        Reintentos ante errores transitorios (`5xx` o de red).
+
+    Retorna:
+    --------
+    perfiles : dict
+        Diccionario `{user_id: display_name}` con los usuarios que existen. Los usuarios inexistentes
+        y los que no se han podido obtener no aparecen.
+
+    Proceso:
+    --------
+    1. **Eliminar duplicados** de `ids_usuarios`.
+    2. **Consultar el almacén:** Los usuarios ya resueltos en ejecuciones anteriores (`almacen_metadatos`) no se vuelven a pedir.
+    3. **Pedir el resto en paralelo** con un `ThreadPoolExecutor` de `hilos` hilos. Cada llamada pasa por `llamada_spotipy()`,
+    así que el ritmo global lo sigue marcando el `limitador` compartido.
+    4. **Clasificar los errores:**
+    - `429`: Lo gestiona `llamada_spotipy()` (espera el `Retry-After` y reintenta).
+    - `404` / `400`: El usuario no existe; se guarda como no encontrado para no volver a pedirlo.
+    - `5xx` o errores de red: Se reintenta con espera exponencial hasta `reintentos` veces.
+    - Otros errores: Se informa y el usuario no se guarda (se volverá a intentar en la próxima ejecución).
+    5. **Guardar** los usuarios resueltos en el almacén.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    perfiles = resolver_perfiles(sp, ["usuario1", "usuario2", "usuario1"], hilos=16)
+    print(perfiles)
+    """
+    ids_usuarios = [user_id for user_id in dict.fromkeys(ids_usuarios) if user_id]
+    resueltos = almacen_metadatos.usuarios(ids_usuarios)
+    pendientes = [user_id for user_id in ids_usuarios if user_id not in resueltos]
+
+    if pendientes:
+        nuevos = {}
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            futuros = {pool.submit(_resolver_perfil, sp, user_id, reintentos): user_id for user_id in pendientes}
+            for futuro in tqdm(as_completed(futuros), total=len(futuros), desc="Obteniendo usuarios"):
+                resultado = futuro.result()
+                if resultado is not None:
+                    nuevos[futuros[futuro]] = resultado
+                # Guardar por bloques para no perder el progreso si se interrumpe
+                if len(nuevos) >= 500:
+                    almacen_metadatos.guardar_usuarios(nuevos)
+                    resueltos.update(nuevos)
+                    nuevos = {}
+        almacen_metadatos.guardar_usuarios(nuevos)
+        resueltos.update(nuevos)
+
+    return {user_id: display_name for user_id, (display_name, encontrado) in resueltos.items() if encontrado}
+
 def obtener_playlists(sp, user_id):
     """
     Obtiene todas las playlists públicas de un usuario de Spotify.
@@ -392,6 +1494,7 @@ def obtener_playlists(sp, user_id):
     ------
     - **Playlists públicas:** Este método solo accede a playlists públicas del usuario.
     - **Manejo de paginación:** La API de Spotify devuelve las playlists en páginas (paginación), por lo que es necesario iterar sobre todas las páginas para obtener todos los resultados.
+    - **Rate limit:** Cada llamada de Spotipy pasa por `llamada_spotipy()`, que usa el `limitador` compartido con el resto de funciones.
 
     Ejemplo de uso:
     ---------------
@@ -399,7 +1502,7 @@ def obtener_playlists(sp, user_id):
     playlists_dict = obtener_playlists(sp, "usuario123")
     print(playlists_dict)
     """
-    playlists = sp.user_playlists(user_id)
+    playlists = llamada_spotipy(sp.user_playlists, user_id)
     dictio = {}
 
     if not playlists['items']:
@@ -412,7 +1515,7 @@ def obtener_playlists(sp, user_id):
 
         # Verificar si hay más páginas de playlists
         if playlists['next']:
-            playlists = sp.next(playlists)
+            playlists = llamada_spotipy(sp.next, playlists)
         else:
             playlists = None
     return dictio
@@ -459,6 +1562,7 @@ def obtener_algunas_playlists(sp, user_id):
     ------
     - **Playlists públicas:** Este método solo accede a playlists públicas del usuario.
     - **Manejo de paginación:** La API de Spotify devuelve las playlists en páginas (paginación), por lo que es necesario iterar sobre todas las páginas para obtener todos los resultados.
+    - **Rate limit:** Cada llamada de Spotipy pasa por `llamada_spotipy()`, que usa el `limitador` compartido con el resto de funciones.
 
     Ejemplo de uso:
     ---------------
@@ -466,7 +1570,7 @@ def obtener_algunas_playlists(sp, user_id):
     playlists_dict = obtener_playlists(sp, "usuario123")
     print(playlists_dict)
     """
-    playlists = sp.user_playlists(user_id)
+    playlists = llamada_spotipy(sp.user_playlists, user_id)
     dictio = {}
     count = 0  # Contador para limitar a 10 playlists
 
@@ -483,7 +1587,7 @@ def obtener_algunas_playlists(sp, user_id):
 
         # Verificar si hay más páginas de playlists
         if playlists['next'] and count < 10:
-            playlists = sp.next(playlists)
+            playlists = llamada_spotipy(sp.next, playlists)
         else:
             playlists = None
     
@@ -495,8 +1599,8 @@ def obtener_artistas(token, lista_ids_playlists):
 
     Parámetros:
     -----------
-    token : str
-        Token de acceso válido para la API de Spotify.
+    token : str o None
+        Token de acceso válido para la API de Spotify. Si es `None`, se usa el token compartido de `obtener_token()`.
 
     lista_ids_playlists : list[str]
         Lista de IDs de playlists de Spotify de las cuales se desea extraer información de artistas.
@@ -510,15 +1614,13 @@ def obtener_artistas(token, lista_ids_playlists):
     --------
     1. **Inicializar variables:**
     - `dictio_artistas`: Diccionario para registrar artistas únicos.
-    - `llamadas`: Contador para controlar el número de solicitudes realizadas a la API.
-    - `inicio_tiempo`: Marca de tiempo para gestionar el rate limit (50 llamadas por 30 segundos).
 
     2. **Iterar sobre las playlists:**
     - Para cada ID de playlist en `lista_ids_playlists`:
         - Realiza solicitudes a la API para obtener las pistas y sus artistas.
 
     3. **Controlar el rate limit:**
-    - Si se realizan más de 50 solicitudes en 30 segundos, el programa espera el tiempo necesario antes de continuar.
+    - Cada petición espera su turno en el `limitador` compartido (token bucket adaptativo), común a todas las funciones y procesos.
 
     4. **Procesar cada playlist:**
     - Realiza la solicitud HTTP para obtener los datos de las pistas.
@@ -527,8 +1629,8 @@ def obtener_artistas(token, lista_ids_playlists):
 
     5. **Manejo de errores:**
     - `200`: Procesa la respuesta correctamente.
-    - `429`: Espera el tiempo especificado en el encabezado `Retry-After` si se alcanza el rate limit.
-    - `401`: Si el token es inválido o ha expirado, lo renueva automáticamente.
+    - `429`: El `limitador` pausa todas las peticiones durante el `Retry-After` y reduce la tasa; después se reintenta.
+    - `401`: Si el token es inválido o ha expirado, lo renueva automáticamente a través de `gestor_token`.
     - Otros códigos: Informa del error y pasa a la siguiente playlist.
 
     6. **Finalizar:**
@@ -536,38 +1638,31 @@ def obtener_artistas(token, lista_ids_playlists):
 
     Notas:
     ------
-    - **Rate limit:** Spotify permite un máximo de 50 solicitudes por cada 30 segundos. El código maneja este límite automáticamente.
-    - **Token:** Asegúrate de proporcionar un token válido. Si se renueva automáticamente, la función llama a `request_token()`.
+    - **Rate limit:** Spotify no publica un límite fijo; el `limitador` compartido ajusta la tasa según los `429` recibidos.
+    - **Token:** Si el token caduca, se renueva con `gestor_token.renovar()`, que lo comparte con el resto de hilos y procesos.
     - **Datos adicionales:** Este método solo considera pistas y no incluye otro contenido de las playlists.
+    - **Conexiones:** Las peticiones se hacen con `peticion_spotify()`, que reutiliza las conexiones keep-alive de la sesión compartida.
+    - **Caché:** Como no se indica el `snapshot_id`, las pistas guardadas en la caché de respuestas se revalidan con su `ETag`
+      en cada ejecución (nunca se devuelven pistas antiguas de una playlist que ha cambiado). Para saltarse por completo
+      las playlists sin cambios está `obtener_artistas_incremental()`.
 
     Ejemplo de uso:
     ---------------
     ```python
-    token = request_token()
+    token = obtener_token()
     playlists = ["playlist_id_1", "playlist_id_2"]
     artistas = obtener_artistas(token, playlists)
     print(artistas)
     """
+    if token is None:
+        token = obtener_token()
     dictio_artistas = {}  # Para mantener un registro de artistas únicos
-    llamadas = 0  # Contador de llamadas a la API
-    inicio_tiempo = time()  # Tiempo de inicio para controlar el rate limit
     lista_ids_playlists = list(lista_ids_playlists)
     for playlist_id in lista_ids_playlists:
         while True:  # Loop para manejar errores y reintentos
-            # Controlar el rate limit
-            if llamadas >= 50:
-                tiempo_transcurrido = time() - inicio_tiempo
-                if tiempo_transcurrido < 31:
-                    sleep_time = 30 - tiempo_transcurrido
-                    print(f"Rate limit alcanzado. Durmiendo por {sleep_time:.2f} segundos...")
-                    sleep(sleep_time)
-                llamadas = 0
-                inicio_tiempo = time()
-
-            # Realizar la solicitud
-            url = f'https://api.spotify.com/v1/playlists/{playlist_id}/tracks?fields=items.track(artists.name,artists.id),next&limit=50&additional_types=track'
-            response = requests.get(url, headers={"Authorization": f"Bearer {token}"})
-            llamadas += 1
+            # Realizar la solicitud (el limitador compartido controla el rate limit)
+            url = f'{API_URL}/playlists/{playlist_id}/tracks?fields=items.track(artists.name,artists.id),next&limit=50&additional_types=track'
+            response = peticion_spotify("GET", url, token=token)
 
             # Manejo de respuestas
             if response.status_code == 200:
@@ -581,14 +1676,11 @@ def obtener_artistas(token, lista_ids_playlists):
                                     dictio_artistas[artist["id"]] = artist["name"]
                     # Procesar la siguiente página
                     if canciones["next"]:
-                        response = requests.get(canciones["next"], headers={"Authorization": f"Bearer {token}"})
-                        llamadas += 1
+                        response = peticion_spotify("GET", canciones["next"], token=token)
                         if response.status_code == 200:
                             canciones = response.json()
                         elif response.status_code == 429:
-                            retry_after = int(response.headers.get("Retry-After", 1))
-                            print(f"Rate limit alcanzado. Esperando {retry_after} segundos...")
-                            sleep(retry_after)
+                            # El limitador ya ha programado la pausa: se reintenta la misma página
                             continue
                         else:
                             print(f"Error al procesar la siguiente página. Código: {response.status_code}")
@@ -596,27 +1688,333 @@ def obtener_artistas(token, lista_ids_playlists):
                     else:
                         canciones = None
                 break  # Salir del loop para esta playlist
-            elif response.status_code == 429:  # Rate limit alcanzado
-                retry_after = int(response.headers.get("Retry-After", 1))
-                print(f"Rate limit alcanzado. Esperando {retry_after} segundos...")
-                sleep(retry_after)
+            elif response.status_code == 429:  # Rate limit alcanzado: el limitador espera el Retry-After
+                continue
             elif response.status_code == 401:  # Token expirado o inválido
                 print("Token expirado o inválido. Renovando token...")
-                token = request_token(silent=True)
+                token = gestor_token.renovar(token)
             else:  # Otros errores
                 print(f"Error al procesar la playlist {playlist_id}. Código: {response.status_code}")
                 break
 
     return dictio_artistas
 
+async def _obtener_pagina_async(semaforo, url, estado, snapshot_id=None):
+    """
+    Descarga una página de la API respetando el semáforo de concurrencia.
+
+    `estado` es un diccionario compartido por todas las tareas del rastreo con el token vigente (`"token"`).
+    `snapshot_id` se pasa a `peticion_spotify` para validar la caché de respuestas de las pistas de playlist.
+    Devuelve el JSON de la respuesta o `None` si la página no se puede obtener.
+    """
+    while True:
+        # Cada petición espera su turno en el limitador compartido (dentro de `peticion_spotify`)
+        async with semaforo:
+            try:
+                response = await asyncio.to_thread(peticion_spotify, "GET", url, token=estado["token"], snapshot_id=snapshot_id)
+            except requests.RequestException as e:
+                print(f"Error de red al obtener {url}: {e}")
+                return None
+
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 429:  # Rate limit: el limitador pausa a todos durante el Retry-After
+            continue
+        elif response.status_code == 401:  # Token expirado o inválido
+            estado["token"] = await asyncio.to_thread(gestor_token.renovar, estado["token"])
+        else:  # Otros errores
+            print(f"Error al procesar la URL {url}. Código: {response.status_code}")
+            return None
+
+async def _artistas_playlist_async(semaforo, playlist_id, estado, snapshot_id=None):
+    """
+    Obtiene el diccionario `{artist_id: artist_name}` de una playlist.
+
+    Descarga la primera página para conocer el número total de pistas y después lanza
+    todas las páginas restantes a la vez (por `offset`), en lugar de seguir los enlaces `next` de uno en uno.
+    Devuelve `(dictio_artistas, completo)`, donde `completo` es `False` si alguna página no se pudo descargar.
+    """
+    limite = 100  # Máximo permitido por el endpoint de pistas de playlist
+    url = (f"{API_URL}/playlists/{playlist_id}/tracks"
+           f"?fields=items.track(artists.name,artists.id),next,total&limit={limite}&additional_types=track")
+
+    primera = await _obtener_pagina_async(semaforo, url, estado, snapshot_id)
+    if primera is None:
+        return {}, False
+
+    offsets = range(limite, primera.get("total", 0), limite)
+    resto = await asyncio.gather(*[_obtener_pagina_async(semaforo, f"{url}&offset={offset}", estado, snapshot_id) for offset in offsets])
+
+    dictio_artistas = {}
+    completo = all(canciones is not None for canciones in resto)
+    for canciones in [primera, *resto]:
+        if not canciones:
+            continue
+        for cancion in canciones["items"]:
+            track = cancion.get("track")
+            if track and "artists" in track:
+                for artist in track["artists"]:
+                    if artist["id"] not in dictio_artistas:
+                        dictio_artistas[artist["id"]] = artist["name"]
+    return dictio_artistas, completo
+
+async def obtener_artistas_async(token, lista_ids_playlists, concurrencia=10):
+    """
+    Versión asíncrona de `obtener_artistas`: descarga todas las playlists y sus páginas de forma concurrente.
+
+    Parámetros:
+    -----------
+    token : str o None
+        Token de acceso válido para la API de Spotify. Si es `None`, se usa el token compartido de `obtener_token()`.
+
+    lista_ids_playlists : list[str]
+        Lista de IDs de playlists de Spotify de las cuales se desea extraer información de artistas.
+
+    concurrencia : int, opcional (por defecto 10)
+        Número máximo de peticiones simultáneas en vuelo.
+
+    Retorna:
+    --------
+    dictio_artistas : dict
+        El mismo diccionario que `obtener_artistas`: las claves son los IDs de los artistas y los valores sus nombres.
+
+    Proceso:
+    --------
+    1. Lanza una tarea por playlist; cada una pide la primera página y, con el `total` de pistas,
+       pide el resto de páginas en paralelo usando `offset`.
+    2. Un `asyncio.Semaphore` limita las peticiones en vuelo a `concurrencia`.
+    3. El ritmo lo marca el `limitador` compartido (token bucket adaptativo): ante un `429`, todas las tareas
+       esperan el tiempo de `Retry-After` y la tasa se reduce, en lugar de dormir ventanas fijas de 30 segundos.
+    4. Ante un `401`, el token se renueva con `gestor_token` y se reintenta.
+    5. Combina los resultados en el orden de `lista_ids_playlists`, como la versión secuencial.
+
+    Notas:
+    ------
+    - Es una corrutina: en un notebook se usa con `await`. Desde código síncrono, usa `obtener_artistas_concurrente()`.
+    - Las peticiones se hacen en hilos con la sesión compartida; `pool_size` (ver `configurar_sesion()`)
+      debería ser al menos igual a `concurrencia` para reutilizar todas las conexiones.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    artistas = await obtener_artistas_async(obtener_token(), ["playlist_id_1", "playlist_id_2"], concurrencia=20)
+    """
+    if token is None:
+        token = await asyncio.to_thread(obtener_token)
+    semaforo = asyncio.Semaphore(concurrencia)
+    estado = {"token": token}
+    lista_ids_playlists = list(lista_ids_playlists)
+
+    resultados = await asyncio.gather(*[_artistas_playlist_async(semaforo, playlist_id, estado) for playlist_id in lista_ids_playlists])
+
+    dictio_artistas = {}
+    for artistas, _ in resultados:
+        for id_artista, nombre in artistas.items():
+            if id_artista not in dictio_artistas:
+                dictio_artistas[id_artista] = nombre
+    return dictio_artistas
+
+async def _artistas_playlist_incremental_async(semaforo, playlist_id, estado, contadores):
+    """
+    Devuelve los artistas de una playlist reutilizando los guardados en `almacen_metadatos`
+    si su `snapshot_id` no ha cambiado desde el último rastreo.
+    """
+    url = f"{API_URL}/playlists/{playlist_id}?fields=snapshot_id"
+    metadatos = await _obtener_pagina_async(semaforo, url, estado)
+    if metadatos is None:  # Playlist borrada, privada o error: no hay nada que reutilizar
+        contadores["errores"] += 1
+        return {}
+
+    snapshot_id = metadatos.get("snapshot_id")
+    guardada = await asyncio.to_thread(almacen_metadatos.playlist, playlist_id)
+    if guardada is not None and snapshot_id is not None and guardada[0] == snapshot_id:
+        contadores["sin_cambios"] += 1
+        return guardada[1]
+
+    artistas, completo = await _artistas_playlist_async(semaforo, playlist_id, estado, snapshot_id)
+    contadores["rastreadas"] += 1
+    # Solo se guarda una versión descargada por completo; si no, se volverá a rastrear la próxima vez
+    if completo and snapshot_id is not None:
+        await asyncio.to_thread(almacen_metadatos.guardar_playlist, playlist_id, snapshot_id, artistas)
+    return artistas
+
+async def obtener_artistas_incremental_async(token, lista_ids_playlists, concurrencia=10, verbose=False):
+    """
+    Versión incremental de `obtener_artistas_async`: solo vuelve a rastrear las playlists que han cambiado.
+
+    Parámetros:
+    -----------
+    token : str o None
+        Token de acceso válido para la API de Spotify. Si es `None`, se usa el token compartido de `obtener_token()`.
+
+    lista_ids_playlists : list[str]
+        Lista de IDs de playlists de Spotify de las cuales se desea extraer información de artistas.
+
+    concurrencia : int, opcional (por defecto 10)
+        Número máximo de peticiones simultáneas en vuelo.
+
+    verbose : bool, opcional (por defecto False)
+        Si es `True`, imprime cuántas playlists se han reutilizado y cuántas se han vuelto a rastrear.
+
+    Retorna:
+    --------
+    dictio_artistas : dict
+        El mismo diccionario que `obtener_artistas`: las claves son los IDs de los artistas y los valores sus nombres.
+
+    Proceso:
+    --------
+    1. Para cada playlist pide solo su `snapshot_id` (`/v1/playlists/{id}?fields=snapshot_id`, una petición ligera).
+    2. Si coincide con el guardado en `almacen_metadatos`, reutiliza el conjunto de artistas guardado sin descargar pistas.
+    3. Si ha cambiado (o no se había rastreado nunca), descarga todas sus páginas como `obtener_artistas_async`
+       y guarda el nuevo `snapshot_id` junto con los artistas extraídos.
+    4. Combina los resultados en el orden de `lista_ids_playlists`.
+
+    Notas:
+    ------
+    - El coste de refrescar una marca pasa a ser una petición por playlist más el rastreo completo de las que han cambiado,
+      en lugar del rastreo completo de todas.
+    - Las playlists cuyo rastreo falla a medias no se guardan, para no dar por buena una versión incompleta.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    artistas = await obtener_artistas_incremental_async(None, ["playlist_id_1", "playlist_id_2"], verbose=True)
+    """
+    lista_ids_playlists = list(lista_ids_playlists)
+    por_playlist = await obtener_artistas_por_playlist_async(token, lista_ids_playlists, concurrencia, verbose)
+    return combinar_artistas(por_playlist, lista_ids_playlists)
+
+async def obtener_artistas_por_playlist_async(token, lista_ids_playlists, concurrencia=10, verbose=False):
+    """
+    Obtiene los artistas de cada playlist por separado, pidiendo cada playlist distinta una sola vez.
+
+    Parámetros:
+    -----------
+    token : str o None
+        Token de acceso válido para la API de Spotify. Si es `None`, se usa el token compartido de `obtener_token()`.
+
+    lista_ids_playlists : iterable[str]
+        IDs de playlists (pueden repetirse: cada playlist se pide una vez).
+
+    concurrencia : int, opcional (por defecto 10)
+        Número máximo de peticiones simultáneas en vuelo.
+
+    verbose : bool, opcional (por defecto False)
+        Si es `True`, imprime cuántas playlists se han reutilizado y cuántas se han vuelto a rastrear.
+
+    Retorna:
+    --------
+    por_playlist : dict
+        Diccionario `{playlist_id: {artist_id: artist_name}}`. Las playlists que no se han podido obtener tienen un diccionario vacío.
+
+    Notas:
+    ------
+    - Usa la comprobación de `snapshot_id` de `obtener_artistas_incremental_async` (las playlists sin cambios salen del almacén).
+    - Con `combinar_artistas()` se construye después el diccionario de artistas de cualquier subconjunto de playlists
+      (por ejemplo, las de cada seguidor) sin volver a pedir nada.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    por_playlist = await obtener_artistas_por_playlist_async(None, ["playlist_id_1", "playlist_id_2", "playlist_id_1"])
+    """
+    if token is None:
+        token = await asyncio.to_thread(obtener_token)
+    semaforo = asyncio.Semaphore(concurrencia)
+    estado = {"token": token}
+    contadores = {"sin_cambios": 0, "rastreadas": 0, "errores": 0}
+    ids_unicos = list(dict.fromkeys(lista_ids_playlists))
+
+    resultados = await asyncio.gather(*[_artistas_playlist_incremental_async(semaforo, playlist_id, estado, contadores)
+                                        for playlist_id in ids_unicos])
+    if verbose:
+        print(f"Playlists sin cambios: {contadores['sin_cambios']} | rastreadas: {contadores['rastreadas']} | con error: {contadores['errores']}")
+    return dict(zip(ids_unicos, resultados))
+
+def combinar_artistas(por_playlist, lista_ids_playlists):
+    """
+    Une los artistas de varias playlists (obtenidos con `obtener_artistas_por_playlist`) en un único diccionario
+    `{artist_id: artist_name}`, en el orden de `lista_ids_playlists` y quedándose con la primera aparición de cada artista.
+    """
+    dictio_artistas = {}
+    for playlist_id in lista_ids_playlists:
+        for id_artista, nombre in por_playlist.get(playlist_id, {}).items():
+            if id_artista not in dictio_artistas:
+                dictio_artistas[id_artista] = nombre
+    return dictio_artistas
+
+def _ejecutar_corrutina(corrutina):
+    """
+    Ejecuta una corrutina desde código síncrono, también dentro de un notebook
+    (donde ya hay un bucle de eventos en marcha y `asyncio.run` no está permitido).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(corrutina)
+
+    resultado = {}
+    def ejecutar():
+        try:
+            resultado["valor"] = asyncio.run(corrutina)
+        except BaseException as e:
+            resultado["error"] = e
+    hilo = threading.Thread(target=ejecutar)
+    hilo.start()
+    hilo.join()
+    if "error" in resultado:
+        raise resultado["error"]
+    return resultado["valor"]
+
+def obtener_artistas_concurrente(token, lista_ids_playlists, concurrencia=10):
+    """
+    Envoltorio síncrono de `obtener_artistas_async`, con la misma firma y resultado que `obtener_artistas`.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    artistas = obtener_artistas_concurrente(obtener_token(), ["playlist_id_1", "playlist_id_2"])
+    """
+    return _ejecutar_corrutina(obtener_artistas_async(token, lista_ids_playlists, concurrencia))
+
+def obtener_artistas_incremental(token, lista_ids_playlists, concurrencia=10, verbose=False):
+    """
+    Envoltorio síncrono de `obtener_artistas_incremental_async`, con el mismo resultado que `obtener_artistas`.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    artistas = obtener_artistas_incremental(None, ["playlist_id_1", "playlist_id_2"])
+    """
+    return _ejecutar_corrutina(obtener_artistas_incremental_async(token, lista_ids_playlists, concurrencia, verbose))
+
+def obtener_artistas_por_playlist(token, lista_ids_playlists, concurrencia=10, verbose=False):
+    """
+    Envoltorio síncrono de `obtener_artistas_por_playlist_async`: devuelve `{playlist_id: {artist_id: artist_name}}`.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    por_playlist = obtener_artistas_por_playlist(None, ["playlist_id_1", "playlist_id_2"])
+    artistas_seguidor = combinar_artistas(por_playlist, ["playlist_id_2"])
+    """
+    return _ejecutar_corrutina(obtener_artistas_por_playlist_async(token, lista_ids_playlists, concurrencia, verbose))
+
+def _ids_artistas(dictio_artistas_unicos):
+    # Acepta el diccionario de artistas únicos, la serie/lista que lo envuelve o directamente una lista de IDs
+    try:
+        return list(dictio_artistas_unicos[0].keys())
+    except:
+        return list(dictio_artistas_unicos.keys()) if isinstance(dictio_artistas_unicos, dict) else list(dictio_artistas_unicos)
+
 def obtener_urls(dictio_artistas_unicos):
     """
     Genera una lista de URLs para obtener información de artistas desde la API de Spotify.
 
     Parámetros:
     -----------
-    dictio_artistas_unicos : dict
-        Un diccionario que contiene artistas únicos, donde las claves son los IDs de los artistas.
+    dictio_artistas_unicos : dict o list[str]
+        Un diccionario que contiene artistas únicos, donde las claves son los IDs de los artistas, o directamente una lista de IDs.
 
     Retorna:
     --------
@@ -653,113 +2051,207 @@ def obtener_urls(dictio_artistas_unicos):
     print(urls)
     """
     lista_urls = []
-    try:
-        ids_artistas = list(dictio_artistas_unicos[0].keys())
-    except:
-        ids_artistas = list(dictio_artistas_unicos.keys())
+    ids_artistas = _ids_artistas(dictio_artistas_unicos)
     # Dividir en fragmentos de 50
     for dividir in tqdm(range(0, len(ids_artistas), 50),desc="Generando Urls"):
         chunk = ids_artistas[dividir:dividir + 50]
 
-        url = f"https://api.spotify.com/v1/artists?ids={','.join(chunk)}"
+        url = f"{API_URL}/artists?ids={','.join(chunk)}"
         lista_urls.append(url)
 
     return lista_urls
 
-def obtener_generos(token, dictio_artistas_unicos):
+def obtener_generos_por_artista(token, ids_artistas):
+    """
+    Devuelve los géneros de cada artista, consultando primero el almacén de metadatos (`almacen_metadatos`)
+    y pidiendo a la API de Spotify únicamente los artistas que no se han resuelto nunca.
+
+    Parámetros:
+    -----------
+    token : str o None
+        Token de acceso válido para la API de Spotify. Si es `None`, se usa el token compartido de `obtener_token()`.
+
+    ids_artistas : list[str] o dict
+        IDs de los artistas (o un diccionario de artistas únicos cuyas claves son los IDs).
+
+    Retorna:
+    --------
+    generos_por_artista : dict
+        Diccionario `{artist_id: [géneros]}`. Los artistas sin géneros (o inexistentes) tienen una lista vacía.
+
+    Proceso:
+    --------
+    1. **Consultar el almacén:** Recupera los artistas ya conocidos con `almacen_metadatos.generos_artistas()`.
+    2. **Pedir los que faltan:** Agrupa los IDs no encontrados en lotes de 50 (`obtener_urls`) y los pide a `/v1/artists`.
+    3. **Guardar:** Cada lote resuelto se guarda en el almacén en cuanto llega, incluidos los artistas sin géneros,
+    para no volver a pedirlos.
+
+    Notas:
+    ------
+    - **Rate limit y token:** Igual que `obtener_generos`: los `429` los gestiona el `limitador` y los `401` renuevan el token.
+    - El almacén es común al pipeline de marcas y al flujo de usuarios de la app: tras procesar las marcas,
+      la mayoría de artistas de un usuario nuevo ya están resueltos y apenas se hacen peticiones.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    generos = obtener_generos_por_artista(None, ["0TnOYISbd1XYRBk9myaseg", "6eUKZXaKkcviH0Ku9w2n3V"])
+    print(generos["0TnOYISbd1XYRBk9myaseg"])
+    """
+    generos_por_artista = {}
+    for lote in iterar_generos_por_artista(token, ids_artistas):
+        generos_por_artista.update(lote)
+    return generos_por_artista
+
+def iterar_generos_por_artista(token, ids_artistas, tamano_bloque=5000):
+    """
+    Igual que `obtener_generos_por_artista`, pero devuelve los géneros por bloques de artistas en lugar de en un único diccionario.
+
+    Parámetros:
+    -----------
+    token : str o None
+        Token de acceso válido para la API de Spotify. Si es `None`, se usa el token compartido de `obtener_token()`.
+
+    ids_artistas : list[str] o dict
+        IDs de los artistas (o un diccionario de artistas únicos cuyas claves son los IDs).
+
+    tamano_bloque : int, opcional (por defecto 5000)
+        Artistas de cada bloque.
+
+    Retorna:
+    --------
+    generator
+        Diccionarios `{artist_id: [géneros]}` de como mucho `tamano_bloque` artistas, en el orden de `ids_artistas`.
+
+    Notas:
+    ------
+    - Cada bloque se resuelve igual que en `obtener_generos_por_artista` (almacén de metadatos primero y lotes de 50 a la API
+      para los que faltan); quien lo consume puede contar los géneros y descartar el bloque, sin guardar el mapa de todos los artistas.
+    """
+    ids_artistas = [artist_id for artist_id in dict.fromkeys(_ids_artistas(ids_artistas)) if artist_id and artist_id != "None"]
+    barra = None
+    try:
+        for inicio in range(0, len(ids_artistas), tamano_bloque):
+            bloque = ids_artistas[inicio:inicio + tamano_bloque]
+            generos_por_artista = almacen_metadatos.generos_artistas(bloque)
+            pendientes = [artist_id for artist_id in bloque if artist_id not in generos_por_artista]
+            if pendientes:
+                if token is None:
+                    token = obtener_token()
+                if barra is None:
+                    barra = tqdm(desc="Realizando Petición a Spotify", unit=" lotes")
+                nuevos, token = _pedir_generos_artistas(token, pendientes, barra)
+                generos_por_artista.update(nuevos)
+            yield generos_por_artista
+    finally:
+        if barra is not None:
+            barra.close()
+
+def _pedir_generos_artistas(token, pendientes, barra):
+    # Pide a `/v1/artists` los géneros de `pendientes` en lotes de 50 y guarda cada lote en el almacén en cuanto llega.
+    # Devuelve `({artist_id: [géneros]}, token)` (el token puede haberse renovado).
+    generos_por_artista = {}
+    for url in obtener_urls(pendientes):
+        while True:  # Loop para manejar reintentos en caso de errores
+            # Realizar la petición (sesión compartida; el limitador controla el rate limit)
+            response = peticion_spotify("GET", url, token=token)
+
+            if response.status_code == 200:
+                # Los artistas inexistentes llegan como `None`: se guardan sin géneros para no volver a pedirlos
+                lote = {artist_id: [] for artist_id in url.split("ids=", 1)[1].split(",")}
+                for artista in response.json()["artists"]:
+                    if artista:
+                        lote[artista["id"]] = artista.get("genres") or []
+                almacen_metadatos.guardar_generos_artistas(lote)
+                generos_por_artista.update(lote)
+                break  # Salir del loop una vez que se procesa la URL
+            elif response.status_code == 429:  # Manejar Rate Limit
+                continue  # Reintentar: el limitador espera el Retry-After antes de la siguiente petición
+            elif response.status_code == 401:  # Manejar token expirado
+                print("Token expirado o inválido. Renovando token...")
+                token = gestor_token.renovar(token)
+                continue  # Reintentar con el token renovado
+            else:  # Otros errores
+                print(f"Error al procesar la URL: {response.status_code} - {response.text}")
+                break  # Salir del loop en caso de error no recuperable
+        barra.update(1)
+    return generos_por_artista, token
+
+def obtener_generos(token, dictio_artistas_unicos, capacidad=None):
     """
     Obtiene los géneros musicales asociados a un conjunto de artistas utilizando la API de Spotify.
 
     Parámetros:
     -----------
-    token : str
-        Token de acceso válido para interactuar con la API de Spotify.
+    token : str o None
+        Token de acceso válido para interactuar con la API de Spotify. Si es `None`, se usa el token compartido de `obtener_token()`.
 
     dictio_artistas_unicos : dict
         Diccionario con artistas únicos, donde las claves son los IDs de los artistas.
 
+    capacidad : int, opcional
+        Si se indica, el conteo se hace con un ranking aproximado (`topk.EspacioAhorro`) de como mucho `capacidad` géneros,
+        en lugar de guardar la cuenta exacta de todos los géneros de la cola larga. Los géneros de los artistas se leen
+        por bloques (`iterar_generos_por_artista`), así que la memoria no depende del número de artistas.
+
     Retorna:
     --------
     dictio_generos : dict
         Diccionario donde las claves son los nombres de los géneros y los valores son el número de ocurrencias de cada género.
+        Con `capacidad`, solo los géneros más frecuentes, con cuentas que pueden superar a las reales como mucho en el error
+        que se muestra por pantalla.
 
     Proceso:
     --------
-    1. **Generar URLs para la API:**
-    - Llama a la función `obtener_urls(dictio_artistas_unicos)` para dividir los IDs de artistas en lotes de 50 y generar las URLs correspondientes.
+    1. **Obtener los géneros de cada artista:**
+    - Llama a `obtener_generos_por_artista()`, que consulta primero el almacén de metadatos (`almacen_metadatos`)
+    y solo pide a la API, en lotes de 50, los artistas que no se han resuelto nunca.
 
-    2. **Iterar sobre las URLs:**
-    - Realiza una solicitud HTTP para cada URL generada.
-    - Procesa los datos de los artistas devueltos por la API, extrayendo sus géneros y acumulando el conteo en `dictio_generos`.
+    2. **Contar los géneros:**
+    - Recorre los géneros de todos los artistas (los del almacén y los recién descargados) y acumula el conteo en `dictio_generos`.
 
-    3. **Controlar el rate limit de Spotify:**
-    - La API permite un máximo de 50 solicitudes cada 30 segundos.
-    - Si se alcanza el límite, calcula cuánto tiempo esperar antes de continuar con las solicitudes.
+    3. **Manejo de errores (en las peticiones a la API):**
+    - `429`: El `limitador` pausa todas las peticiones durante el `Retry-After` y reduce la tasa; después se reintenta.
+    - `401`: Renueva el token a través de `gestor_token` y reintenta la petición.
+    - Otros códigos: Muestra un mensaje de error y continúa con el siguiente lote.
 
-    4. **Manejo de errores:**
-    - `200`: Procesa la respuesta y extrae los géneros.
-    - `429`: Espera el tiempo indicado por el encabezado `Retry-After` antes de continuar.
-    - `401`: Notifica que el token ha expirado o es inválido, y termina el proceso.
-    - Otros códigos: Muestra un mensaje de error y continúa con la siguiente URL.
-
-    5. **Retornar los géneros:**
+    4. **Retornar los géneros:**
     - Devuelve un diccionario con los géneros y su número de apariciones.
 
     Notas:
     ------
-    - **Rate limit:** Spotify impone un límite de 50 solicitudes cada 30 segundos. Este código maneja automáticamente ese límite.
+    - **Rate limit:** Spotify no publica un límite fijo; el `limitador` compartido ajusta la tasa según los `429` recibidos.
     - **Reintentos:** Maneja errores temporales como `429` (Rate Limit) con reintentos automáticos después de esperar.
-    - **Token:** Asegúrate de proporcionar un token válido. Si el token expira, se requiere renovar manualmente.
+    - **Token:** Si el token expira, se renueva automáticamente con `gestor_token.renovar()`.
     - **Estructura de géneros:** Este método agrupa y cuenta los géneros musicales asociados a los artistas proporcionados.
+    - **Almacén de metadatos:** Los géneros de cada artista quedan guardados en disco; las siguientes marcas y los usuarios
+      de la app solo generan peticiones para artistas nuevos.
+    - **Conexiones:** Las peticiones se hacen con `peticion_spotify()`, que reutiliza las conexiones keep-alive de la sesión compartida.
 
     Ejemplo de uso:
     ---------------
     ```python
-    token = request_token()
+    token = obtener_token()
     dictio_artistas_unicos = [{"artist_id_1": "Artist 1", "artist_id_2": "Artist 2", ...}]
     generos = obtener_generos(token, dictio_artistas_unicos)
     print(generos)
     """
-    lista_urls = obtener_urls(dictio_artistas_unicos)
+    if capacidad is not None:
+        # Los géneros se cuentan por bloques de artistas (`iterar_generos_por_artista`) sin guardar el mapa de todos los artistas
+        esquema = topk.EspacioAhorro(capacidad)
+        for lote in iterar_generos_por_artista(token, dictio_artistas_unicos):
+            for generos in lote.values():
+                esquema.añadir_muchos(generos)
+        if not esquema.exacto:
+            print(f"Ranking de géneros aproximado: error máximo {esquema.error_maximo} de {esquema.total} apariciones")
+        return dict(esquema.ranking())
+
+    generos_por_artista = obtener_generos_por_artista(token, dictio_artistas_unicos)
     dictio_generos = {}  # Diccionario para almacenar géneros y su conteo
-    llamadas = 0  # Contador de llamadas a la API
-    inicio_tiempo = time()  # Tiempo inicial para manejar el rate limit
-
-    for url in tqdm(lista_urls,desc="Realizando Petición a Spotify"):
-        while True:  # Loop para manejar reintentos en caso de errores
-            # Controlar el rate limit
-            if llamadas >= 100:
-                tiempo_transcurrido = time() - inicio_tiempo
-                if tiempo_transcurrido < 30:
-                    sleep_time = 30 - tiempo_transcurrido
-                    print(f"Rate limit alcanzado. Esperando {sleep_time:.2f} segundos...")
-                    sleep(sleep_time)
-                llamadas = 0
-                inicio_tiempo = time()
-
-            # Realizar la petición
-            response = requests.get(url, headers={"Authorization": f"Bearer {token}"})
-            llamadas += 1
 
-            if response.status_code == 200:
-                # Procesar la respuesta exitosa
-                artistas = response.json()
-                for artista in artistas["artists"]:
-                    if artista and artista.get("genres"):
-                        for genero in artista["genres"]:
-                            dictio_generos[genero] = dictio_generos.get(genero, 0) + 1
-                break  # Salir del loop una vez que se procesa la URL
-            elif response.status_code == 429:  # Manejar Rate Limit
-                retry_after = int(response.headers.get("Retry-After", 1))
-                print(f"Rate limit alcanzado. Esperando {retry_after} segundos...")
-                sleep(retry_after)
-                continue  # Reintentar después de la espera
-            elif response.status_code == 401:  # Manejar token expirado
-                print("Token expirado o inválido. Por favor, renueva tu token.")
-                return None  # Salir y notificar que el token no es válido
-            else:  # Otros errores
-                print(f"Error al procesar la URL: {response.status_code} - {response.text}")
-                break  # Salir del loop en caso de error no recuperable
+    for generos in generos_por_artista.values():
+        for genero in generos:
+            dictio_generos[genero] = dictio_generos.get(genero, 0) + 1
 
     return dictio_generos
 
@@ -1,15 +1,38 @@
-#######################################################################################
-##            Importación de bibliotecas para la conexión a bases de datos           ##
-#######################################################################################
-# Importar psycopg2 para la conexión y manejo de bases de datos PostgreSQL
-import psycopg2
-
 #######################################################################################
 ##            Manejo de errores específicos de psycopg2                             ##
 #######################################################################################
 # Importar manejo de errores específicos de psycopg2
 from psycopg2 import OperationalError, errorcodes
 
+#######################################################################################
+##            Pool de conexiones                                                    ##
+#######################################################################################
+# Pool de conexiones seguro entre hilos: las conexiones se reutilizan en lugar de abrir una (con su handshake TLS) por llamada
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from psycopg2 import extensions
+# `execute_values` agrupa muchas filas en cada INSERT (usado por las cargas idempotentes con ON CONFLICT)
+from psycopg2.extras import execute_values
+# Para el gestor de contexto `conexion_bd()`, el acceso concurrente al pool y la comprobación de conexiones inactivas
+from contextlib import contextmanager
+import threading
+from time import monotonic
+# Caché de resultados de consultas (orden de uso para expulsar la menos usada)
+from collections import OrderedDict
+
+#######################################################################################
+##            Carga masiva con COPY                                                  ##
+#######################################################################################
+# Buffer en memoria para enviar los datos a `COPY ... FROM STDIN`
+import io
+# Para reconocer las consultas INSERT sencillas y serializar los valores de cada tipo
+import re
+import json
+import math
+from datetime import date, datetime, time as hora
+from decimal import Decimal
+# Barra de progreso de las cargas grandes
+from tqdm import tqdm
+
 
 #######################################################################################
 ##            Carga de variables de entorno                                        ##
@@ -25,6 +48,13 @@ import os
 #######################################################################################
 # Importar pandas para manipulación y análisis de datos tabulares
 import pandas as pd
+# Apache Arrow (opcional): lotes de columnas para las consultas por bloques con `formato="arrow"`
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+# Para dar un nombre único a cada cursor del servidor
+from itertools import count
 
 #######################################################################################
 ##            Configuración y manejo de advertencias                                ##
@@ -46,10 +76,355 @@ HOST = os.getenv("dbhost")          # Dirección del servidor de la base de dato
 PORT = os.getenv("dbport")          # Puerto del servidor de la base de datos
 DBNAME = os.getenv("dbname")        # Nombre de la base de datos
 
+# Tamaño del pool de conexiones (configurable con `configurar_pool()`)
+POOL_MINIMO = int(os.getenv("dbpool_min", 1))            # Conexiones que se abren al crear el pool
+POOL_MAXIMO = int(os.getenv("dbpool_max", 10))           # Conexiones simultáneas como máximo
+VERIFICAR_TRAS = float(os.getenv("dbpool_verificar", 60))  # Segundos de inactividad tras los que se comprueba una conexión
+ESPERA_POOL = float(os.getenv("dbpool_espera", 30))       # Segundos que se espera una conexión libre antes de dar error
+
+# Carga masiva: a partir de cuántas filas `insertar_muchos_datos` usa COPY y cuántas filas se envían en cada bloque
+UMBRAL_COPY = int(os.getenv("db_umbral_copy", 1000))
+LOTE_COPY = int(os.getenv("db_lote_copy", 50000))
+
+# INSERT sencillo (`INSERT INTO tabla(col1,col2) VALUES (%s,%s)`), el que se puede sustituir por COPY
+PATRON_INSERT = re.compile(r"^\s*INSERT\s+INTO\s+([\w.\"]+)\s*\(([^)]*)\)\s*VALUES\s*\(\s*%s(?:\s*,\s*%s)*\s*\)\s*;?\s*$",
+                           re.IGNORECASE)
+
+# Claves naturales de cada tabla: las columnas que identifican una fila con independencia de su `id` autogenerado.
+# Las cargas idempotentes (`upsert_muchos_datos`) las usan en `ON CONFLICT` y necesitan un índice único sobre ellas
+# (ver `crear_indices_unicos`).
+CLAVES_NATURALES = {
+    "brands": ["name"],
+    "followers": ["user_id", "brand_id"],
+    "playlists": ["playlist_id", "follower_id"],
+    "reduced_playlists": ["playlist_id", "follower_id"],
+    "artists": ["artist_id", "brand_id"],
+    "artists_ranking": ["artist_name", "brand_id"],
+    "main_genres": ["genre_name", "brand_id"],
+    "subgenres": ["subgenre_name", "brand_id"],
+    "spotify_ids": ["id"],
+    "users": ["user_id"],
+    "tracks_user_likes": ["user_id", "song_id"],
+    "top_tracks": ["user_id", "ranking"],
+    "user_artists_ranking": ["user_id", "artist_name"],
+    "user_main_genres": ["user_id", "genre_name"],
+    "user_subgenres": ["user_id", "subgenre_name"]
+}
+PAGINA_UPSERT = int(os.getenv("db_pagina_upsert", 1000))
+
+# Filas por bloque de las consultas por bloques (cursor del servidor)
+BLOQUE_CONSULTA = int(os.getenv("db_bloque_consulta", 10000))
+_cursores = count()
+
+# Caché de resultados de `consulta_sql`
+CACHE_TTL = float(os.getenv("db_cache_ttl", 120))             # Segundos que vale un resultado (0 desactiva la caché)
+CACHE_MAXIMO_MB = float(os.getenv("db_cache_mb", 64))         # Memoria máxima de los resultados guardados
+# Tablas leídas por una consulta y tablas escritas por una sentencia (para invalidar la caché)
+PATRON_LECTURA = re.compile(r"\b(?:FROM|JOIN)\s+([\w.\"]+)", re.IGNORECASE)
+PATRON_ESCRITURA = re.compile(r"\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?|ALTER\s+TABLE|DROP\s+TABLE(?:\s+IF\s+EXISTS)?"
+                              r"|CREATE\s+TABLE(?:\s+IF\s+NOT\s+EXISTS)?|COPY)\s+([\w.\"]+)", re.IGNORECASE)
+PATRON_LITERAL = re.compile(r"('(?:[^']|'')*')")
+# Literales e identificadores entre comillas dobles: se conservan tal cual al normalizar ("Foo" y foo son tablas distintas)
+PATRON_COMILLAS = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+# Lista de tablas de cada FROM (hasta la siguiente cláusula): con comas, subconsultas o funciones no se sabe qué tablas lee
+PATRON_CLAUSULA_FROM = re.compile(r"\bFROM\b(.*?)(?=\b(?:WHERE|GROUP|ORDER|LIMIT|OFFSET|HAVING|UNION|INTERSECT|EXCEPT|WINDOW|FETCH|FOR)\b|$)",
+                                  re.IGNORECASE | re.DOTALL)
+# Funciones cuyo resultado cambia en cada llamada (nunca se cachean)
+PATRON_VOLATIL = re.compile(r"\b(?:nextval|setval|currval|now|random|clock_timestamp|current_date|current_time|current_timestamp|localtimestamp|gen_random_uuid)\b",
+                            re.IGNORECASE)
+
 #######################################################################################
 ##            Fin de los Imports                                                     ##
 #######################################################################################
 
+# Estado del pool (se crea la primera vez que se pide una conexión)
+_pool = None
+_semaforo = None
+_lock_pool = threading.Lock()
+# Conexiones prestadas por el pool: id(conexion) → (modo, pool, semáforo). El modo es "conectar_bd" (la devuelven las
+# funciones de este módulo al terminar) o "contexto" (la devuelve `conexion_bd()` al salir del bloque `with`)
+_prestadas = {}
+# Momento en que cada conexión volvió al pool, para comprobar solo las que llevan un rato inactivas
+_ultimo_uso = {}
+
+# Estado de la caché: clave → (caduca, DataFrame, bytes, tablas), de la menos a la más usada
+_cache = OrderedDict()
+_lock_cache = threading.Lock()
+_bytes_cache = 0
+# Se incrementa en cada invalidación: un resultado leído antes de una escritura no se guarda
+_version_cache = 0
+_estadisticas_cache = {"aciertos": 0, "fallos": 0, "expulsiones": 0, "invalidaciones": 0}
+
+
+def configurar_pool(minimo=None, maximo=None, verificar_tras=None):
+    """
+    (Re)crea el pool de conexiones con el tamaño indicado. Las conexiones del pool anterior se cierran.
+
+    Parámetros:
+    -----------
+    minimo : int, opcional
+        Conexiones que se abren al crear el pool (por defecto `POOL_MINIMO`, variable de entorno `dbpool_min`).
+
+    maximo : int, opcional
+        Conexiones simultáneas como máximo (por defecto `POOL_MAXIMO`, variable de entorno `dbpool_max`).
+        Si están todas en uso, la siguiente petición espera a que se devuelva una.
+
+    verificar_tras : float, opcional
+        Segundos de inactividad tras los que una conexión se comprueba (`SELECT 1`) antes de prestarla
+        (por defecto `VERIFICAR_TRAS`, variable de entorno `dbpool_verificar`).
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    configurar_pool(minimo=2, maximo=20)
+    """
+    global _pool, _semaforo, POOL_MINIMO, POOL_MAXIMO, VERIFICAR_TRAS
+    with _lock_pool:
+        POOL_MINIMO = POOL_MINIMO if minimo is None else minimo
+        POOL_MAXIMO = POOL_MAXIMO if maximo is None else maximo
+        VERIFICAR_TRAS = VERIFICAR_TRAS if verificar_tras is None else verificar_tras
+        if _pool is not None:
+            _pool.closeall()
+        _pool = None
+        _semaforo = None
+        _prestadas.clear()
+        _ultimo_uso.clear()
+
+def cerrar_pool():
+    """
+    Cierra todas las conexiones del pool (por ejemplo, al terminar un script). El pool se vuelve a crear si se pide otra conexión.
+    """
+    configurar_pool()
+
+def _obtener_pool():
+    global _pool, _semaforo
+    with _lock_pool:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(POOL_MINIMO, POOL_MAXIMO, user=USER, password=PASSWORD, host=HOST, port=PORT, dbname=DBNAME)
+            _semaforo = threading.BoundedSemaphore(POOL_MAXIMO)
+        return _pool, _semaforo
+
+def _conexion_sana(conexion):
+    # Descarta las conexiones cerradas y comprueba las que llevan inactivas más de `VERIFICAR_TRAS` segundos
+    if conexion.closed:
+        return False
+    if monotonic() - _ultimo_uso.get(id(conexion), monotonic()) < VERIFICAR_TRAS:
+        return True
+    try:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+        conexion.rollback()
+        return True
+    except Exception:
+        return False
+
+def _tomar_conexion(modo):
+    # Presta una conexión sana del pool (esperando si están todas en uso)
+    pool, semaforo = _obtener_pool()
+    # Una conexión de `conectar_bd()` que no se pasa a ninguna función de este módulo no vuelve nunca al pool:
+    # en lugar de bloquear para siempre cuando se agotan, se avisa del problema
+    if not semaforo.acquire(timeout=ESPERA_POOL):
+        raise PoolError(f"No hay conexiones libres tras esperar {ESPERA_POOL:g} s: las {POOL_MAXIMO} conexiones del pool están en uso. "
+                        "Si alguna salió de conectar_bd() y no se ha usado, ciérrala con sql.cerrar_pool() "
+                        "(o usa `with conexion_bd()`), o amplía el pool con configurar_pool(maximo=...)")
+    try:
+        while True:
+            conexion = pool.getconn()
+            if _conexion_sana(conexion):
+                break
+            pool.putconn(conexion, close=True)
+    except Exception:
+        semaforo.release()
+        raise
+    _prestadas[id(conexion)] = (modo, pool, semaforo)
+    return conexion
+
+def _devolver_conexion(conexion):
+    # Devuelve una conexión al pool, deshaciendo cualquier transacción que haya quedado abierta
+    _, pool, semaforo = _prestadas.pop(id(conexion), (None, None, None))
+    if pool is None or pool is not _pool:
+        # Conexión ajena al pool o de un pool anterior a `configurar_pool()`
+        conexion.close()
+        return
+    try:
+        if not conexion.closed and conexion.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            conexion.rollback()
+        _ultimo_uso[id(conexion)] = monotonic()
+        pool.putconn(conexion, close=bool(conexion.closed))
+    except Exception:
+        pool.putconn(conexion, close=True)
+    finally:
+        semaforo.release()
+
+def _liberar(conexion):
+    # Lo que hacen las funciones de este módulo al terminar con una conexión:
+    # - prestada por `conectar_bd()`: vuelve al pool (antes se cerraba)
+    # - prestada por `conexion_bd()`: no se toca, la devuelve el bloque `with`
+    # - abierta fuera del pool: se cierra, como hasta ahora
+    if conexion is None:
+        return
+    modo = _prestadas.get(id(conexion), (None,))[0]
+    if modo == "contexto":
+        return
+    if modo == "conectar_bd":
+        _devolver_conexion(conexion)
+    else:
+        conexion.close()
+
+def configurar_cache(ttl=None, maximo_mb=None):
+    """
+    Cambia la configuración de la caché de resultados de `consulta_sql` y la vacía.
+
+    Parámetros:
+    -----------
+    ttl : float, opcional
+        Segundos que vale un resultado guardado (por defecto `db_cache_ttl` del .env, o 120). Con 0 se desactiva la caché.
+
+    maximo_mb : float, opcional
+        Memoria máxima de los resultados guardados, en MB (por defecto `db_cache_mb`, o 64). Al superarla se expulsan
+        los resultados usados hace más tiempo.
+    """
+    global CACHE_TTL, CACHE_MAXIMO_MB
+    if ttl is not None:
+        CACHE_TTL = float(ttl)
+    if maximo_mb is not None:
+        CACHE_MAXIMO_MB = float(maximo_mb)
+    limpiar_cache()
+
+def limpiar_cache(tablas=None):
+    """
+    Elimina de la caché los resultados que leen alguna de `tablas` (todos si `tablas` es `None`).
+
+    Las funciones de escritura de este módulo la llaman solas con las tablas que modifican; hace falta llamarla
+    a mano solo si la base de datos se modifica por otra vía (otra aplicación, el editor de Supabase...).
+    """
+    global _bytes_cache, _version_cache
+    with _lock_cache:
+        _version_cache += 1
+        _estadisticas_cache["invalidaciones"] += 1
+        if tablas is None:
+            _cache.clear()
+            _bytes_cache = 0
+            return
+        tablas = {_nombre_tabla(tabla) for tabla in tablas}
+        for clave in [clave for clave, entrada in _cache.items() if entrada[3] & tablas]:
+            _bytes_cache -= _cache.pop(clave)[2]
+
+def estadisticas_cache():
+    """
+    Devuelve el estado de la caché: aciertos, fallos, expulsiones por memoria, invalidaciones, resultados guardados y MB usados.
+    """
+    with _lock_cache:
+        return {**_estadisticas_cache, "resultados": len(_cache), "mb": round(_bytes_cache / 2**20, 2)}
+
+def _nombre_tabla(tabla):
+    # "public"."followers" → followers
+    return tabla.replace('"', "").split(".")[-1].lower()
+
+def _normalizar_sql(query):
+    # Espacios y mayúsculas no cambian una consulta (fuera de los literales entre comillas)
+    partes = PATRON_COMILLAS.split(query.strip().rstrip(";").strip())
+    return "".join(parte if parte[:1] in ("'", '"') else re.sub(r"\s+", " ", parte).lower() for parte in partes)
+
+def _tablas_lectura(query):
+    # Tablas que lee un SELECT, o `None` si no se pueden saber con seguridad (y entonces no se cachea):
+    # subconsultas, funciones o varias tablas separadas por comas en el FROM, funciones volátiles o ninguna tabla
+    sin_literales = PATRON_LITERAL.sub("''", query)
+    if PATRON_VOLATIL.search(sin_literales):
+        return None
+    for clausula in PATRON_CLAUSULA_FROM.findall(sin_literales):
+        if "," in clausula or "(" in clausula:
+            return None
+    tablas = {_nombre_tabla(tabla) for tabla in PATRON_LECTURA.findall(sin_literales)}
+    return tablas or None
+
+def _clave_cache(query, parametros):
+    # Clave de la caché y tablas leídas, o `(None, None)` si la consulta no se cachea
+    if CACHE_TTL <= 0 or not re.match(r"\s*SELECT\b", query, re.IGNORECASE):
+        return None, None
+    tablas = _tablas_lectura(query)
+    if tablas is None:
+        return None, None
+    if isinstance(parametros, list):
+        parametros = tuple(parametros)
+    elif isinstance(parametros, dict):
+        parametros = tuple(sorted(parametros.items()))
+    return (_normalizar_sql(query), repr(parametros)), tablas
+
+def _leer_cache(clave):
+    with _lock_cache:
+        entrada = _cache.get(clave)
+        if entrada is None or entrada[0] < monotonic():
+            if entrada is not None:
+                _eliminar_cache(clave)
+            _estadisticas_cache["fallos"] += 1
+            return None, _version_cache
+        _cache.move_to_end(clave)
+        _estadisticas_cache["aciertos"] += 1
+        return entrada[1].copy(), _version_cache
+
+def _guardar_cache(clave, df, tablas, version):
+    global _bytes_cache
+    tamano = int(df.memory_usage(index=True, deep=True).sum())
+    maximo = CACHE_MAXIMO_MB * 2**20
+    if tamano > maximo:
+        return
+    with _lock_cache:
+        # Si ha habido una escritura mientras se leía, el resultado puede estar ya desactualizado
+        if version != _version_cache:
+            return
+        if clave in _cache:
+            _eliminar_cache(clave)
+        _cache[clave] = (monotonic() + CACHE_TTL, df.copy(), tamano, tablas)
+        _bytes_cache += tamano
+        while _bytes_cache > maximo:
+            _eliminar_cache(next(iter(_cache)))
+            _estadisticas_cache["expulsiones"] += 1
+
+def _eliminar_cache(clave):
+    global _bytes_cache
+    _bytes_cache -= _cache.pop(clave)[2]
+
+def _invalidar(query):
+    # Invalida las tablas que escribe una sentencia; si no se reconocen, toda la caché
+    tablas = PATRON_ESCRITURA.findall(PATRON_LITERAL.sub("", query))
+    limpiar_cache(tablas or None)
+
+@contextmanager
+def conexion_bd():
+    """
+    Presta una conexión del pool durante un bloque `with` y la devuelve al salir.
+
+    Retorna:
+    --------
+    conexion : psycopg2.extensions.connection
+        Conexión del pool. Las funciones de este módulo (`modificar_bd`, `insertar_muchos_datos`, `consulta_sql`...)
+        la usan sin cerrarla, de modo que se puede reutilizar para varias operaciones.
+
+    Notas:
+    ------
+    - Si el bloque termina con una excepción, se deshace la transacción en curso antes de devolver la conexión.
+    - Las conexiones inactivas durante más de `VERIFICAR_TRAS` segundos se comprueban antes de prestarlas
+      y, si se han caído (por ejemplo, el servidor cerró la sesión), se sustituyen por una nueva.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    with conexion_bd() as conexion:
+        brands = consulta_sql(conexion, "SELECT * FROM brands")
+        insertar_muchos_datos(conexion, query, generar_tupla(df))
+    """
+    conexion = _tomar_conexion("contexto")
+    try:
+        yield conexion
+    except Exception:
+        if not conexion.closed:
+            conexion.rollback()
+        raise
+    finally:
+        _devolver_conexion(conexion)
+
 
 def conectar_bd():
     """
@@ -58,7 +433,9 @@ def conectar_bd():
     Retorna:
     --------
     conexion : psycopg2.extensions.connection
-        Objeto de conexión a la base de datos, si la conexión es exitosa.
+        Objeto de conexión a la base de datos, si la conexión es exitosa. Sale del pool de conexiones:
+        las funciones de este módulo (`modificar_bd`, `insertar_muchos_datos`, `consulta_sql`) la devuelven al pool al terminar
+        en lugar de cerrarla, así que la siguiente llamada a `conectar_bd()` reutiliza la conexión sin volver a negociar TLS.
 
     Excepciones:
     ------------
@@ -70,8 +447,8 @@ def conectar_bd():
 
     Proceso:
     --------
-    1. Intenta establecer una conexión con la base de datos PostgreSQL utilizando las credenciales 
-    almacenadas en las variables de entorno (`USER`, `PASSWORD`, `HOST`, `PORT`, `DBNAME`).
+    1. Toma una conexión del pool (que se crea la primera vez con las credenciales
+    almacenadas en las variables de entorno: `USER`, `PASSWORD`, `HOST`, `PORT`, `DBNAME`).
     2. Si la conexión es exitosa:
         - Imprime un mensaje indicando que la conexión fue establecida.
         - Retorna el objeto de conexión.
@@ -83,17 +460,15 @@ def conectar_bd():
     ------
     - Asegúrate de que las credenciales correctas están definidas en las variables de entorno.
     - La base de datos PostgreSQL debe estar en ejecución y accesible desde la máquina que ejecuta esta función.
+    - Para hacer varias operaciones con la misma conexión, usa `with conexion_bd() as conexion:`.
+    - La conexión queda prestada hasta que se pasa a una de las funciones de este módulo. Si se pide con `conectar_bd()`
+      y no se usa, no vuelve al pool; cuando no quedan libres, `conectar_bd()` espera `ESPERA_POOL` segundos
+      (variable de entorno `dbpool_espera`) y lanza `PoolError`. `cerrar_pool()` recupera todas las conexiones.
     """
 
     # Connect to the database
     try:
-        conexion = psycopg2.connect(
-            user=USER,
-            password=PASSWORD,
-            host=HOST,
-            port=PORT,
-            dbname=DBNAME
-        )
+        conexion = _tomar_conexion("conectar_bd")
         print (f"Conectado a la base de datos")
         
         return conexion
@@ -122,7 +497,8 @@ def modificar_bd(conexion, query):
     1. Crea un cursor a partir de la conexión proporcionada.
     2. Ejecuta la consulta SQL especificada en el parámetro `query`.
     3. Confirma los cambios en la base de datos utilizando `commit()`.
-    4. Cierra el cursor y la conexión para liberar recursos.
+    4. Cierra el cursor y libera la conexión (`_liberar`): vuelve al pool si salió de `conectar_bd()`,
+    se deja abierta si pertenece a un bloque `with conexion_bd()` y se cierra si se abrió fuera del pool.
     5. Imprime un mensaje de éxito si la operación se realizó correctamente.
 
     Excepciones:
@@ -141,12 +517,16 @@ def modificar_bd(conexion, query):
         cursor.execute(query)
         conexion.commit()
         cursor.close()
-        conexion.close()
+        _invalidar(query)
         print("Se ha modificado correctamente la base de Datos")
     except Exception as e:
+        if conexion is not None and not conexion.closed:
+            conexion.rollback()
         print("No se ha podido realizar la operación:", e)
+    finally:
+        _liberar(conexion)
     
-def insertar_muchos_datos(conexion,query,tupla):
+def insertar_muchos_datos(conexion,query,tupla,metodo="auto",tamano_lote=None):
     """
     Inserta múltiples registros en la base de datos PostgreSQL utilizando una consulta SQL parametrizada.
 
@@ -164,13 +544,26 @@ def insertar_muchos_datos(conexion,query,tupla):
         Lista de tuplas donde cada tupla representa un registro a insertar en la base de datos.
         Ejemplo: [(valor1, valor2), (valor3, valor4), ...]
 
+    metodo : str, opcional (por defecto "auto")
+        - "auto": usa `COPY` si la consulta es un INSERT sencillo (`PATRON_INSERT`) y hay al menos `UMBRAL_COPY` filas;
+          si no, `executemany()`.
+        - "copy": siempre `COPY` (la consulta tiene que ser un INSERT sencillo).
+        - "executemany": siempre `executemany()`, como hasta ahora.
+        - "upsert": carga idempotente con `upsert_muchos_datos()` (las filas que ya existen por su clave natural
+          se actualizan u omiten en lugar de duplicarse).
+
+    tamano_lote : int, opcional
+        Filas por bloque de `COPY` (por defecto `LOTE_COPY`).
+
     Proceso:
     --------
     1. Crea un cursor a partir de la conexión proporcionada.
-    2. Ejecuta la consulta SQL para insertar múltiples registros utilizando `executemany()` con 
-    la consulta y la lista de tuplas.
+    2. Inserta los registros:
+        - Con `COPY ... FROM STDIN` (ver `copiar_datos`): las filas se envían por bloques en el formato de texto de PostgreSQL,
+        en unas pocas peticiones en lugar de una por fila.
+        - O con `executemany()`, que en psycopg2 envía un INSERT por fila.
     3. Confirma los cambios en la base de datos utilizando `commit()`.
-    4. Cierra el cursor y la conexión para liberar recursos.
+    4. Cierra el cursor y libera la conexión (vuelve al pool, o se deja abierta dentro de `with conexion_bd()`).
     5. Imprime un mensaje de éxito si la operación se realizó correctamente.
 
     Excepciones:
@@ -183,17 +576,286 @@ def insertar_muchos_datos(conexion,query,tupla):
     - Asegúrate de que la conexión esté activa y que el usuario tenga los permisos adecuados para realizar la operación.
     - Verifica que la estructura de la lista de tuplas coincide con los placeholders definidos en la consulta SQL.
     - Es una función útil para insertar grandes volúmenes de datos de manera eficiente.
+    - Todas las filas se insertan en una misma transacción: si falla un bloque, no se inserta ninguna.
     """
+    if metodo == "upsert":
+        return upsert_muchos_datos(conexion, query, tupla)
     try:
+        coincidencia = PATRON_INSERT.match(query)
+        if metodo == "copy" and coincidencia is None:
+            raise ValueError("Para usar COPY la consulta tiene que ser un INSERT INTO tabla(columnas) VALUES (%s,...)")
         cursor = conexion.cursor()
-        cursor.executemany(query,tupla)
+        if coincidencia is not None and (metodo == "copy" or (metodo == "auto" and len(tupla) >= UMBRAL_COPY)):
+            tabla, columnas = coincidencia.group(1), [columna.strip() for columna in coincidencia.group(2).split(",")]
+            _copiar(cursor, tabla, columnas, tupla, tamano_lote or LOTE_COPY)
+        else:
+            cursor.executemany(query,tupla)
         conexion.commit()
         cursor.close()
-        conexion.close()
+        _invalidar(query)
         print("Se han añadido los valores correctamente")
     except Exception as e:
+        if conexion is not None and not conexion.closed:
+            conexion.rollback()
         print("No se ha podido realizar la operación:", e)
+    finally:
+        _liberar(conexion)
     
+def _valor_copy(valor):
+    # Convierte un valor de Python (o de NumPy/pandas) al formato de texto de COPY
+    if hasattr(valor, "item") and not isinstance(valor, (str, bytes)):
+        try:
+            valor = valor.item()  # Escalares de NumPy → tipos de Python
+        except (ValueError, TypeError):
+            pass
+    if valor is None or valor is pd.NA or valor is pd.NaT:
+        return "\\N"
+    if isinstance(valor, bool):
+        return "t" if valor else "f"
+    if isinstance(valor, float):
+        return "\\N" if math.isnan(valor) else repr(valor)
+    if isinstance(valor, (int, Decimal)):
+        return str(valor)
+    if isinstance(valor, (datetime, date, hora)):
+        return valor.isoformat()
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return "\\\\x" + bytes(valor).hex()
+    if isinstance(valor, (dict, list, tuple)):
+        valor = json.dumps(valor, ensure_ascii=False, default=str)
+    texto = str(valor)
+    # Caracteres especiales del formato de texto de COPY
+    return texto.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _copiar(cursor, tabla, columnas, filas, tamano_lote, progreso=None):
+    # Envía `filas` a la tabla con COPY, por bloques de `tamano_lote` filas escritos en un buffer en memoria
+    sentencia = f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT text, NULL '\\N')"
+    total = len(filas) if hasattr(filas, "__len__") else None
+    progreso = (total or 0) > tamano_lote if progreso is None else progreso
+    barra = tqdm(total=total, desc=f"COPY {tabla}", unit="filas") if progreso else None
+    copiadas = 0
+    iterador = iter(filas)
+    inicio = monotonic()
+    while True:
+        buffer = io.StringIO()
+        n = 0
+        for fila in iterador:
+            buffer.write("\t".join(_valor_copy(valor) for valor in fila))
+            buffer.write("\n")
+            n += 1
+            if n >= tamano_lote:
+                break
+        if n == 0:
+            break
+        buffer.seek(0)
+        cursor.copy_expert(sentencia, buffer)
+        copiadas += n
+        if barra is not None:
+            barra.update(n)
+        if n < tamano_lote:
+            break
+    if barra is not None:
+        barra.close()
+    duracion = monotonic() - inicio
+    if copiadas and duracion > 0:
+        print(f"COPY {tabla}: {copiadas} filas en {duracion:.1f} s ({copiadas / duracion:.0f} filas/s)")
+    return copiadas
+
+def copiar_datos(conexion, tabla, datos, columnas=None, tamano_lote=None, progreso=None):
+    """
+    Carga masiva de datos en una tabla con `COPY ... FROM STDIN`.
+
+    Parámetros:
+    -----------
+    conexion : psycopg2.extensions.connection
+        Conexión a la base de datos (de `conectar_bd()` o de `with conexion_bd()`).
+
+    tabla : str
+        Tabla de destino.
+
+    datos : pandas.DataFrame o list[tuple]
+        Filas a cargar. Con un DataFrame, sus columnas se usan como nombres de columna si no se indica `columnas`.
+
+    columnas : list[str], opcional
+        Columnas de la tabla, en el orden de los valores de cada fila. Obligatorio si `datos` es una lista de tuplas.
+
+    tamano_lote : int, opcional
+        Filas por bloque (por defecto `LOTE_COPY`). Cada bloque se escribe en un buffer en memoria y se envía con un único COPY,
+        así la memoria no crece con el número total de filas.
+
+    progreso : bool, opcional
+        Mostrar una barra de progreso (por defecto, si hay más de un bloque).
+
+    Retorna:
+    --------
+    int
+        Número de filas cargadas (0 si ha habido un error).
+
+    Notas:
+    ------
+    - Los valores se serializan según su tipo: `None`/`NaN`/`NaT` como nulo (`\\N`), booleanos como `t`/`f`,
+      fechas en ISO 8601, diccionarios y listas como JSON, y el texto con los caracteres especiales escapados.
+    - Todos los bloques van en la misma transacción: si uno falla, no se carga ninguno.
+    - La conexión se libera al terminar, igual que en `insertar_muchos_datos`.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    conexion = conectar_bd()
+    copiar_datos(conexion, "playlists", playlists_df[["playlist_name", "playlist_id", "follower_id"]])
+    """
+    if isinstance(datos, pd.DataFrame):
+        columnas = list(columnas or datos.columns)
+        filas = list(datos[columnas].itertuples(index=False, name=None))
+    else:
+        if columnas is None:
+            raise ValueError("Con una lista de tuplas hay que indicar las columnas")
+        filas = datos
+    try:
+        cursor = conexion.cursor()
+        copiadas = _copiar(cursor, tabla, columnas, filas, tamano_lote or LOTE_COPY, progreso)
+        conexion.commit()
+        cursor.close()
+        limpiar_cache([tabla])
+        print("Se han añadido los valores correctamente")
+        return copiadas
+    except Exception as e:
+        if conexion is not None and not conexion.closed:
+            conexion.rollback()
+        print("No se ha podido realizar la operación:", e)
+        return 0
+    finally:
+        _liberar(conexion)
+
+def upsert_muchos_datos(conexion, query, tupla, claves=None, actualizar=True, page_size=None):
+    """
+    Inserta múltiples registros de forma idempotente: las filas que ya existen (misma clave natural) se actualizan
+    o se omiten en lugar de duplicarse o abortar la carga.
+
+    Parámetros:
+    -----------
+    conexion : psycopg2.extensions.connection
+        Conexión a la base de datos (de `conectar_bd()` o de `with conexion_bd()`).
+
+    query : str
+        El mismo INSERT sencillo que se usaría con `insertar_muchos_datos`, por ejemplo
+        `INSERT INTO followers(username,user_id,brand_id) VALUES (%s,%s,%s)`.
+
+    tupla : list[tuple]
+        Registros a cargar.
+
+    claves : list[str], opcional
+        Columnas de la clave natural. Por defecto, las de `CLAVES_NATURALES` para la tabla de la consulta.
+
+    actualizar : bool, opcional (por defecto True)
+        - True: las filas existentes se actualizan con los valores nuevos (solo si alguno ha cambiado).
+        - False: las filas existentes se dejan como están (`ON CONFLICT DO NOTHING`).
+
+    page_size : int, opcional
+        Filas por sentencia de `execute_values` (por defecto `PAGINA_UPSERT`).
+
+    Retorna:
+    --------
+    dict
+        `{"insertadas": n, "actualizadas": n, "omitidas": n}`. Las omitidas son filas que ya existían sin cambios
+        (o repetidas dentro de la propia carga). Si hay un error, se deshace la carga y se devuelve `None`.
+
+    Proceso:
+    --------
+    1. Descompone la consulta (`PATRON_INSERT`) en tabla y columnas y elimina las filas con la clave repetida
+       (se queda con la última), porque una misma sentencia no puede actualizar dos veces la misma fila.
+    2. Ejecuta `INSERT ... VALUES %s ON CONFLICT (claves) DO UPDATE SET ... WHERE (valores) IS DISTINCT FROM (nuevos)
+       RETURNING (xmax = 0)` con `execute_values`, por páginas de `page_size` filas.
+    3. Cuenta las filas devueltas: `xmax = 0` indica una fila nueva y el resto son actualizaciones.
+       Las filas no devueltas ya existían con los mismos valores.
+    4. Confirma la transacción y libera la conexión.
+
+    Notas:
+    ------
+    - La tabla necesita un índice único (o restricción UNIQUE) sobre las columnas de la clave: `crear_indices_unicos()`.
+    - Tras una carga fallida basta con volver a ejecutar la misma subida: solo se escriben las filas que faltan.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    conexion = conectar_bd()
+    query = '''INSERT INTO followers(username,user_id,brand_id) VALUES (%s,%s,%s)'''
+    upsert_muchos_datos(conexion, query, generar_tupla(followers_df))
+    """
+    try:
+        coincidencia = PATRON_INSERT.match(query)
+        if coincidencia is None:
+            raise ValueError("La consulta tiene que ser un INSERT INTO tabla(columnas) VALUES (%s,...)")
+        tabla = coincidencia.group(1)
+        columnas = [columna.strip() for columna in coincidencia.group(2).split(",")]
+        claves = list(claves or CLAVES_NATURALES.get(tabla.strip('"').split(".")[-1], []))
+        if not claves:
+            raise ValueError(f"No hay clave natural para la tabla {tabla}: añádela a CLAVES_NATURALES o usa el parámetro claves")
+        posiciones = [columnas.index(clave) for clave in claves]
+
+        # Quitar filas con la clave repetida (se queda la última)
+        filas = {}
+        for fila in tupla:
+            filas[tuple(fila[posicion] for posicion in posiciones)] = tuple(fila)
+        filas = list(filas.values())
+        repetidas = len(tupla) - len(filas)
+
+        resto = [columna for columna in columnas if columna not in claves]
+        conflicto = f"ON CONFLICT ({', '.join(claves)})"
+        if actualizar and resto:
+            asignaciones = ", ".join(f"{columna} = EXCLUDED.{columna}" for columna in resto)
+            actuales = ", ".join(f"{tabla}.{columna}" for columna in resto)
+            nuevos = ", ".join(f"EXCLUDED.{columna}" for columna in resto)
+            conflicto += f" DO UPDATE SET {asignaciones} WHERE ROW({actuales}) IS DISTINCT FROM ROW({nuevos})"
+        else:
+            conflicto += " DO NOTHING"
+        sentencia = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES %s {conflicto} RETURNING (xmax = 0)"
+
+        cursor = conexion.cursor()
+        resultado = execute_values(cursor, sentencia, filas, page_size=page_size or PAGINA_UPSERT, fetch=True)
+        conexion.commit()
+        cursor.close()
+        limpiar_cache([tabla])
+
+        insertadas = sum(1 for (nueva,) in resultado if nueva)
+        actualizadas = len(resultado) - insertadas
+        conteo = {"insertadas": insertadas, "actualizadas": actualizadas, "omitidas": len(filas) - len(resultado) + repetidas}
+        print(f"{tabla}: {conteo['insertadas']} insertadas, {conteo['actualizadas']} actualizadas, {conteo['omitidas']} omitidas")
+        return conteo
+    except Exception as e:
+        if conexion is not None and not conexion.closed:
+            conexion.rollback()
+        print("No se ha podido realizar la operación:", e)
+    finally:
+        _liberar(conexion)
+
+def crear_indices_unicos(tablas=None):
+    """
+    Crea (si no existen) los índices únicos sobre las claves naturales de `CLAVES_NATURALES`, necesarios para `upsert_muchos_datos`.
+
+    Parámetros:
+    -----------
+    tablas : list[str], opcional
+        Tablas a preparar (por defecto, todas las de `CLAVES_NATURALES`).
+
+    Notas:
+    ------
+    - Si una tabla ya tiene filas duplicadas por su clave natural, el índice no se puede crear: se muestra el error
+      y se continúa con las demás (habrá que eliminar los duplicados primero).
+    """
+    with conexion_bd() as conexion:
+        for tabla in tablas or CLAVES_NATURALES:
+            claves = CLAVES_NATURALES[tabla]
+            cursor = conexion.cursor()
+            try:
+                cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{tabla}_{'_'.join(claves)} ON {tabla} ({', '.join(claves)})")
+                conexion.commit()
+                print(f"Índice único de {tabla} ({', '.join(claves)}) preparado")
+            except Exception as e:
+                conexion.rollback()
+                print(f"No se ha podido crear el índice único de {tabla}:", e)
+            finally:
+                cursor.close()
+
 def generar_tupla(df,drop_index=False,fix_np = False):
     """
     Convierte un DataFrame de pandas en una lista de tuplas para su uso en operaciones de inserción en bases de datos.
@@ -222,13 +884,16 @@ def generar_tupla(df,drop_index=False,fix_np = False):
 
     return tupla
 
-def consulta_sql(conexion, query):
+def consulta_sql(conexion, query, parametros=None, cache=True):
     """
     Ejecuta una consulta SQL en la base de datos PostgreSQL y devuelve los resultados en un DataFrame de pandas.
 
     Args:
         conexion: Objeto de conexión a la base de datos, previamente establecido.
         query (str): Cadena de texto con la consulta SQL a ejecutar.
+        parametros (tuple, optional): Valores de los placeholders (%s) de la consulta.
+        cache (bool, optional): Si es True (por defecto), los SELECT se sirven desde la caché de resultados mientras
+                                no caduquen (`CACHE_TTL`) ni se escriba en las tablas que leen.
 
     Returns:
         pandas.DataFrame: DataFrame que contiene los resultados de la consulta, con las columnas correspondientes.
@@ -238,13 +903,119 @@ def consulta_sql(conexion, query):
         >>> print(df.head())
         
     Notes:
-        La conexión a la base de datos se cierra después de ejecutar la consulta.
-    """
-    cursor = conexion.cursor()
-    cursor.execute(query)
-    resultados = cursor.fetchall()
-    columnas = [col[0] for col in cursor.description]
-    cursor.close()
-    conexion.close()
+        La conexión se libera después de ejecutar la consulta: vuelve al pool si salió de `conectar_bd()`
+        y se deja abierta si pertenece a un bloque `with conexion_bd()`.
+
+        La caché guarda el resultado con la consulta normalizada (sin espacios ni mayúsculas de más) y sus parámetros
+        como clave. Se invalida sola cuando `modificar_bd`, `insertar_muchos_datos`, `copiar_datos` o `upsert_muchos_datos`
+        escriben en una tabla leída, y expulsa los resultados usados hace más tiempo al superar `CACHE_MAXIMO_MB`
+        (ver `configurar_cache`, `limpiar_cache` y `estadisticas_cache`). Cada llamada recibe su propia copia del resultado.
+        Solo se cachean los SELECT cuyas tablas se reconocen con seguridad: no los que tienen subconsultas, funciones
+        o varias tablas separadas por comas en el FROM, ni los que no leen ninguna tabla o usan funciones volátiles
+        (`nextval`, `now`...).
+    """
+    clave, tablas = _clave_cache(query, parametros) if cache else (None, None)
+    if clave is not None:
+        df, version = _leer_cache(clave)
+        if df is not None:
+            _liberar(conexion)
+            return df
+    try:
+        cursor = conexion.cursor()
+        cursor.execute(query, parametros)
+        resultados = cursor.fetchall()
+        columnas = [col[0] for col in cursor.description]
+        cursor.close()
+        conexion.commit()
+    finally:
+        _liberar(conexion)
     df = pd.DataFrame(resultados,columns=columnas)
-    return df
\ No newline at end of file
+    if clave is not None:
+        _guardar_cache(clave, df, tablas, version)
+    return df
+
+def consulta_sql_por_bloques(conexion, query, parametros=None, columnas=None, tamano_bloque=None, formato="pandas"):
+    """
+    Ejecuta una consulta SQL con un cursor del servidor y devuelve los resultados por bloques, sin cargar la tabla entera en memoria.
+
+    Parámetros:
+    -----------
+    conexion : psycopg2.extensions.connection
+        Conexión a la base de datos (de `conectar_bd()` o de `with conexion_bd()`).
+
+    query : str
+        Consulta SQL (puede llevar placeholders `%s`).
+
+    parametros : tuple, opcional
+        Valores de los placeholders de la consulta.
+
+    columnas : list[str], opcional
+        Columnas a devolver. La consulta se envuelve en `SELECT columnas FROM (query)`, de modo que la base de datos
+        solo envía esas columnas (por ejemplo, `SELECT * FROM followers` con `columnas=["id", "user_id"]`).
+
+    tamano_bloque : int, opcional
+        Filas por bloque (por defecto `BLOQUE_CONSULTA`).
+
+    formato : str, opcional (por defecto "pandas")
+        - "pandas": cada bloque es un `pandas.DataFrame`.
+        - "arrow": cada bloque es un `pyarrow.RecordBatch` (requiere pyarrow).
+
+    Retorna:
+    --------
+    generator
+        Bloques de como mucho `tamano_bloque` filas, en el orden de la consulta.
+
+    Proceso:
+    --------
+    1. Declara un cursor con nombre (cursor del servidor): PostgreSQL ejecuta la consulta y guarda el resultado de su lado.
+    2. Pide las filas con `fetchmany(tamano_bloque)` y devuelve cada bloque al consumidor antes de pedir el siguiente.
+    3. Al terminar (o si se deja de consumir el generador), cierra el cursor y libera la conexión.
+
+    Notas:
+    ------
+    - La memoria usada depende de `tamano_bloque` y no del tamaño de la tabla.
+    - La conexión queda ocupada mientras se consume el generador (el cursor del servidor vive dentro de una transacción).
+    - Para juntar los bloques en un único DataFrame está `consulta_sql()`.
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    conexion = conectar_bd()
+    for bloque in consulta_sql_por_bloques(conexion, "SELECT * FROM followers", columnas=["id", "user_id"]):
+        print(len(bloque))
+    """
+    if formato not in ("pandas", "arrow"):
+        raise ValueError('El formato tiene que ser "pandas" o "arrow"')
+    if formato == "arrow" and pa is None:
+        raise ImportError("Para devolver bloques de Arrow hay que instalar pyarrow")
+    tamano_bloque = tamano_bloque or BLOQUE_CONSULTA
+    cursor = None
+    try:
+        if columnas:
+            seleccion = ", ".join(extensions.quote_ident(columna, conexion) for columna in columnas)
+            query = f"SELECT {seleccion} FROM ({query.strip().rstrip(';')}) AS consulta"
+        cursor = conexion.cursor(name=f"consulta_por_bloques_{next(_cursores)}")
+        cursor.itersize = tamano_bloque
+        cursor.execute(query, parametros)
+        nombres = None
+        while True:
+            filas = cursor.fetchmany(tamano_bloque)
+            if nombres is None:
+                nombres = [col[0] for col in cursor.description]
+            if not filas:
+                break
+            if formato == "arrow":
+                yield pa.RecordBatch.from_arrays([pa.array(valores) for valores in zip(*filas)], names=nombres)
+            else:
+                yield pd.DataFrame(filas, columns=nombres)
+        cursor.close()
+        cursor = None
+        conexion.commit()
+    finally:
+        if cursor is not None and not conexion.closed:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            conexion.rollback()
+        _liberar(conexion)
@@ -23,8 +23,8 @@ warnings.filterwarnings("ignore")
 #######################################################################################
 ##            Cálculos y distancia                                                   ##
 #######################################################################################
-# Para cálculos de distancia euclidiana
-from scipy.spatial.distance import pdist, squareform  
+# Diccionario de IDs: los rankings se comparan como arrays de enteros
+import src.soporte_ids as ids  
 
 #######################################################################################
 ##            Funciones personalizadas para Spotify y Base de Datos                  ##
@@ -33,6 +33,8 @@ from scipy.spatial.distance import pdist, squareform
 import src.soporte_spotify as api  
 # Funciones para manejar la base de datos SQL
 import src.soporte_sql as sql  
+# Rankings aproximados con memoria acotada (Space-Saving)
+import src.soporte_topk as topk  
 
 #######################################################################################
 ##            Configuración y manejo de datos iniciales                              ##
@@ -130,7 +132,7 @@ def generate_all_saved_tracks(sp, limit=50):
     """
 
     all_tracks = []  # Lista para almacenar todas las canciones
-    results = sp.current_user_saved_tracks(limit=limit)  # Primera página
+    results = api.llamada_spotipy(sp.current_user_saved_tracks, limit=limit)  # Primera página
 
     while results:
         # Añadir las canciones de la página actual a la lista
@@ -138,7 +140,7 @@ def generate_all_saved_tracks(sp, limit=50):
 
         # Seguir al siguiente enlace, si existe
         if results['next']:
-            results = sp.next(results)
+            results = api.llamada_spotipy(sp.next, results)
         else:
             break
     
@@ -226,7 +228,7 @@ def generate_all_top_tracks(sp, limit=20):
     """
 
     all_tracks = []  # Lista para almacenar todas las canciones
-    results = sp.current_user_top_tracks(limit=limit,time_range="long_term")  # Primera página
+    results = api.llamada_spotipy(sp.current_user_top_tracks, limit=limit, time_range="long_term")  # Primera página
 
     while results:
         # Añadir las canciones de la página actual a la lista
@@ -234,7 +236,7 @@ def generate_all_top_tracks(sp, limit=20):
 
         # Seguir al siguiente enlace, si existe
         if results['next']:
-            results = sp.next(results)
+            results = api.llamada_spotipy(sp.next, results)
         else:
             break
     
@@ -289,7 +291,7 @@ def generate_all_top_tracks(sp, limit=20):
 #######################################################################################
 ##                Generar Ranking Artistas y subir a la Base de Datos                ##
 #######################################################################################
-def generate_user_artist_ranking(sp, supabase_credential):
+def generate_user_artist_ranking(sp, supabase_credential, capacidad_sketch=None, top_n=None):
     """
     Genera un ranking de artistas basado en las canciones guardadas y las más escuchadas por el usuario en Spotify, y lo almacena en la base de datos.
 
@@ -301,6 +303,13 @@ def generate_user_artist_ranking(sp, supabase_credential):
     supabase_credential : object
         Credenciales de autenticación para interactuar con la base de datos en Supabase.
 
+    capacidad_sketch : int, opcional
+        Si se indica, el ranking se calcula de forma aproximada con `topk.EspacioAhorro` de esa capacidad
+        (memoria acotada aunque el usuario tenga muchísimos artistas distintos). Se muestra la cota del error.
+
+    top_n : int, opcional
+        Si se indica, solo se guardan los `top_n` artistas más repetidos.
+
     Retorna:
     -------
     None
@@ -310,7 +319,7 @@ def generate_user_artist_ranking(sp, supabase_credential):
     - Obtiene el ID del usuario actual de Spotify.
     - Recupera los artistas de las canciones más escuchadas (`top_tracks`) y las canciones guardadas (`tracks_user_likes`) desde Supabase.
     - Combina los nombres de los artistas en una lista.
-    - Genera un DataFrame que cuenta la frecuencia de aparición de cada artista.
+    - Genera un DataFrame que cuenta la frecuencia de aparición de cada artista (exacta, o aproximada con `capacidad_sketch`).
     - Formatea el DataFrame para incluir el ID de usuario y los artistas con su número de apariciones.
     - Establece una conexión con la base de datos mediante `sql.conectar_bd()`.
     - Inserta los datos en la tabla `user_artists_ranking` usando una consulta SQL parametrizada.
@@ -327,12 +336,20 @@ def generate_user_artist_ranking(sp, supabase_credential):
     for artist in saved_tracks:
         artists_names.append(artist["artist_name"])
     
-    df = pd.DataFrame({
-        "artist_name" : artists_names
-    })
-
-    df = df["artist_name"].value_counts().reset_index()
-    df.columns = ["artist_name", "number_of_appearances"]
+    if capacidad_sketch:
+        ranking, error = topk.ranking_aproximado(artists_names, top_n or capacidad_sketch, capacidad_sketch)
+        if error:
+            print(f"Ranking de artistas aproximado: error máximo {error}")
+        df = pd.DataFrame(ranking, columns=["artist_name", "number_of_appearances"])
+    else:
+        df = pd.DataFrame({
+            "artist_name" : artists_names
+        })
+
+        df = df["artist_name"].value_counts().reset_index()
+        df.columns = ["artist_name", "number_of_appearances"]
+        if top_n is not None:
+            df = df.head(top_n)
 
     df["user_id"] = user_id
     artist_ranking = df[["user_id","artist_name","number_of_appearances"]]
@@ -383,7 +400,7 @@ def mapeo_genres():
 #######################################################################################
 ##              Obtener Géneros y Subgéneros y subir a la Base de Datos              ##
 #######################################################################################
-def generate_user_genre_and_subgenre_ranking(sp, supabase_credential):
+def generate_user_genre_and_subgenre_ranking(sp, supabase_credential, capacidad_sketch=None):
     """
     Genera y almacena un ranking de géneros y subgéneros musicales basado en los artistas más escuchados y las canciones guardadas del usuario en Spotify.
 
@@ -395,6 +412,10 @@ def generate_user_genre_and_subgenre_ranking(sp, supabase_credential):
     supabase_credential : object
         Credenciales de autenticación para interactuar con la base de datos en Supabase.
 
+    capacidad_sketch : int, opcional
+        Si se indica, el ranking de subgéneros se calcula de forma aproximada (ver `api.obtener_generos`),
+        guardando solo los `capacidad_sketch` subgéneros más frecuentes.
+
     Retorna:
     -------
     None
@@ -404,7 +425,7 @@ def generate_user_genre_and_subgenre_ranking(sp, supabase_credential):
     - Obtiene el ID del usuario actual de Spotify.
     - Recupera los artistas de las canciones más escuchadas (`top_tracks`) y las canciones guardadas (`tracks_user_likes`) desde Supabase.
     - Extrae los nombres e identificadores de los artistas en listas y genera un diccionario único de ID de artista a nombre de artista.
-    - Solicita un token de autenticación y obtiene los subgéneros asociados a los artistas.
+    - Obtiene el token compartido (`api.obtener_token()`) y los subgéneros asociados a los artistas.
     - Crea un DataFrame con los subgéneros y su número de apariciones.
     - Inserta los datos en la tabla `user_subgenres` en la base de datos.
     - Utiliza un mapeo de subgéneros a géneros principales (`mapeo_genres`) para agrupar los subgéneros en géneros principales.
@@ -435,9 +456,9 @@ def generate_user_genre_and_subgenre_ranking(sp, supabase_credential):
         if row.artist_id not in dictio:
             dictio[row.artist_id] = row.artist_name
 
-    # Solicitar token y obtener artistas
-    token = api.request_token(silent=True)
-    subgeneros = api.obtener_generos(token,dictio)
+    # Obtener el token compartido y los subgéneros de los artistas
+    token = api.obtener_token()
+    subgeneros = api.obtener_generos(token,dictio,capacidad=capacidad_sketch)
     nombres_subgenero = list(subgeneros.keys())
     apariciones = list(subgeneros.values())
 
@@ -743,6 +764,64 @@ def obtener_resto_subgeneros(supabase_credential, user_id, start = 0, end = 0):
 #######################################################################################
 ##                        Sistema Recomendación por Artista                          ##
 #######################################################################################
+def afinidad_rankings(ranking_usuario, ranking_marca, diccionario=None):
+    """
+    Calcula el porcentaje de afinidad entre dos rankings (de artistas, géneros o subgéneros) trabajando con arrays de enteros.
+
+    Parámetros:
+    ----------
+    ranking_usuario : iterable[str]
+        Nombres del ranking del usuario, del más al menos escuchado.
+
+    ranking_marca : iterable[str]
+        Nombres del ranking de la marca, del más al menos escuchado.
+
+    diccionario : soporte_ids.DiccionarioIds, opcional
+        Diccionario de nombres con el que se codifican los rankings (por defecto, el compartido
+        `ids.diccionario_compartido("nombres")`, cargado una vez por proceso y mapeado en memoria).
+
+    Retorna:
+    -------
+    float
+        Afinidad entre 0 y 100 (0 si no hay elementos en común, 100 si solo hay uno).
+
+    Descripción:
+    -----------
+    - Codifica los nombres de ambos rankings con el diccionario de nombres compartido (`soporte_ids.codificar_rankings`):
+      los nombres ya guardados se buscan en bloque en el archivo mapeado y solo los nuevos se añaden (en memoria).
+    - Encuentra los elementos en común con `np.intersect1d` sobre los códigos, junto con su posición en cada ranking.
+    - Asigna a cada elemento en común un peso `1 / posición` en cada ranking y normaliza los pesos de cada lado.
+    - Calcula la distancia euclidiana entre los dos vectores de pesos y la convierte en un porcentaje de afinidad.
+
+    Nota:
+    ----
+    - Da el mismo resultado que la comparación anterior con conjuntos de cadenas, `isin` y `pdist`,
+      sin crear DataFrames intermedios ni buscar cada nombre por separado.
+    """
+    diccionario = diccionario if diccionario is not None else ids.diccionario_compartido("nombres")
+    codigos_usuario, codigos_marca = ids.codificar_rankings(ranking_usuario, ranking_marca, diccionario=diccionario)
+
+    # Elementos en común y su posición (primera aparición) en cada ranking
+    comunes, posicion_usuario, posicion_marca = np.intersect1d(codigos_usuario, codigos_marca, return_indices=True)
+
+    # Si no hay elementos en común la afinidad es del 0%; si solo hay uno, del 100%
+    if len(comunes) == 0:
+        return 0.0
+    if len(comunes) == 1:
+        return 100.0
+
+    # Pesos en base a la posición en el ranking, normalizados para evitar sesgos por diferencias de tamaño
+    pesos_usuario = 1 / (posicion_usuario + 1)
+    pesos_marca = 1 / (posicion_marca + 1)
+    pesos_usuario = pesos_usuario / pesos_usuario.sum()
+    pesos_marca = pesos_marca / pesos_marca.sum()
+
+    # Distancia euclidiana entre los vectores, convertida en afinidad (invirtiendo la escala)
+    distancia = np.linalg.norm(pesos_usuario - pesos_marca)
+    afinidad = max(0, (1 - distancia) * 100)
+
+    return float(round(afinidad,2))
+
 def get_brand_artist_ranking(supabase_credential,brand_id):
     """
     Obtiene un DataFrame con el ranking de artistas más escuchados por los seguidores de una marca desde la base de datos en Supabase.
@@ -873,57 +952,9 @@ def obtener_afinidad_por_artista(supabase_credential,brand_id,user_id):
     # Obtener los rankings de la marca y el usuario
     brand_df = get_brand_artist_ranking(supabase_credential, brand_id)
     user_df = get_user_artist_ranking(supabase_credential, user_id)
-    
-    # Obtener los artistas en común
-    artistas_comunes = set(user_df['artista']).intersection(set(brand_df['artista']))
-    
-    # Si no hay artistas en común la afinidad es del 0%
-    if len(artistas_comunes) == 0:
-        return 0.0  
-    
-    user_df_filtrado = user_df[user_df['artista'].isin(artistas_comunes)]
-    brand_df_filtrado = brand_df[brand_df['artista'].isin(artistas_comunes)]
-
-    # Reseteamos el Index
-    user_df_filtrado.reset_index(drop=True, inplace=True)
-    brand_df_filtrado.reset_index(drop=True, inplace=True)
-
-    # Asignar pesos en base a la posición en el ranking
-    user_df_filtrado["peso"] = 1 / user_df_filtrado["ranking"]
-    brand_df_filtrado["peso"] = 1 / brand_df_filtrado["ranking"]
-
-    # Normalizar los pesos para evitar sesgos por diferencias de tamaño
-    user_df_filtrado["peso"] /= user_df_filtrado["peso"].sum()
-    brand_df_filtrado["peso"] /= brand_df_filtrado["peso"].sum()
-
-    # Poner como index artista y peso se queda como columna
-    pesos_user = user_df_filtrado.set_index("artista")["peso"]
-    pesos_brand = brand_df_filtrado.set_index("artista")["peso"]
-
-    # Ordenamos los artistas por orden alfabético para que los vectores estén alineados
-    sorted_pesos = sorted(set(pesos_user.index).intersection(set(pesos_brand.index)))
-
-    # Si solo hay un artista en común, asumimos 100% de afinidad
-    if len(sorted_pesos) == 1:
-        return 100.0 
-
-    # Generamos los vectores
-    user_vector = np.array([pesos_user.get(a, 0) for a in sorted_pesos])
-    brand_vector = np.array([pesos_brand.get(a, 0) for a in sorted_pesos])
 
-    # Crear matriz de comparación
-    matriz_pesos = np.vstack([user_vector, brand_vector])
-
-    # Calcular la matriz de distancias con pdist
-    matriz_distancias = squareform(pdist(matriz_pesos, metric="euclidean"))
-
-    # Extraer la distancia entre usuario y marca
-    distancia = matriz_distancias[0, 1]
-
-    # Convertimos la distancia en afinidad (invirtiendo la escala)
-    afinidad = max(0, (1 - distancia) * 100)
-
-    return float(round(afinidad,2))
+    # Comparar los rankings como arrays de enteros
+    return afinidad_rankings(user_df['artista'], brand_df['artista'])
 
 #######################################################################################
 ##                        Sistema Recomendación por Género                           ##
@@ -1058,57 +1089,9 @@ def obtener_afinidad_por_genero(supabase_credential,brand_id,user_id):
     # Obtener los rankings de la marca y el usuario
     brand_df = get_brand_genre_ranking(supabase_credential, brand_id)
     user_df = get_user_genre_ranking(supabase_credential, user_id)
-    
-    # Obtener los generos en común
-    generos_comunes = set(user_df['genero']).intersection(set(brand_df['genero']))
-    
-    # Si no hay generos en común la afinidad es del 0%
-    if len(generos_comunes) == 0:
-        return 0.0  
-    
-    user_df_filtrado = user_df[user_df['genero'].isin(generos_comunes)]
-    brand_df_filtrado = brand_df[brand_df['genero'].isin(generos_comunes)]
-
-    # Reseteamos el Index
-    user_df_filtrado.reset_index(drop=True, inplace=True)
-    brand_df_filtrado.reset_index(drop=True, inplace=True)
 
-    # Asignar pesos en base a la posición en el ranking
-    user_df_filtrado["peso"] = 1 / user_df_filtrado["ranking"]
-    brand_df_filtrado["peso"] = 1 / brand_df_filtrado["ranking"]
-
-    # Normalizar los pesos para evitar sesgos por diferencias de tamaño
-    user_df_filtrado["peso"] /= user_df_filtrado["peso"].sum()
-    brand_df_filtrado["peso"] /= brand_df_filtrado["peso"].sum()
-
-    # Poner como index genero y peso se queda como columna
-    pesos_user = user_df_filtrado.set_index("genero")["peso"]
-    pesos_brand = brand_df_filtrado.set_index("genero")["peso"]
-
-    # Ordenamos los generos por orden alfabético para que los vectores estén alineados
-    sorted_pesos = sorted(set(pesos_user.index).intersection(set(pesos_brand.index)))
-
-    # Si solo hay un genero en común, asumimos 100% de afinidad
-    if len(sorted_pesos) == 1:
-        return 100.0 
-
-    # Generamos los vectores
-    user_vector = np.array([pesos_user.get(a, 0) for a in sorted_pesos])
-    brand_vector = np.array([pesos_brand.get(a, 0) for a in sorted_pesos])
-
-    # Crear matriz de comparación
-    matriz_pesos = np.vstack([user_vector, brand_vector])
-
-    # Calcular la matriz de distancias con pdist
-    matriz_distancias = squareform(pdist(matriz_pesos, metric="euclidean"))
-
-    # Extraer la distancia entre usuario y marca
-    distancia = matriz_distancias[0, 1]
-
-    # Convertimos la distancia en afinidad (invirtiendo la escala)
-    afinidad = max(0, (1 - distancia) * 100)
-
-    return float(round(afinidad,2))
+    # Comparar los rankings como arrays de enteros
+    return afinidad_rankings(user_df['genero'], brand_df['genero'])
 
 #######################################################################################
 ##                        Sistema Recomendación por Subgénero                        ##
@@ -1243,54 +1226,6 @@ def obtener_afinidad_por_subgenero(supabase_credential,brand_id,user_id):
     # Obtener los rankings de la marca y el usuario
     brand_df = get_brand_subgenre_ranking(supabase_credential, brand_id)
     user_df = get_user_subgenre_ranking(supabase_credential, user_id)
-    
-    # Obtener los subgeneros en común
-    generos_comunes = set(user_df['subgenero']).intersection(set(brand_df['subgenero']))
-    
-    # Si no hay subgeneros en común la afinidad es del 0%
-    if len(generos_comunes) == 0:
-        return 0.0  
-    
-    user_df_filtrado = user_df[user_df['subgenero'].isin(generos_comunes)]
-    brand_df_filtrado = brand_df[brand_df['subgenero'].isin(generos_comunes)]
-
-    # Reseteamos el Index
-    user_df_filtrado.reset_index(drop=True, inplace=True)
-    brand_df_filtrado.reset_index(drop=True, inplace=True)
-
-    # Asignar pesos en base a la posición en el ranking
-    user_df_filtrado["peso"] = 1 / user_df_filtrado["ranking"]
-    brand_df_filtrado["peso"] = 1 / brand_df_filtrado["ranking"]
-
-    # Normalizar los pesos para evitar sesgos por diferencias de tamaño
-    user_df_filtrado["peso"] /= user_df_filtrado["peso"].sum()
-    brand_df_filtrado["peso"] /= brand_df_filtrado["peso"].sum()
-
-    # Poner como index subgeneros y peso se queda como columna
-    pesos_user = user_df_filtrado.set_index("subgenero")["peso"]
-    pesos_brand = brand_df_filtrado.set_index("subgenero")["peso"]
-
-    # Ordenamos los subgeneros por orden alfabético para que los vectores estén alineados
-    sorted_pesos = sorted(set(pesos_user.index).intersection(set(pesos_brand.index)))
-
-    # Si solo hay un subgenero en común, asumimos 100% de afinidad
-    if len(sorted_pesos) == 1:
-        return 100.0 
-
-    # Generamos los vectores
-    user_vector = np.array([pesos_user.get(a, 0) for a in sorted_pesos])
-    brand_vector = np.array([pesos_brand.get(a, 0) for a in sorted_pesos])
-
-    # Crear matriz de comparación
-    matriz_pesos = np.vstack([user_vector, brand_vector])
-
-    # Calcular la matriz de distancias con pdist
-    matriz_distancias = squareform(pdist(matriz_pesos, metric="euclidean"))
-
-    # Extraer la distancia entre usuario y marca
-    distancia = matriz_distancias[0, 1]
-
-    # Convertimos la distancia en afinidad (invirtiendo la escala)
-    afinidad = max(0, (1 - distancia) * 100)
 
-    return float(round(afinidad,2))
\ No newline at end of file
+    # Comparar los rankings como arrays de enteros
+    return afinidad_rankings(user_df['subgenero'], brand_df['subgenero'])
\ No newline at end of file
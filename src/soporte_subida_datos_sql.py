@@ -11,6 +11,12 @@ sys.path.append("../")
 # Importar el módulo personalizado para manejo de bases de datos SQL
 import src.soporte_sql as sql
 
+# Importar el módulo de lectura de los archivos intermedios (CSV con texto o Parquet con columnas tipadas)
+import src.soporte_almacenamiento as alm
+
+# Importar el diccionario de IDs de Spotify (códigos enteros compactos)
+import src.soporte_ids as ids_spotify
+
 #######################################################################################
 ##            Importación de bibliotecas para manipulación y análisis de datos         ##
 #######################################################################################
@@ -20,9 +26,6 @@ import pandas as pd
 # Importar la biblioteca JSON para trabajar con datos en formato JSON
 import json
 
-# Importar la biblioteca AST para convertir cadenas en estructuras de datos Python
-import ast
-
 #######################################################################################
 ##            Fin de los Imports                                                     ##
 #######################################################################################
@@ -68,7 +71,7 @@ def obtener_tabla_followers(followers_df, brand_id = 0):
     followers_df = followers_df[["username","user_id","brand"]]
     return followers_df
 
-def subir_followers(followers_df):
+def subir_followers(followers_df, metodo="auto"):
     """
     Inserta los datos de seguidores en la base de datos en la tabla `followers`.
 
@@ -77,6 +80,10 @@ def subir_followers(followers_df):
     followers_df : pandas.DataFrame
         DataFrame que contiene la información de los seguidores con las columnas `username`, `user_id` y `brand_id`.
 
+    metodo : str, opcional (por defecto "auto")
+        Método de inserción de `sql.insertar_muchos_datos()`. Con "upsert" la subida es idempotente: al repetirla tras un
+        fallo parcial solo se insertan las filas que faltan (las existentes se actualizan u omiten según su clave natural).
+
     Retorna:
     -------
     None
@@ -91,7 +98,38 @@ def subir_followers(followers_df):
 
     conexion = sql.conectar_bd()
     query = '''INSERT INTO followers(username,user_id,brand_id) VALUES (%s,%s,%s)'''
-    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(followers_df))
+    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(followers_df),metodo=metodo)
+
+def obtener_ids_followers(user_ids, tamano_bloque = 10000):
+    """
+    Obtiene el id en la base de datos de los seguidores indicados, leyendo la tabla `followers` por bloques.
+
+    Parámetros:
+    ----------
+    user_ids : iterable[str]
+        IDs de Spotify de los seguidores que se buscan.
+
+    tamano_bloque : int, opcional (por defecto 10000)
+        Filas de `followers` que se leen en cada bloque.
+
+    Retorna:
+    -------
+    pandas.DataFrame
+        DataFrame con las columnas `id`, `user_id` y `username` de los seguidores encontrados.
+
+    Descripción:
+    -----------
+    - Recorre `followers` con `sql.consulta_sql_por_bloques()` (cursor del servidor), pidiendo solo las columnas necesarias.
+    - De cada bloque se quedan solo las filas de los seguidores buscados, de modo que la memoria no depende del tamaño de la tabla.
+    """
+    user_ids = set(user_ids)
+    conexion = sql.conectar_bd()
+    query = '''SELECT * FROM followers'''
+    bloques = [bloque[bloque["user_id"].isin(user_ids)]
+               for bloque in sql.consulta_sql_por_bloques(conexion, query, columnas=["id","user_id","username"], tamano_bloque=tamano_bloque)]
+    if not bloques:
+        return pd.DataFrame(columns=["id","user_id","username"])
+    return pd.concat(bloques, ignore_index=True)
 
 def obtener_tabla_playlists(playlists_df, brand_id = 0):
     """
@@ -117,9 +155,9 @@ def obtener_tabla_playlists(playlists_df, brand_id = 0):
     - Consulta la base de datos para obtener la lista de marcas y sus IDs.
     - Verifica si el `brand_id` ingresado existe en la base de datos.
     - Si el `brand_id` no es válido, muestra un mensaje con los IDs de las marcas disponibles.
-    - Obtiene la lista de seguidores de la marca desde la base de datos.
+    - Obtiene de la base de datos el id de los seguidores de la marca (`obtener_ids_followers`, por bloques).
     - Realiza un merge entre los seguidores y sus playlists.
-    - Convierte la información de las playlists de string a diccionario (`ast.literal_eval`).
+    - Convierte la información de las playlists de string a diccionario (`alm.a_estructura`; los valores leídos de Parquet ya son diccionarios).
     - Genera un DataFrame con cada playlist, asignándola a su respectivo seguidor.
     - Devuelve un DataFrame con las columnas `playlist_name`, `playlist_id` y `id`.
     """
@@ -135,16 +173,12 @@ def obtener_tabla_playlists(playlists_df, brand_id = 0):
         return display(df)
     
     # Obtenemos el id de los usuarios desde la base de datos
-    conexion = sql.conectar_bd()
-    query = '''SELECT * FROM followers'''
-    df_users = sql.consulta_sql(conexion,query)
-    df_users = df_users[["id","user_id","username"]]
-    df_users.sample()
+    df_users = obtener_ids_followers(playlists_df["user_id"])
     
     # Realizamos merge y convertimos a diccionario las playlists
     unir = pd.merge(left=df_users,right=playlists_df,on="user_id")
     playlists = unir[["id","playlists"]]
-    playlists["playlists"] = playlists["playlists"].apply(ast.literal_eval)
+    playlists["playlists"] = playlists["playlists"].apply(alm.a_estructura)
 
     # Generamos la tabla de playlists
     id_list = []
@@ -168,7 +202,7 @@ def obtener_tabla_playlists(playlists_df, brand_id = 0):
     playlists = playlists[["playlist_name","playlist_id","id"]]
     return playlists
 
-def subir_playlists(playlists_df):
+def subir_playlists(playlists_df, metodo="auto"):
     """
     Inserta los datos de playlists en la base de datos en la tabla `playlists`.
 
@@ -177,6 +211,10 @@ def subir_playlists(playlists_df):
     playlists_df : pandas.DataFrame
         DataFrame que contiene la información de las playlists con las columnas `playlist_name`, `playlist_id` y `follower_id`.
 
+    metodo : str, opcional (por defecto "auto")
+        Método de inserción de `sql.insertar_muchos_datos()`. Con "upsert" la subida es idempotente: al repetirla tras un
+        fallo parcial solo se insertan las filas que faltan (las existentes se actualizan u omiten según su clave natural).
+
     Retorna:
     -------
     None
@@ -191,7 +229,7 @@ def subir_playlists(playlists_df):
 
     conexion = sql.conectar_bd()
     query = '''INSERT INTO playlists(playlist_name,playlist_id,follower_id) VALUES (%s,%s,%s)'''
-    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(playlists_df))
+    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(playlists_df),metodo=metodo)
 
 def obtener_tabla_reduced_playlists(playlists_df, brand_id = 0):
     """
@@ -217,9 +255,9 @@ def obtener_tabla_reduced_playlists(playlists_df, brand_id = 0):
     - Consulta la base de datos para obtener la lista de marcas y sus IDs.
     - Verifica si el `brand_id` ingresado existe en la base de datos.
     - Si el `brand_id` no es válido, muestra un mensaje con los IDs de las marcas disponibles.
-    - Convierte las cadenas de texto de la columna `playlists` a diccionarios reales (`ast.literal_eval`).
+    - Convierte las cadenas de texto de la columna `playlists` a diccionarios reales (`alm.a_estructura`; los valores leídos de Parquet ya son diccionarios).
     - Reduce las playlists por usuario a un máximo de 10 elementos.
-    - Obtiene la lista de seguidores de la marca desde la base de datos.
+    - Obtiene de la base de datos el id de los seguidores de la marca (`obtener_ids_followers`, por bloques).
     - Realiza un merge entre los seguidores y sus playlists reducidas.
     - Genera un DataFrame con cada playlist reducida, asignándola a su respectivo seguidor.
     - Devuelve un DataFrame con las columnas `playlist_name`, `playlist_id` y `id`.
@@ -236,8 +274,7 @@ def obtener_tabla_reduced_playlists(playlists_df, brand_id = 0):
         return display(df)
 
     # Convertir las cadenas de texto de la columna "playlists" a diccionarios reales
-    if type(playlists_df["playlists"][0]) == str:
-        playlists_df["playlists"] = playlists_df["playlists"].apply(ast.literal_eval)
+    playlists_df["playlists"] = playlists_df["playlists"].apply(alm.a_estructura)
 
     
     # Seleccionar columnas clave
@@ -267,10 +304,7 @@ def obtener_tabla_reduced_playlists(playlists_df, brand_id = 0):
     playlists_df = playlists_df[["user_id","reduced_playlists"]]
 
     # Obtenemos el id de los usuarios haciendo una consulta a la bd
-    conexion = sql.conectar_bd()
-    query = '''SELECT * FROM followers'''
-    df_users = sql.consulta_sql(conexion,query)
-    df_users = df_users[["id","user_id","username"]]
+    df_users = obtener_ids_followers(playlists_df["user_id"])
 
     # Realizamos merge y convertimos a diccionario "playlists"
     unir = pd.merge(left=df_users,right=playlists_df,on="user_id")
@@ -297,7 +331,7 @@ def obtener_tabla_reduced_playlists(playlists_df, brand_id = 0):
     playlists = playlists[["playlist_name","playlist_id","id"]]
     return playlists
 
-def subir_reduced_playlists(playlists):
+def subir_reduced_playlists(playlists, metodo="auto"):
     """
     Inserta los datos de playlists reducidas en la base de datos en la tabla `reduced_playlists`.
 
@@ -306,6 +340,10 @@ def subir_reduced_playlists(playlists):
     playlists : pandas.DataFrame
         DataFrame que contiene la información de las playlists reducidas con las columnas `playlist_name`, `playlist_id` y `follower_id`.
 
+    metodo : str, opcional (por defecto "auto")
+        Método de inserción de `sql.insertar_muchos_datos()`. Con "upsert" la subida es idempotente: al repetirla tras un
+        fallo parcial solo se insertan las filas que faltan (las existentes se actualizan u omiten según su clave natural).
+
     Retorna:
     -------
     None
@@ -320,7 +358,7 @@ def subir_reduced_playlists(playlists):
 
     conexion = sql.conectar_bd()
     query = '''INSERT INTO reduced_playlists(playlist_name,playlist_id,follower_id) VALUES (%s,%s,%s)'''
-    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(playlists))
+    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(playlists),metodo=metodo)
 
 def obtener_tabla_artistas(artistas_df,brand_id = 0, ruta_csv = "../datos/02 Base de Datos/tempsave.csv"):
     """
@@ -380,7 +418,7 @@ def obtener_tabla_artistas(artistas_df,brand_id = 0, ruta_csv = "../datos/02 Bas
 
     artistas = artistas_df[["brand","unique_artists"]]
     # Convertimos unique_artists a diccionario
-    artistas["unique_artists"] = artistas["unique_artists"].apply(ast.literal_eval)
+    artistas["unique_artists"] = artistas["unique_artists"].apply(alm.a_estructura)
     lista_brand = []
     nombres_artistas = []
     ids_artistas = []
@@ -403,7 +441,7 @@ def obtener_tabla_artistas(artistas_df,brand_id = 0, ruta_csv = "../datos/02 Bas
     print("Usa la funcion subir_artistas(artistas) para subir los datos")
     return artistas
 
-def subir_artistas(artistas_df):
+def subir_artistas(artistas_df, metodo="auto"):
     """
     Sube los datos de artistas a la base de datos.
 
@@ -415,6 +453,10 @@ def subir_artistas(artistas_df):
         - 'artist_id': Identificador único del artista.
         - 'brand_id': Identificador de la marca asociada.
 
+    metodo : str, opcional (por defecto "auto")
+        Método de inserción de `sql.insertar_muchos_datos()`. Con "upsert" la subida es idempotente: al repetirla tras un
+        fallo parcial solo se insertan las filas que faltan (las existentes se actualizan u omiten según su clave natural).
+
     Proceso:
     --------
     1. Establece una conexión con la base de datos utilizando la función `sql.conectar_bd()`.
@@ -430,7 +472,7 @@ def subir_artistas(artistas_df):
 
     conexion = sql.conectar_bd()
     query = '''INSERT INTO artists(artist_name,artist_id,brand_id) VALUES (%s,%s,%s)'''
-    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(artistas_df))
+    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(artistas_df),metodo=metodo)
 
 def obtener_ranking_artistas(ranking_df,brand_id = 0, ruta_csv = "../datos/02 Base de Datos/00_tempsaves/tempsave_ranking.csv"):
     """
@@ -490,7 +532,7 @@ def obtener_ranking_artistas(ranking_df,brand_id = 0, ruta_csv = "../datos/02 Ba
 
     ranking_art = ranking_df[["brand","artist_ranking"]]
     # Convertimos unique_artists a lista
-    ranking_art["artist_ranking"] = ranking_art["artist_ranking"].apply(lambda x: ast.literal_eval(x) if pd.notna(x) else [])
+    ranking_art["artist_ranking"] = ranking_art["artist_ranking"].apply(lambda x: alm.a_estructura(x, []))
     
     lista_brands = []
     lista_artistas = []
@@ -512,7 +554,7 @@ def obtener_ranking_artistas(ranking_df,brand_id = 0, ruta_csv = "../datos/02 Ba
     print("Usa la funcion subir_ranking_artistas(ranking_df) para subir los datos")
     return ranking_art
 
-def subir_ranking_artistas(ranking_df):
+def subir_ranking_artistas(ranking_df, metodo="auto"):
     """
     Sube el ranking de artistas a la base de datos.
 
@@ -524,6 +566,10 @@ def subir_ranking_artistas(ranking_df):
         - 'number_of_appearances': Número de apariciones del artista.
         - 'brand_id': Identificador de la marca asociada.
 
+    metodo : str, opcional (por defecto "auto")
+        Método de inserción de `sql.insertar_muchos_datos()`. Con "upsert" la subida es idempotente: al repetirla tras un
+        fallo parcial solo se insertan las filas que faltan (las existentes se actualizan u omiten según su clave natural).
+
     Proceso:
     --------
     1. Establece una conexión con la base de datos utilizando la función `sql.conectar_bd()`.
@@ -541,7 +587,7 @@ def subir_ranking_artistas(ranking_df):
 
     conexion = sql.conectar_bd()
     query = '''INSERT INTO artists_ranking(artist_name,number_of_appearances,brand_id) VALUES (%s,%s,%s)'''
-    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(ranking_df))
+    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(ranking_df),metodo=metodo)
 
 def mapeo_genres():
     """
@@ -616,7 +662,7 @@ def mapear_main_genres(generos_df,brand_id = 0, ruta_csv = "../datos/02 Base de
     - Si el `brand_id` no está presente, imprime un mensaje con los IDs disponibles y retorna un display de la tabla.
 
     2. Convierte los valores de 'genres_ranking' de cadenas a listas de tuplas:
-    - Aplica `ast.literal_eval` a los valores no nulos para transformar las cadenas en listas de tuplas.
+    - Aplica `alm.a_estructura` a los valores no nulos para transformar las cadenas en listas de tuplas (los leídos de Parquet ya lo son).
 
     3. Descompone las listas de tuplas:
     - Itera sobre las listas para descomponerlas en columnas planas:
@@ -659,7 +705,7 @@ def mapear_main_genres(generos_df,brand_id = 0, ruta_csv = "../datos/02 Base de
         return display(df)
     
     generos = generos_df[["brand","genres_ranking"]]
-    generos["genres_ranking"] = generos["genres_ranking"].apply(lambda x: ast.literal_eval(x) if pd.notna(x) else [])
+    generos["genres_ranking"] = generos["genres_ranking"].apply(lambda x: alm.a_estructura(x, []))
     
     lista_brands = []
     lista_generos = []
@@ -759,7 +805,7 @@ def obtener_main_genres(generos_df,brand_id = 0, ruta_csv = "../datos/02 Base de
     print("Usa la funcion subir_main_genres(main_generos) para subir los datos")
     return main_generos
 
-def subir_main_genres(main_generos_df):
+def subir_main_genres(main_generos_df, metodo="auto"):
     """
     Función 3 de 3:
     ------------
@@ -773,6 +819,10 @@ def subir_main_genres(main_generos_df):
         - 'number_of_appearances': Número total de apariciones del género.
         - 'brand_id': Identificador de la marca asociada.
 
+    metodo : str, opcional (por defecto "auto")
+        Método de inserción de `sql.insertar_muchos_datos()`. Con "upsert" la subida es idempotente: al repetirla tras un
+        fallo parcial solo se insertan las filas que faltan (las existentes se actualizan u omiten según su clave natural).
+
     Proceso:
     --------
     1. Establece una conexión con la base de datos utilizando la función `sql.conectar_bd()`.
@@ -795,7 +845,7 @@ def subir_main_genres(main_generos_df):
     """
     conexion = sql.conectar_bd()
     query = '''INSERT INTO main_genres(genre_name,number_of_appearances,brand_id) VALUES (%s,%s,%s)'''
-    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(main_generos_df))
+    sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(main_generos_df),metodo=metodo)
 
 def obtener_subgenres(subgeneros_df, brand_id = 0, ruta_csv = "../datos/02 Base de Datos/tempsave_subgenre.csv"):
     """
@@ -895,7 +945,7 @@ def obtener_subgenres(subgeneros_df, brand_id = 0, ruta_csv = "../datos/02 Base
     print("Usa la funcion subir_main_genres(main_generos) para subir los datos")
     return subgeneros
 
-def subir_subgenres(subgeneros_df, auto_id=False):
+def subir_subgenres(subgeneros_df, auto_id=False, metodo="auto"):
     """
     Sube los datos de subgéneros a la base de datos.
 
@@ -908,6 +958,13 @@ def subir_subgenres(subgeneros_df, auto_id=False):
         - 'main_genre': Identificador del género principal asociado.
         - 'brand_id': Identificador de la marca asociada.
 
+    auto_id : bool, opcional (por defecto False)
+        Si es True, se sube también la columna `id` del DataFrame.
+
+    metodo : str, opcional (por defecto "auto")
+        Método de inserción de `sql.insertar_muchos_datos()`. Con "upsert" la subida es idempotente: al repetirla tras un
+        fallo parcial solo se insertan las filas que faltan (las existentes se actualizan u omiten según su clave natural).
+
     Proceso:
     --------
     1. Establece una conexión con la base de datos utilizando la función `sql.conectar_bd()`.
@@ -930,8 +987,46 @@ def subir_subgenres(subgeneros_df, auto_id=False):
     if auto_id:
         conexion = sql.conectar_bd()
         query = '''INSERT INTO subgenres(id,subgenre_name,number_of_appearances,main_genre,brand_id) VALUES (%s,%s,%s,%s,%s)'''
-        sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(subgeneros_df))
+        sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(subgeneros_df),metodo=metodo)
     else:
         conexion = sql.conectar_bd()
         query = '''INSERT INTO subgenres(subgenre_name,number_of_appearances,main_genre,brand_id) VALUES (%s,%s,%s,%s)'''
-        sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(subgeneros_df))
+        sql.insertar_muchos_datos(conexion,query,sql.generar_tupla(subgeneros_df),metodo=metodo)
+
+def subir_ids_spotify(diccionario=None):
+    """
+    Sube a la base de datos los IDs del diccionario de IDs de Spotify que todavía no están en la tabla `spotify_ids`.
+
+    Parámetros:
+    -----------
+    diccionario : soporte_ids.DiccionarioIds, opcional
+        Diccionario con los IDs de Spotify y sus códigos enteros (por defecto, el compartido que rellenan `tabla_resumen`
+        y `tabla_resumen_por_bloques`: `ids_spotify.diccionario_compartido()`).
+
+    Proceso:
+    --------
+    1. Crea la tabla `spotify_ids` si no existe (`ids_spotify.QUERY_TABLA_IDS`).
+    2. Consulta el código más alto ya subido: como los códigos son consecutivos y no cambian, solo se suben los posteriores.
+    3. Inserta las filas nuevas `(id, spotify_id)` con `sql.insertar_muchos_datos()`.
+
+    Notas:
+    ------
+    - La tabla permite cruzar las tablas de la base de datos por un entero en lugar de por el ID de 22 caracteres,
+      con los mismos códigos que la columna 'artist_key' de `explotar_artistas` (diccionario compartido "ids_spotify").
+    - Sube siempre el diccionario completo guardado con `DiccionarioIds.guardar()`, para que los códigos coincidan.
+    """
+    diccionario = diccionario if diccionario is not None else ids_spotify.diccionario_compartido()
+    conexion = sql.conectar_bd()
+    sql.modificar_bd(conexion, ids_spotify.QUERY_TABLA_IDS)
+
+    conexion = sql.conectar_bd()
+    maximo = sql.consulta_sql(conexion, '''SELECT COALESCE(MAX(id), -1) AS maximo FROM spotify_ids''')
+    maximo = int(maximo.iloc[0, 0])
+
+    filas = [(codigo, spotify_id) for codigo, spotify_id in diccionario.filas() if codigo > maximo]
+    if not filas:
+        print("No hay IDs nuevos que subir")
+        return
+    conexion = sql.conectar_bd()
+    query = '''INSERT INTO spotify_ids(id,spotify_id) VALUES (%s,%s)'''
+    sql.insertar_muchos_datos(conexion,query,filas)
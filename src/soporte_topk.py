@@ -0,0 +1,171 @@
+#######################################################################################
+##            Estructuras de datos                                                   ##
+#######################################################################################
+# Montículo para localizar el contador mínimo sin recorrer todos
+import heapq
+# Para numerar las entradas del montículo (desempate estable)
+from itertools import count
+
+#######################################################################################
+##            Fin de los Imports                                                     ##
+#######################################################################################
+
+
+class EspacioAhorro:
+    """
+    Ranking aproximado de los elementos más frecuentes con memoria acotada (algoritmo Space-Saving de Metwally et al.).
+
+    Mantiene como mucho `capacidad` contadores. Cuando llega un elemento nuevo y no queda sitio, sustituye al elemento con el
+    contador más bajo y hereda su cuenta (que pasa a ser el error máximo del nuevo elemento).
+
+    Parámetros:
+    -----------
+    capacidad : int
+        Número máximo de contadores (por ejemplo, 10 veces el número de elementos que se van a mostrar).
+
+    Garantías:
+    ----------
+    - La cuenta estimada de cada elemento nunca es menor que la real y la supera como mucho en su `error`.
+    - El error de cualquier elemento es como mucho `total / capacidad` (`error_maximo`).
+    - Todo elemento con una frecuencia real mayor que `total / capacidad` está en el ranking.
+
+    Notas:
+    ------
+    - El coste por elemento es O(log capacidad), y la memoria no depende del número de elementos distintos
+      (artistas y géneros de cola larga no ocupan memoria).
+    - Mientras no se llena (`capacidad` mayor que el número de elementos distintos), las cuentas son exactas y el error es 0.
+    - Dos rankings se pueden fusionar con `fusionar()` (por ejemplo, uno por bloque de seguidores o por marca).
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    ranking = EspacioAhorro(capacidad=1000)
+    ranking.añadir_muchos(nombres_artistas)
+    for nombre, apariciones, error in ranking.top(50):
+        print(nombre, apariciones, error)
+    """
+
+    def __init__(self, capacidad):
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1")
+        self.capacidad = capacidad
+        self.total = 0
+        self.cuentas = {}
+        self.errores = {}
+        self._monticulo = []
+        self._orden = count()
+
+    def añadir(self, elemento, cantidad=1):
+        """
+        Suma `cantidad` apariciones de `elemento`.
+        """
+        self.total += cantidad
+        if elemento in self.cuentas:
+            self.cuentas[elemento] += cantidad
+        elif len(self.cuentas) < self.capacidad:
+            self.cuentas[elemento] = cantidad
+            self.errores[elemento] = 0
+        else:
+            # Sustituir al elemento con el contador mínimo; el nuevo hereda su cuenta como error
+            minimo, expulsado = self._minimo()
+            del self.cuentas[expulsado]
+            del self.errores[expulsado]
+            self.cuentas[elemento] = minimo + cantidad
+            self.errores[elemento] = minimo
+        heapq.heappush(self._monticulo, (self.cuentas[elemento], next(self._orden), elemento))
+        # Las entradas antiguas del montículo se descartan al buscar el mínimo; se reconstruye si crece demasiado
+        if len(self._monticulo) > 4 * self.capacidad:
+            self._reconstruir()
+
+    def añadir_muchos(self, elementos):
+        """
+        Suma una aparición por cada elemento de `elementos` (se omiten los nulos).
+        """
+        for elemento in elementos:
+            if elemento is not None:
+                self.añadir(elemento)
+        return self
+
+    def fusionar(self, otro):
+        """
+        Suma las cuentas de otro ranking (los errores se suman; las garantías se mantienen con el total combinado).
+        """
+        for elemento, cuenta in otro.cuentas.items():
+            error = otro.errores.get(elemento, 0)
+            self.añadir(elemento, cuenta)
+            self.errores[elemento] = self.errores.get(elemento, 0) + error
+        # `añadir` ya ha sumado las cuentas de otro al total
+        return self
+
+    def top(self, n=None):
+        """
+        Devuelve los `n` elementos con más apariciones estimadas como `[(elemento, apariciones, error), ...]`,
+        de mayor a menor (todos los contadores si `n` es `None`).
+        """
+        ranking = sorted(self.cuentas.items(), key=lambda x: x[1], reverse=True)
+        if n is not None:
+            ranking = ranking[:n]
+        return [(elemento, cuenta, self.errores[elemento]) for elemento, cuenta in ranking]
+
+    def ranking(self, n=None):
+        """
+        Igual que `top()` pero sin el error: `[(elemento, apariciones), ...]`, el formato de los rankings del pipeline.
+        """
+        return [(elemento, cuenta) for elemento, cuenta, _ in self.top(n)]
+
+    @property
+    def error_maximo(self):
+        """
+        Cota del error de cualquier cuenta: el contador mínimo si el ranking está lleno (como mucho `total / capacidad`), 0 si no.
+        """
+        if len(self.cuentas) < self.capacidad:
+            return 0
+        return min(self.cuentas.values())
+
+    @property
+    def exacto(self):
+        """
+        `True` si todavía no se ha expulsado ningún elemento (las cuentas son exactas).
+        """
+        return not any(self.errores.values())
+
+    def _minimo(self):
+        while True:
+            cuenta, _, elemento = self._monticulo[0]
+            if self.cuentas.get(elemento) == cuenta:
+                heapq.heappop(self._monticulo)
+                return cuenta, elemento
+            heapq.heappop(self._monticulo)  # Entrada antigua (el elemento ha crecido o ya no está)
+
+    def _reconstruir(self):
+        self._monticulo = [(cuenta, next(self._orden), elemento) for elemento, cuenta in self.cuentas.items()]
+        heapq.heapify(self._monticulo)
+
+def ranking_aproximado(elementos, n, capacidad=None):
+    """
+    Ranking de los `n` elementos más frecuentes de `elementos` con memoria acotada.
+
+    Parámetros:
+    -----------
+    elementos : iterable
+        Elementos a contar (por ejemplo, los nombres de artista de todos los pares seguidor-artista).
+
+    n : int
+        Número de elementos del ranking.
+
+    capacidad : int, opcional
+        Contadores del `EspacioAhorro` (por defecto `10 * n`).
+
+    Retorna:
+    --------
+    tuple[list[tuple], int]
+        - Ranking `[(elemento, apariciones), ...]` de mayor a menor.
+        - Error máximo de las cuentas (0 si son exactas).
+
+    Ejemplo de uso:
+    ---------------
+    ```python
+    ranking, error = ranking_aproximado(nombres_artistas, 50)
+    """
+    esquema = EspacioAhorro(capacidad or 10 * n).añadir_muchos(elementos)
+    return esquema.ranking(n), esquema.error_maximo